@@ -6,10 +6,24 @@ MiniMax AI 统一命令行工具
 """
 
 import os
+import re
 import sys
 import json
+import glob
 import time
+import asyncio
+import random
+import hashlib
+import logging
+import threading
+import atexit
+from contextlib import contextmanager, asynccontextmanager, nullcontext
+from collections import deque, OrderedDict
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, Future, wait as wait_futures
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import requests
+from requests.adapters import HTTPAdapter
 import base64
 import mimetypes
 from datetime import datetime
@@ -17,14 +31,1088 @@ from pathlib import Path
 from typing import Optional, Dict, Any
 import argparse
 
+logger = logging.getLogger("minimax")
+
+_LOG_LEVELS = {"DEBUG": logging.DEBUG, "INFO": logging.INFO, "WARN": logging.WARNING,
+               "WARNING": logging.WARNING, "ERROR": logging.ERROR}
+
+
+class _JSONLogFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"time": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+                 "level": record.levelname, "logger": record.name, "message": record.getMessage()}
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(level: str = "INFO", json_format: bool = False, log_file: str = None,
+                  console: bool = True) -> logging.Logger:
+    """配置 minimax 日志器（重复调用会替换之前的配置）
+
+    Args:
+        level: 日志级别 DEBUG/INFO/WARNING/ERROR，DEBUG 会输出请求数据（大段 Base64/hex 已截断）
+        json_format: 每条日志输出为一行 JSON（便于日志系统采集）
+        log_file: 同时写入的日志文件路径，如 output/logs/minimax.log
+        console: 是否输出到标准输出
+
+    Returns:
+        minimax 日志器
+    """
+    logger.setLevel(_LOG_LEVELS.get(str(level).upper(), logging.INFO))
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    if console:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(_JSONLogFormatter() if json_format else logging.Formatter("[%(levelname)s] %(message)s"))
+        logger.addHandler(handler)
+    if log_file:
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.FileHandler(log_file, encoding='utf-8')
+        handler.setFormatter(_JSONLogFormatter() if json_format else
+                             logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+_BLOB_RE = re.compile(r'[A-Za-z0-9+/=_-]+')
+
+
+def _redact_payload(value, max_chars: int = 200):
+    """日志用的请求数据副本：Base64/hex/Data URL 等长串替换为摘要，其他长文本截断"""
+    if isinstance(value, dict):
+        return {k: _redact_payload(v, max_chars) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact_payload(v, max_chars) for v in value]
+    if not isinstance(value, str) or len(value) <= max_chars:
+        return value
+    if value.startswith('data:'):
+        return f"<{value[:100].split(',', 1)[0]} {len(value)}字符>"
+    if _BLOB_RE.fullmatch(value[:max_chars]):  # 只检查开头，避免扫描整个大字符串
+        return f"<base64/hex {len(value)}字符>"
+    return f"{value[:max_chars]}...（共{len(value)}字符）"
+
+
+class _SSEParser:
+    """Server-Sent Events 增量解析器，逐行输入，事件完整时返回解析后的 data"""
+
+    def __init__(self):
+        self.data_lines = []
+
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        """输入一行（不含换行符），返回完整事件的 JSON 数据，未完整时返回 None"""
+        if not line:
+            return self.flush()
+        if line.startswith(':'):  # 注释/心跳
+            return None
+        field, _, value = line.partition(':')
+        if field == 'data':
+            self.data_lines.append(value[1:] if value.startswith(' ') else value)
+        return None
+
+    def flush(self) -> Optional[Dict[str, Any]]:
+        """结束当前事件（流结束时也需调用一次）"""
+        if not self.data_lines:
+            return None
+        raw = '\n'.join(self.data_lines)
+        self.data_lines = []
+        if raw.strip() == '[DONE]':
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+
+
+class MiniMaxError(Exception):
+    """MiniMax 调用错误基类"""
+
+
+class MiniMaxAPIError(MiniMaxError):
+    """接口返回 base_resp.status_code != 0"""
+
+    def __init__(self, status_code: int, status_msg: str = ""):
+        self.status_code = status_code
+        self.status_msg = status_msg
+        super().__init__(f"API错误({status_code}): {status_msg}")
+
+
+class MiniMaxRateLimitError(MiniMaxAPIError):
+    """触发服务端限流（status_code 1002 或 HTTP 429）"""
+
+    def __init__(self, status_code: int = 1002, status_msg: str = "", retry_after: float = None):
+        self.retry_after = retry_after
+        super().__init__(status_code, status_msg)
+
+
+class MiniMaxHTTPError(MiniMaxError):
+    """HTTP 状态码错误（4xx/5xx）"""
+
+    def __init__(self, http_status: int, message: str = "", retry_after: float = None):
+        self.http_status = http_status
+        self.retry_after = retry_after
+        super().__init__(f"HTTP {http_status}: {message}")
+
+
+class MiniMaxNetworkError(MiniMaxError):
+    """连接失败、超时、响应中断等网络错误"""
+
+
+class MiniMaxCircuitOpenError(MiniMaxError):
+    """接口熔断中，请求未发出即失败"""
+
+    def __init__(self, key: str, retry_in: float):
+        self.key = key
+        self.retry_in = retry_in
+        super().__init__(f"接口 {key} 熔断中，{retry_in:.0f}秒后重试")
+
+
+class RetryPolicy:
+    """重试策略：区分可重试错误，指数退避 + 随机抖动，优先遵循 Retry-After
+
+    可重试：网络错误、HTTP 429/5xx、限流(1002)及 RETRYABLE_CODES 中的服务端临时错误；
+    其余（参数错误、鉴权失败、余额不足、内容审核等）立即失败。
+    """
+
+    # 1000 未知错误, 1001 超时, 1002 限流, 1013 服务内部错误
+    RETRYABLE_CODES = {1000, 1001, 1002, 1013}
+    RETRYABLE_HTTP = {408, 429, 500, 502, 503, 504}
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 30.0, jitter: bool = True):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, MiniMaxNetworkError):
+            return True
+        if isinstance(error, MiniMaxHTTPError):
+            return error.http_status in self.RETRYABLE_HTTP
+        if isinstance(error, MiniMaxAPIError):
+            return error.status_code in self.RETRYABLE_CODES
+        return False
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        """attempt 从0开始计数"""
+        return attempt + 1 < self.max_attempts and self.is_retryable(error)
+
+    def delay(self, attempt: int, error: Exception = None) -> float:
+        """第 attempt 次失败后的等待秒数"""
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return min(float(retry_after), self.max_delay)
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        # full jitter：打散同时失败的调用方，避免同步重试
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+class CircuitBreaker:
+    """按接口分组的熔断器
+
+    closed: 正常放行，统计最近 window 次调用的失败率；
+    open: 失败率超过 failure_rate 后打开，open_seconds 内直接抛出 MiniMaxCircuitOpenError；
+    half_open: 冷却结束后放行 half_open_probes 个探测请求，成功则关闭，失败则重新打开。
+
+    只有上游故障（网络错误、HTTP 5xx、服务端临时错误）计为失败；
+    参数错误等 4xx 说明上游可用，计为成功；限流交给 RateLimiter 处理，不计入。
+    """
+
+    UPSTREAM_CODES = {1000, 1001, 1013}
+
+    def __init__(self, window: int = 20, failure_rate: float = 0.5, min_calls: int = 5,
+                 open_seconds: float = 30, half_open_probes: int = 1, log=None):
+        self.window = window
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.log = log or (lambda message, level="INFO": None)
+        self._lock = threading.Lock()
+        self._circuits = {}
+
+    @staticmethod
+    def key_for(endpoint: str) -> str:
+        return RateLimiter.key_for(endpoint) or endpoint.split('?')[0].strip('/')
+
+    def _circuit(self, key: str) -> dict:
+        if key not in self._circuits:
+            self._circuits[key] = {"state": "closed", "results": deque(maxlen=self.window),
+                                   "opened_at": 0.0, "probes": 0}
+        return self._circuits[key]
+
+    def state(self, key: str) -> str:
+        with self._lock:
+            return self._circuit(key)["state"]
+
+    def before_call(self, key: str) -> bool:
+        """请求前检查，熔断中时抛出 MiniMaxCircuitOpenError
+
+        Returns:
+            本次调用是否占用了半开状态的探测名额（调用未能 record 时需 release）
+        """
+        with self._lock:
+            circuit = self._circuit(key)
+            if circuit["state"] == "open":
+                remaining = circuit["opened_at"] + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    raise MiniMaxCircuitOpenError(key, remaining)
+                circuit["state"] = "half_open"
+                circuit["probes"] = 0
+                self.log(f"🔌 {key} 熔断冷却结束，发送探测请求", "WARN")
+            if circuit["state"] == "half_open":
+                if circuit["probes"] >= self.half_open_probes:
+                    raise MiniMaxCircuitOpenError(key, 0)
+                circuit["probes"] += 1
+                return True
+            return False
+
+    def release(self, key: str, probe: bool):
+        """调用未产生结果就结束（被取消、中断等）时，归还 before_call 占用的探测名额"""
+        if not probe:
+            return
+        with self._lock:
+            circuit = self._circuit(key)
+            if circuit["state"] == "half_open":
+                circuit["probes"] = max(0, circuit["probes"] - 1)
+
+    def is_failure(self, error: Exception = None) -> bool:
+        if error is None or isinstance(error, (MiniMaxRateLimitError, MiniMaxCircuitOpenError)):
+            return False
+        if isinstance(error, MiniMaxNetworkError):
+            return True
+        if isinstance(error, MiniMaxHTTPError):
+            return error.http_status >= 500
+        if isinstance(error, MiniMaxAPIError):
+            return error.status_code in self.UPSTREAM_CODES
+        return False
+
+    def record(self, key: str, error: Exception = None):
+        """记录一次调用结果（error 为 None 表示成功）"""
+        # 限流既不算失败也不说明上游已恢复：只归还探测名额，不改变熔断状态
+        ignored = isinstance(error, (MiniMaxRateLimitError, MiniMaxCircuitOpenError))
+        failed = self.is_failure(error)
+        with self._lock:
+            circuit = self._circuit(key)
+            if circuit["state"] == "half_open":
+                circuit["probes"] = max(0, circuit["probes"] - 1)
+                if ignored:
+                    return
+                if failed:
+                    self._open(key, circuit)
+                else:
+                    circuit["state"] = "closed"
+                    circuit["results"].clear()
+                    self.log(f"✅ {key} 探测成功，熔断关闭")
+                return
+            if ignored:
+                return
+
+            circuit["results"].append(failed)
+            failures = sum(circuit["results"])
+            if (circuit["state"] == "closed" and len(circuit["results"]) >= self.min_calls
+                    and failures / len(circuit["results"]) >= self.failure_rate):
+                self._open(key, circuit)
+
+    def _open(self, key: str, circuit: dict):
+        circuit["state"] = "open"
+        circuit["opened_at"] = time.monotonic()
+        circuit["results"].clear()
+        self.log(f"🔌 {key} 失败率过高，熔断{self.open_seconds:.0f}秒", "ERROR")
+
+
+def _parse_retry_after(headers) -> Optional[float]:
+    """解析 Retry-After 头（秒数或 HTTP 日期）"""
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        from email.utils import parsedate_to_datetime
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _check_result(result: dict) -> dict:
+    """检查 base_resp，非0时抛出对应的 MiniMaxAPIError"""
+    base_resp = result.get('base_resp') if isinstance(result, dict) else None
+    if base_resp and base_resp.get('status_code', 0) != 0:
+        code, msg = base_resp['status_code'], base_resp.get('status_msg', '')
+        if code == 1002:
+            raise MiniMaxRateLimitError(code, msg)
+        raise MiniMaxAPIError(code, msg)
+    return result
+
+
+def _raise_for_http(status: int, headers, text: str = ""):
+    """HTTP 状态码 >= 400 时抛出 MiniMaxHTTPError（429 为 MiniMaxRateLimitError）"""
+    if status < 400:
+        return
+    retry_after = _parse_retry_after(headers)
+    if status == 429:
+        raise MiniMaxRateLimitError(1002, text[:200] or "Too Many Requests", retry_after)
+    raise MiniMaxHTTPError(status, text[:200], retry_after)
+
+
+def _extract_usage(result: dict) -> dict:
+    """提取响应（或流式事件）中的计费用量：对话 token 数、语音合成字符数"""
+    usage = {}
+    if not isinstance(result, dict):
+        return usage
+    message = result.get('message')
+    tokens = result.get('usage') or (message.get('usage') if isinstance(message, dict) else None)
+    if isinstance(tokens, dict):
+        # chatcompletion_v2 为 prompt/completion_tokens，Anthropic 接口为 input/output_tokens
+        for name, keys in (("prompt_tokens", ("prompt_tokens", "input_tokens")),
+                           ("completion_tokens", ("completion_tokens", "output_tokens")),
+                           ("total_tokens", ("total_tokens",))):
+            value = next((tokens[k] for k in keys if tokens.get(k)), None)
+            if value:
+                usage[name] = value
+        if "total_tokens" not in usage and ("prompt_tokens" in usage or "completion_tokens" in usage):
+            usage["total_tokens"] = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+    extra_info = result.get('extra_info')
+    if isinstance(extra_info, dict) and extra_info.get('usage_characters'):
+        usage["characters"] = extra_info['usage_characters']
+    return usage
+
+
+def _error_code(error: Exception):
+    """错误对应的状态码：base_resp.status_code 或 HTTP 状态码，其他错误为异常类型名"""
+    if isinstance(error, MiniMaxAPIError):
+        return error.status_code
+    if isinstance(error, MiniMaxHTTPError):
+        return error.http_status
+    return type(error).__name__
+
+
+_SENTENCE_RE = re.compile(r'.+?(?:[。！？!?；;…]+[”"’』」)）]*|\.(?=\s)|$)')
+_CLAUSE_RE = re.compile(r'.+?(?:[，,、：:]+|$)')
+
+
+def _split_tts_text(text: str, max_chars: int) -> list:
+    """按段落/句子边界切分长文本，每段不超过 max_chars
+
+    段落内按句末标点切句，相邻句子尽量合并到同一段；超长句子再按逗号切分，仍超长则硬切。
+    """
+    pieces = []  # (片段, 是否为段落结尾)
+    for para in text.splitlines():
+        para = para.strip()
+        if not para:
+            continue
+        sentences = [m.group() for m in _SENTENCE_RE.finditer(para) if m.group().strip()]
+        for i, sentence in enumerate(sentences):
+            parts = [sentence]
+            if len(sentence) > max_chars:
+                parts = [m.group() for m in _CLAUSE_RE.finditer(sentence) if m.group()]
+                parts = [part[j:j + max_chars] for part in parts for j in range(0, len(part), max_chars)]
+            for j, part in enumerate(parts):
+                pieces.append((part, i == len(sentences) - 1 and j == len(parts) - 1))
+
+    chunks, buf = [], ""
+    for piece, para_end in pieces:
+        if buf and len(buf) + len(piece) > max_chars:
+            chunks.append(buf.strip())
+            buf = ""
+        buf += piece + ("\n" if para_end else "")
+    if buf.strip():
+        chunks.append(buf.strip())
+    return chunks
+
+
+def _strip_id3(data: bytes) -> bytes:
+    """去掉 MP3 数据首部的 ID3v2 标签和尾部的 ID3v1 标签，只保留音频帧"""
+    if data[:3] == b'ID3' and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        size += 20 if data[5] & 0x10 else 10  # 含 footer 时多10字节
+        data = data[size:]
+    if len(data) >= 128 and data[-128:-125] == b'TAG':
+        data = data[:-128]
+    return data
+
+
+# MPEG Layer III 帧头参数表（kbps / Hz），按版本位区分: 3=MPEG1, 2=MPEG2, 0=MPEG2.5
+_MP3_BITRATES = {
+    3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def _parse_mp3_header(data: bytes, pos: int) -> Optional[tuple]:
+    """解析 pos 处的 Layer III 帧头，返回 (帧长, (版本, 采样率, 声道数), 边信息偏移)，非帧头返回 None"""
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0 or (b1 >> 1) & 0x03 != 0x01:
+        return None
+    version = (b1 >> 3) & 0x03
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 0x03
+    if version == 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = _MP3_BITRATES[3 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 0x01
+    mono = (b3 >> 6) == 0x03
+    length = (144 if version == 3 else 72) * bitrate // sample_rate + padding
+    side_info = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+    crc = 0 if b1 & 0x01 else 2
+    return length, (version, sample_rate, 1 if mono else 2), 4 + crc + side_info
+
+
+def _iter_mp3_frames(data: bytes):
+    """遍历 MP3 数据中的完整帧，产出 (起始位置, 帧长, 参数, 边信息偏移)，跳过无法识别的字节"""
+    pos, end = 0, len(data) - 4
+    while pos <= end:
+        header = _parse_mp3_header(data, pos)
+        if header is None or pos + header[0] > len(data):
+            pos += 1
+            continue
+        yield (pos,) + header
+        pos += header[0]
+
+
+def join_mp3(chunks: list) -> Optional[bytes]:
+    """在帧级别拼接多段 MP3，不重新编码
+
+    去掉每段的 ID3 标签和 Xing/Info/VBRI 信息帧（其中的时长只对单段有效），按顺序追加音频帧。
+    各段的 MPEG 版本、采样率或声道数不一致，或找不到任何音频帧时返回 None，调用方应改用转码拼接。
+    """
+    frames = []
+    params = None
+    for chunk in chunks:
+        data = _strip_id3(bytes(chunk))
+        first = True
+        for pos, length, frame_params, side_offset in _iter_mp3_frames(data):
+            if params is None:
+                params = frame_params
+            elif frame_params != params:
+                return None
+            if first:
+                first = False
+                tag = data[pos + side_offset:pos + side_offset + 4]
+                if tag in (b'Xing', b'Info') or data[pos + 36:pos + 40] == b'VBRI':
+                    continue
+            frames.append(data[pos:pos + length])
+    return b"".join(frames) if frames else None
+
+
+def _join_audio_chunks(chunks: list, format: str = "mp3") -> bytes:
+    """按顺序拼接分段合成的音频（mp3 按帧拼接，pcm 直接拼接）"""
+    if format == "mp3":
+        joined = join_mp3(chunks)
+        if joined is None:
+            raise ValueError("各段MP3的采样率或声道数不一致（或不含有效音频帧），无法直接拼接")
+        return joined
+    if format == "pcm":
+        return b"".join(chunks)
+    raise ValueError("音频拼接仅支持mp3,pcm格式")
+
+
+class _TokenBucket:
+    """令牌桶（预约式）：调用方先扣减令牌，再按返回的时长等待，保证按到达顺序排队"""
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or max(1.0, per_minute / 6)  # 默认允许约10秒的突发
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def reserve(self, amount: float = 1) -> float:
+        """预约 amount 个令牌，返回需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(delay, self.paused_until - now)
+
+    def pause(self, seconds: float):
+        """暂停发放令牌（服务端返回限流时调用）"""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RateLimiter:
+    """客户端限流：按接口分组的令牌桶（RPM/TPM）与并发上限
+
+    调用方在发送请求前排队等待，避免触发服务端 1002 限流后的重试风暴。
+    同一个 RateLimiter 可在多个客户端间共享，使其共用同一份配额。
+
+    limits 格式: {"t2a_v2": {"rpm": 60, "tpm": 20000, "concurrency": 8}, ...}
+    未配置的项不做限制；分组键见 key_for()。
+    """
+
+    DEFAULT_LIMITS = {
+        "chat": {"rpm": 120, "concurrency": 16},
+        "t2a_v2": {"rpm": 60, "concurrency": 16},
+        "image_generation": {"rpm": 10, "concurrency": 4},
+        "video_generation": {"rpm": 5, "concurrency": 4},
+        "music_generation": {"rpm": 5, "concurrency": 2},
+    }
+
+    def __init__(self, limits: dict = None, use_defaults: bool = True):
+        defaults = self.DEFAULT_LIMITS if use_defaults else {}
+        self.limits = {key: dict(value) for key, value in defaults.items()}
+        for key, value in (limits or {}).items():
+            self.limits.setdefault(key, {}).update(value)
+        self._lock = threading.Lock()
+        self._rpm = {}
+        self._tpm = {}
+        self._slots = {}
+        for key, limit in self.limits.items():
+            if limit.get('rpm'):
+                self._rpm[key] = _TokenBucket(limit['rpm'])
+            if limit.get('tpm'):
+                self._tpm[key] = _TokenBucket(limit['tpm'], capacity=limit['tpm'])
+            if limit.get('concurrency'):
+                self._slots[key] = threading.BoundedSemaphore(limit['concurrency'])
+
+    @staticmethod
+    def parse_spec(specs: list) -> dict:
+        """解析命令行配额，如 ["t2a_v2:rpm=60,concurrency=4", "chat:tpm=100000"]"""
+        limits = {}
+        for spec in specs:
+            key, _, items = spec.partition(':')
+            limit = limits.setdefault(key.strip(), {})
+            for item in items.split(','):
+                name, _, value = item.partition('=')
+                if name.strip() not in ('rpm', 'tpm', 'concurrency') or not value.strip().isdigit():
+                    raise ValueError(f"限流配置格式错误: {spec}（示例: t2a_v2:rpm=60,concurrency=4）")
+                limit[name.strip()] = int(value)
+        return limits
+
+    @staticmethod
+    def key_for(endpoint: str) -> Optional[str]:
+        """接口路径 -> 限流分组键，不参与限流的接口返回 None"""
+        path = endpoint.split('?')[0].strip('/')
+        if path in ('text/chatcompletion_v2', 'anthropic/v1/messages', 'v1/messages'):
+            return "chat"
+        if path in ('t2a_v2', 'image_generation', 'video_generation', 'music_generation'):
+            return path
+        return None
+
+    @staticmethod
+    def estimate_tokens(key: str, payload: dict = None) -> int:
+        """估算请求消耗的 token 数（对话按输入字符数+max_tokens，语音按文本字符数）"""
+        if not payload:
+            return 0
+        if key == "chat":
+            chars = sum(len(str(m.get('content', ''))) for m in payload.get('messages', []))
+            return chars + len(str(payload.get('system', ''))) + int(payload.get('max_tokens', 0))
+        if key == "t2a_v2":
+            return len(payload.get('text', ''))
+        return 0
+
+    def reserve(self, key: str, tokens: int = 0) -> float:
+        """预约一次请求的 RPM/TPM 配额，返回需要等待的秒数"""
+        with self._lock:
+            delay = self._rpm[key].reserve(1) if key in self._rpm else 0.0
+            if tokens and key in self._tpm:
+                delay = max(delay, self._tpm[key].reserve(tokens))
+        return delay
+
+    def penalize(self, key: str, seconds: float):
+        """服务端返回限流（1002）后暂停该分组，让排队的调用方一起等待"""
+        if key in self._rpm:
+            with self._lock:
+                self._rpm[key].pause(seconds)
+
+    def slot(self, key: str):
+        """并发槽（未配置时返回 None）"""
+        return self._slots.get(key)
+
+    @contextmanager
+    def limit(self, endpoint: str, payload: dict = None):
+        """阻塞直到获得速率配额和并发槽
+
+        先预约配额并等待，再占用并发槽：只在等待令牌的调用方不占槽，实际并发才能达到上限。
+        """
+        key = self.key_for(endpoint)
+        if key is None:
+            yield
+            return
+        delay = self.reserve(key, self.estimate_tokens(key, payload))
+        if delay > 0:
+            time.sleep(delay)
+        slot = self.slot(key)
+        if slot:
+            slot.acquire()
+        try:
+            yield
+        finally:
+            if slot:
+                slot.release()
+
+
+class DiskCache:
+    """内容寻址的磁盘缓存：每个条目为 <key>.bin（数据）+ <key>.json（元数据）
+
+    总大小超过 max_bytes 时按最近使用时间（文件 mtime，命中时刷新）淘汰旧条目；
+    写入先落临时文件再原子替换，进程中断不会留下半个条目。
+    """
+
+    def __init__(self, directory, max_bytes: int = 512 * 1024 * 1024, ttl: float = None):
+        """
+        Args:
+            directory: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+            ttl: 条目有效期（秒），None 表示不过期
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._total = None  # 首次写入时扫描目录统计
+
+    @staticmethod
+    def make_key(payload: dict) -> str:
+        """对请求数据做规范化 JSON 序列化后取 sha256 作为缓存键"""
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        return self.directory / f"{key}.bin", self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[tuple]:
+        """读取条目，返回 (数据, 元数据)；不存在、已过期或损坏时返回 None"""
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if self.ttl is not None and time.time() - entry.get('created_at', 0) > self.ttl:
+                self.delete(key)
+                return None
+            data = data_path.read_bytes()
+            now = time.time()
+            os.utime(data_path, (now, now))  # 刷新最近使用时间
+        except (OSError, ValueError):
+            return None
+        return data, entry.get('meta', {})
+
+    def set(self, key: str, data: bytes, meta: dict = None):
+        """写入条目（先写数据再写元数据，元数据存在即表示条目完整）"""
+        data_path, meta_path = self._paths(key)
+        entry = {"created_at": time.time(), "size": len(data), "meta": meta or {}}
+        with self._lock:
+            self._ensure_total()
+            old_size = data_path.stat().st_size if data_path.exists() else 0
+            tmp_path = data_path.with_name(data_path.name + '.tmp')
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, data_path)
+            tmp_path = meta_path.with_name(meta_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, meta_path)
+            self._total += len(data) - old_size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        """删除条目"""
+        with self._lock:
+            for path in self._paths(key):
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                except OSError:
+                    continue
+                if path.suffix == '.bin' and self._total is not None:
+                    self._total -= size
+
+    def clear(self):
+        """清空缓存目录"""
+        with self._lock:
+            for path in self.directory.iterdir():
+                if path.suffix in ('.bin', '.json', '.tmp'):
+                    path.unlink(missing_ok=True)
+            self._total = 0
+
+    def _ensure_total(self):
+        if self._total is None:
+            self._total = sum(p.stat().st_size for p in self.directory.glob('*.bin'))
+
+    def _evict(self):
+        """按最近使用时间从旧到新淘汰，直到总大小降到上限的90%"""
+        entries = sorted(self.directory.glob('*.bin'), key=lambda p: p.stat().st_mtime)
+        for data_path in entries:
+            if self._total <= self.max_bytes * 0.9:
+                break
+            try:
+                size = data_path.stat().st_size
+                data_path.with_suffix('.json').unlink(missing_ok=True)
+                data_path.unlink()
+            except OSError:
+                continue
+            self._total -= size
+
+
+def _encode_data_url(path: Path, mime_type: str, chunk_size: int = 3 * 1024 * 1024) -> str:
+    """分块读取文件并编码为 Base64 Data URL，不在内存中同时保留完整原始数据
+
+    chunk_size 为3的倍数，各块的 Base64 结果可直接拼接。
+    """
+    parts = [f"data:{mime_type};base64,"]
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            parts.append(base64.b64encode(chunk).decode('ascii'))
+    return "".join(parts)
+
+
+class _DataURLCache:
+    """图片 Data URL 缓存：内存 LRU（按字符数限制总大小）+ 可选的磁盘缓存
+
+    键包含文件路径、大小和修改时间，文件变化后自动失效；同一图片被多个线程同时请求时只编码一次。
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk: DiskCache = None):
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def get_or_create(self, key: str, create) -> tuple:
+        """返回 (data_url, 是否命中缓存)，未命中时调用 create() 生成"""
+        with self._lock:
+            value = self._get(key)
+            if value is not None:
+                return value, True
+            key_lock = self._pending.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                with self._lock:
+                    value = self._get(key)
+                if value is not None:
+                    return value, True
+                disk_key = DiskCache.make_key({"image": key}) if self.disk else None
+                entry = self.disk.get(disk_key) if disk_key else None
+                hit = entry is not None
+                value = entry[0].decode('ascii') if hit else create()
+                if disk_key and not hit:
+                    self.disk.set(disk_key, value.encode('ascii'))
+                with self._lock:
+                    self._put(key, value)
+            finally:
+                # create() 抛异常时也要移除，否则失败的键会一直留在 _pending 中
+                with self._lock:
+                    if self._pending.get(key) is key_lock:
+                        del self._pending[key]
+        return value, hit
+
+    def _get(self, key: str) -> Optional[str]:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def _put(self, key: str, value: str):
+        if len(value) > self.max_bytes:
+            return
+        self._items[key] = value
+        self._size += len(value)
+        while self._size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self._size -= len(evicted)
+
+
+class UsageStats:
+    """调用统计：收集每次接口调用的记录，并按接口汇总耗时、流量和计费用量
+
+    每条记录包含 endpoint, model, status, code, latency（含排队和重试的总耗时）,
+    ttfb（最后一次尝试发出请求到收到首字节）, request_bytes, response_bytes,
+    retries, cached, usage（prompt/completion/total_tokens、characters）。
+    同一个实例可在多个客户端间共享，线程安全。
+    """
+
+    USAGE_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens", "characters")
+
+    def __init__(self, max_records: int = 10000):
+        """
+        Args:
+            max_records: 保留的最近调用记录数（汇总数据不受影响）
+        """
+        self.records = deque(maxlen=max_records)
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, call: dict):
+        """添加一条调用记录"""
+        with self._lock:
+            self.records.append(call)
+            totals = self._totals.get(call['endpoint'])
+            if totals is None:
+                totals = self._totals[call['endpoint']] = {
+                    "calls": 0, "errors": 0, "retries": 0, "cached": 0, "latency": 0.0,
+                    "ttfb": 0.0, "ttfb_count": 0, "request_bytes": 0, "response_bytes": 0,
+                    "latencies": deque(maxlen=1000), **{k: 0 for k in self.USAGE_KEYS}}
+            totals["calls"] += 1
+            totals["errors"] += call['status'] != 'ok'
+            totals["retries"] += call['retries']
+            totals["cached"] += call['cached']
+            totals["latency"] += call['latency']
+            totals["latencies"].append(call['latency'])
+            if call['ttfb'] is not None:
+                totals["ttfb"] += call['ttfb']
+                totals["ttfb_count"] += 1
+            totals["request_bytes"] += call['request_bytes']
+            totals["response_bytes"] += call['response_bytes']
+            for key in self.USAGE_KEYS:
+                totals[key] += call['usage'].get(key, 0)
+
+    def summary(self) -> dict:
+        """按接口汇总：{endpoint: {calls, errors, retries, cached, avg_latency, p95_latency,
+        avg_ttfb, request_bytes, response_bytes, prompt_tokens, ...}}"""
+        with self._lock:
+            result = {}
+            for endpoint, totals in self._totals.items():
+                latencies = sorted(totals["latencies"])
+                result[endpoint] = {
+                    **{k: totals[k] for k in ("calls", "errors", "retries", "cached",
+                                              "request_bytes", "response_bytes", *self.USAGE_KEYS)},
+                    "avg_latency": totals["latency"] / totals["calls"],
+                    "p95_latency": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                    "avg_ttfb": totals["ttfb"] / totals["ttfb_count"] if totals["ttfb_count"] else None,
+                }
+            return result
+
+    def format_summary(self) -> str:
+        """生成适合终端显示的汇总表"""
+        summary = self.summary()
+        if not summary:
+            return "📊 本次运行没有接口调用"
+        # 中文表头按显示宽度（每个汉字占两列）对齐
+        header = [("接口", -28), ("调用", 6), ("失败", 6), ("重试", 6), ("缓存", 6), ("平均耗时", 10),
+                  ("P95", 9), ("首字节", 9), ("上行", 10), ("下行", 10), ("tokens", 10), ("字符", 9)]
+        lines = ["📊 接口调用统计:", "".join(
+            name.ljust(-width - sum(ord(ch) > 0x2E80 for ch in name)) if width < 0
+            else name.rjust(width - sum(ord(ch) > 0x2E80 for ch in name)) for name, width in header)]
+        for endpoint, item in sorted(summary.items()):
+            ttfb = f"{item['avg_ttfb']:.2f}s" if item['avg_ttfb'] is not None else "-"
+            lines.append(
+                f"{endpoint:<28}{item['calls']:>6}{item['errors']:>6}{item['retries']:>6}{item['cached']:>6}"
+                f"{item['avg_latency']:>9.2f}s{item['p95_latency']:>8.2f}s{ttfb:>9}"
+                f"{_format_bytes(item['request_bytes']):>10}{_format_bytes(item['response_bytes']):>10}"
+                f"{item['total_tokens']:>10}{item['characters']:>9}")
+        return "\n".join(lines)
+
+    def reset(self):
+        """清空所有记录"""
+        with self._lock:
+            self.records.clear()
+            self._totals.clear()
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+class MetricsRegistry:
+    """Prometheus 风格的指标注册表：计数器、直方图、仪表盘（线程安全）
+
+    MiniMaxClient(metrics=registry) 会自动更新下列指标（标签 endpoint 为接口路径，
+    code 为 base_resp.status_code / HTTP 状态码 / 异常类型名，成功为 0）：
+        minimax_requests_total{endpoint,code}            请求数（按最终结果）
+        minimax_request_errors_total{endpoint,code}      最终失败的请求数
+        minimax_retries_total{endpoint,code}             重试次数（code 为触发重试的错误）
+        minimax_request_duration_seconds{endpoint}       请求耗时（含排队和重试）
+        minimax_request_size_bytes{endpoint}             请求体大小
+        minimax_response_size_bytes{endpoint}            响应体大小
+        minimax_requests_in_flight{endpoint}             进行中的请求数
+        minimax_video_tasks_open                         已提交但未完成的视频任务数
+
+    用法:
+        registry = MetricsRegistry()
+        client = MiniMaxClient(metrics=registry)
+        registry.serve(9464)   # http://127.0.0.1:9464/metrics
+    """
+
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+    SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._httpd = None
+        self.define("minimax_requests_total", "counter", "请求数（按接口和最终状态码）")
+        self.define("minimax_request_errors_total", "counter", "最终失败的请求数")
+        self.define("minimax_retries_total", "counter", "重试次数（按触发重试的状态码）")
+        self.define("minimax_request_duration_seconds", "histogram", "请求耗时（含排队和重试）",
+                    self.LATENCY_BUCKETS)
+        self.define("minimax_request_size_bytes", "histogram", "请求体大小", self.SIZE_BUCKETS)
+        self.define("minimax_response_size_bytes", "histogram", "响应体大小", self.SIZE_BUCKETS)
+        self.define("minimax_requests_in_flight", "gauge", "进行中的请求数")
+        self.define("minimax_video_tasks_open", "gauge", "已提交但未完成的视频任务数")
+
+    def define(self, name: str, type: str, help: str = "", buckets: tuple = None):
+        """定义指标，type 为 counter / gauge / histogram"""
+        if type not in ("counter", "gauge", "histogram"):
+            raise ValueError(f"未知指标类型: {type}")
+        with self._lock:
+            self._metrics.setdefault(name, {"type": type, "help": help,
+                                            "buckets": tuple(buckets or self.LATENCY_BUCKETS),
+                                            "values": {}})
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器/仪表盘增加 value（仪表盘可为负数）"""
+        with self._lock:
+            values = self._metrics[name]["values"]
+            key = tuple(sorted(labels.items()))
+            values[key] = values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """设置仪表盘的值"""
+        with self._lock:
+            self._metrics[name]["values"][tuple(sorted(labels.items()))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """直方图记录一个观测值"""
+        with self._lock:
+            metric = self._metrics[name]
+            key = tuple(sorted(labels.items()))
+            entry = metric["values"].get(key)
+            if entry is None:
+                entry = metric["values"][key] = {"buckets": [0] * len(metric["buckets"]), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(metric["buckets"]):
+                if value <= bound:
+                    entry["buckets"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式（text/plain; version=0.0.4）"""
+        lines = []
+        with self._lock:
+            for name, metric in self._metrics.items():
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['type']}")
+                for key, value in sorted(metric["values"].items()):
+                    if metric["type"] != "histogram":
+                        lines.append(f"{name}{self._labels(key)} {value}")
+                        continue
+                    for bound, count in zip(metric["buckets"], value["buckets"]):
+                        lines.append(f"{name}_bucket{self._labels(key, le=bound)} {count}")
+                    lines.append(f"{name}_bucket{self._labels(key, le='+Inf')} {value['count']}")
+                    lines.append(f"{name}_sum{self._labels(key)} {value['sum']}")
+                    lines.append(f"{name}_count{self._labels(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(key: tuple, **extra) -> str:
+        items = list(key) + list(extra.items())
+        if not items:
+            return ""
+        escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in items) + "}"
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> "MetricsRegistry":
+        """在后台线程启动 HTTP 服务，GET /metrics 返回指标文本"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                data = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        logger.info(f"📈 指标服务已启动: http://{host}:{self.port}/metrics")
+        return self
+
+    def close(self):
+        """停止指标服务"""
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
 class MiniMaxClient:
     """精简版MiniMax客户端"""
-    
-    def __init__(self):
+
+    TTS_MAX_CHARS = 10000  # 单次语音合成的文本长度上限
+    DOWNLOAD_STATE_INTERVAL = 8 * 1024 * 1024  # 分段下载每写入这么多字节保存一次进度
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16,
+                 pool_block: bool = False, keep_alive: bool = True,
+                 download_workers: int = 4, download_chunk_size: int = 1024 * 1024,
+                 rate_limiter: RateLimiter = None, retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None, tts_cache: bool = True,
+                 tts_cache_max_bytes: int = 512 * 1024 * 1024,
+                 chat_cache: bool = False, chat_cache_ttl: float = 7 * 86400,
+                 image_cache_max_bytes: int = 64 * 1024 * 1024, image_cache_disk: bool = False,
+                 stats: UsageStats = None, metrics: MetricsRegistry = None):
+        """
+        Args:
+            pool_connections: 连接池缓存的主机数（api.minimaxi.com、CDN下载域名等）
+            pool_maxsize: 每个主机保持的最大连接数，并发调用时应不小于并发数
+            pool_block: 连接池耗尽时是否阻塞等待空闲连接（False则临时新建连接）
+            keep_alive: 是否复用TCP/TLS连接
+            download_workers: 分段下载的并行连接数
+            download_chunk_size: 下载读写缓冲大小（字节）
+            rate_limiter: 客户端限流器，默认使用 RateLimiter 的默认配额；多个客户端可共享同一实例
+            retry_policy: 重试策略，默认 RetryPolicy()（最多3次，指数退避+抖动）
+            circuit_breaker: 熔断器，默认 CircuitBreaker()；多个客户端可共享同一实例
+            tts_cache: 是否启用语音合成结果缓存（./cache/tts，相同请求直接返回已合成音频）
+            tts_cache_max_bytes: 语音缓存总大小上限（字节），超出后淘汰最久未使用的条目
+            chat_cache: 是否缓存对话响应（./cache/chat，按完整请求体命中，默认关闭）
+            chat_cache_ttl: 对话缓存有效期（秒），默认7天
+            image_cache_max_bytes: 本地图片 Base64 编码结果的内存缓存上限（字节），0为不缓存
+            image_cache_disk: 是否同时把编码结果缓存到磁盘（./cache/images），跨进程复用
+            stats: 调用统计，默认新建 UsageStats()；多个客户端可共享同一实例
+            metrics: 指标注册表（MetricsRegistry），默认不采集；多个客户端可共享同一实例
+        """
+        if not logger.handlers and not logging.getLogger().handlers:
+            setup_logging()  # 调用方未配置日志时，保持输出到控制台
         self.group_id = os.getenv('MINIMAX_GROUP_ID')
         self.api_key = os.getenv('MINIMAX_API_KEY')
         self.base_url = "https://api.minimaxi.com/v1"
         self.verbose = False
+        self.download_workers = download_workers
+        self.download_chunk_size = download_chunk_size
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(log=self._log)
+        self.tts_cache = DiskCache('./cache/tts', tts_cache_max_bytes) if tts_cache else None
+        self.chat_cache = DiskCache('./cache/chat', 64 * 1024 * 1024, ttl=chat_cache_ttl) if chat_cache else None
+        self.image_cache = _DataURLCache(
+            image_cache_max_bytes,
+            DiskCache('./cache/images', 1024 * 1024 * 1024) if image_cache_disk else None)
+        self.stats = stats or UsageStats()
+        self.metrics = metrics
+        self._open_video_tasks = set()
+        self._video_tasks_lock = threading.Lock()
+
+        # 共享HTTP连接池，所有接口（含上传/下载/音色查询）复用连接
+        self.session = self._create_session(pool_connections, pool_maxsize, pool_block, keep_alive)
 
         # 统一输出目录
         self.base_dir = Path('./output')
@@ -35,15 +1123,40 @@ class MiniMaxClient:
         if not self.group_id or not self.api_key:
             self._setup_credentials()
 
+    def _create_session(self, pool_connections: int, pool_maxsize: int,
+                        pool_block: bool, keep_alive: bool) -> requests.Session:
+        """创建带连接池的HTTP会话"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def _log(self, message: str, level: str = "INFO"):
-        """日志输出"""
-        print(f"[{level}] {message}")
+        """日志输出（minimax 日志器，见 setup_logging）"""
+        logger.log(_LOG_LEVELS.get(level, logging.INFO), message)
     
     def _log_request(self, method: str, endpoint: str, data: dict = None):
-        """请求日志"""
+        """请求日志，请求数据在 DEBUG 级别（verbose=True 时为 INFO）输出"""
         self._log(f"🚀 {method} {endpoint}")
-        if self.verbose and data:
-            self._log(f"📤 请求数据: {json.dumps(data, ensure_ascii=False, indent=2)}")
+        level = logging.INFO if self.verbose else logging.DEBUG
+        if data and logger.isEnabledFor(level):
+            logger.log(level, "📤 请求数据: %s",
+                       json.dumps(_redact_payload(data), ensure_ascii=False, indent=2))
     
     def _setup_credentials(self):
         """配置向导"""
@@ -76,49 +1189,301 @@ class MiniMaxClient:
         print("请重新运行程序")
         sys.exit(0)
     
-    def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """统一请求"""
-        url = f"{self.base_url}/{endpoint}"
+    def _build_url(self, endpoint: str, base_url: str = None) -> str:
+        """拼接接口URL"""
+        url = f"{base_url or self.base_url}/{endpoint.lstrip('/')}"
         if any(k in endpoint for k in ['t2a_v2', 'voice_clone', 'music_generation']):
             url += f"?GroupId={self.group_id}"
-        
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json'
-        }
-        
+        return url
+
+    def _headers(self, content_type: str = 'application/json') -> Dict[str, str]:
+        """构建认证请求头"""
+        headers = {'Authorization': f'Bearer {self.api_key}'}
+        if content_type:
+            headers['Content-Type'] = content_type
+        return headers
+
+    def _request(self, method: str, endpoint: str, base_url: str = None, **kwargs) -> Dict[str, Any]:
+        """统一请求，按 retry_policy 重试，最终失败时抛出 MiniMaxError 子类"""
+        call = self._begin_call(endpoint, kwargs.get('json'))
+        try:
+            result = self._send_request(call, method, endpoint, base_url, **kwargs)
+        except Exception as e:
+            self._finish_call(call, error=e)
+            raise
+        self._finish_call(call, result)
+        return result
+
+    def _send_request(self, call: dict, method: str, endpoint: str, base_url: str = None,
+                      **kwargs) -> Dict[str, Any]:
+        """发送请求并重试（_request 的实现），过程数据记入 call"""
+        url = self._build_url(endpoint, base_url)
+        headers = self._headers()
+
+        cache_key = self._chat_cache_key(endpoint, kwargs.get('json'))
+        cached = self._read_chat_cache(cache_key)
+        if cached is not None:
+            call['cached'] = True
+            return cached
+
         self._log_request(method, endpoint, kwargs.get('json'))
-        
-        for attempt in range(3):
+
+        circuit_key = CircuitBreaker.key_for(endpoint)
+        for attempt in range(self.retry_policy.max_attempts):
+            call['retries'] = attempt
+            probe = self.circuit_breaker.before_call(circuit_key)
             try:
-                response = requests.request(method, url, headers=headers, **kwargs)
-                response.raise_for_status()
-                result = response.json()
-                
+                with self.rate_limiter.limit(endpoint, kwargs.get('json')):
+                    response = self.session.request(method, url, headers=headers, **kwargs)
+                call['ttfb'] = response.elapsed.total_seconds()
+                call['request_bytes'] = len(response.request.body or b'')
+                call['response_bytes'] = len(response.content)
                 self._log(f"📥 响应状态: {response.status_code}")
-                
-                if 'base_resp' in result and result['base_resp']['status_code'] != 0:
-                    self._log(f"⚠️ API错误: {result['base_resp']['status_msg']}", "ERROR")
-                    if result['base_resp']['status_code'] == 1002 and attempt < 2:
-                        time.sleep(2 * (attempt + 1))
-                        continue
-                    raise Exception(f"API错误: {result['base_resp']['status_msg']}")
-                
+                _raise_for_http(response.status_code, response.headers, response.text)
+                try:
+                    result = response.json()
+                except ValueError:
+                    raise MiniMaxNetworkError(f"响应不是有效JSON: {response.text[:200]}")
+                _check_result(result)
+                self.circuit_breaker.record(circuit_key)
                 self._log(f"✅ 请求成功")
+                self._write_chat_cache(cache_key, result)
                 return result
-                
-            except Exception as e:
-                if attempt == 2:
-                    self._log(f"❌ 请求失败: {e}", "ERROR")
-                    sys.exit(1)
-                self._log(f"🔄 重试第{attempt+1}次...", "WARN")
-                time.sleep(1)
-    
+            except requests.RequestException as e:
+                error = MiniMaxNetworkError(str(e))
+            except MiniMaxError as e:
+                error = e
+            except BaseException:
+                # 取消、中断等未计入结果的异常也要归还探测名额，否则半开状态无法恢复
+                self.circuit_breaker.release(circuit_key, probe)
+                raise
+
+            self.circuit_breaker.record(circuit_key, error)
+            if not self._handle_retry(endpoint, error, attempt):
+                raise error
+            time.sleep(self.retry_policy.delay(attempt, error))
+
+    def _begin_call(self, endpoint: str, payload: dict = None) -> dict:
+        """开始记录一次接口调用"""
+        if self.metrics:
+            self.metrics.inc("minimax_requests_in_flight", endpoint=endpoint.split('?')[0].strip('/'))
+        return {"endpoint": endpoint.split('?')[0].strip('/'),
+                "model": payload.get('model') if isinstance(payload, dict) else None,
+                "started_at": time.time(), "start": time.monotonic(), "status": "ok", "code": 0,
+                "ttfb": None, "request_bytes": 0, "response_bytes": 0, "retries": 0,
+                "cached": False, "usage": {}}
+
+    def _finish_call(self, call: dict, result: dict = None, error: Exception = None):
+        """结束调用记录（重复调用无效）：补充耗时、状态和计费用量后交给 stats"""
+        if 'latency' in call:
+            return
+        call['latency'] = time.monotonic() - call.pop('start')
+        if error is not None:
+            call.update(status="error", code=_error_code(error))
+        if result is not None:
+            call['usage'] = _extract_usage(result)
+        usage = call['usage']
+        if 'prompt_tokens' in usage or 'completion_tokens' in usage:
+            # 流式响应的输入/输出 token 数可能分散在不同事件中
+            usage['total_tokens'] = max(usage.get('total_tokens', 0),
+                                        usage.get('prompt_tokens', 0) + usage.get('completion_tokens', 0))
+        self.stats.record(call)
+        if self.metrics:
+            self._record_metrics(call, result)
+
+    def _record_metrics(self, call: dict, result: dict = None):
+        """把一次调用记录写入指标注册表"""
+        endpoint = call['endpoint']
+        metrics = self.metrics
+        metrics.inc("minimax_requests_in_flight", -1, endpoint=endpoint)
+        metrics.inc("minimax_requests_total", endpoint=endpoint, code=call['code'])
+        if call['status'] != 'ok':
+            metrics.inc("minimax_request_errors_total", endpoint=endpoint, code=call['code'])
+        metrics.observe("minimax_request_duration_seconds", call['latency'], endpoint=endpoint)
+        metrics.observe("minimax_request_size_bytes", call['request_bytes'], endpoint=endpoint)
+        metrics.observe("minimax_response_size_bytes", call['response_bytes'], endpoint=endpoint)
+        if result and result.get('task_id'):
+            if endpoint == "video_generation":
+                self._track_video_task(result['task_id'])
+            elif endpoint == "query/video_generation" and result.get('status') in ("Success", "Fail"):
+                self._track_video_task(result['task_id'], done=True)
+
+    def _track_video_task(self, task_id: str, done: bool = False):
+        """更新未完成视频任务数（提交时登记，查询或回调得到最终状态时移除）"""
+        if not self.metrics:
+            return
+        with self._video_tasks_lock:
+            if done:
+                self._open_video_tasks.discard(task_id)
+            else:
+                self._open_video_tasks.add(task_id)
+            count = len(self._open_video_tasks)
+        self.metrics.set("minimax_video_tasks_open", count)
+
+    def _chat_cache_key(self, endpoint: str, payload: dict = None) -> Optional[str]:
+        """对话缓存键：接口路径 + 完整请求体（模型、消息、角色设定、max_tokens、temperature等）
+
+        未启用对话缓存、非对话接口或流式请求返回 None。
+        """
+        if self.chat_cache is None or not payload or payload.get('stream'):
+            return None
+        if RateLimiter.key_for(endpoint) != "chat":
+            return None
+        return DiskCache.make_key({"endpoint": endpoint.split('?')[0].strip('/'), "payload": payload})
+
+    def _read_chat_cache(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """读取对话缓存，返回原始响应"""
+        if not cache_key:
+            return None
+        entry = self.chat_cache.get(cache_key)
+        if entry is None:
+            return None
+        try:
+            result = json.loads(entry[0].decode('utf-8'))
+        except ValueError:
+            return None
+        self._log("💾 命中对话缓存")
+        return result
+
+    def _write_chat_cache(self, cache_key: Optional[str], result: dict):
+        """写入对话缓存"""
+        if not cache_key:
+            return
+        try:
+            self.chat_cache.set(cache_key, json.dumps(result, ensure_ascii=False).encode('utf-8'))
+        except OSError as e:
+            self._log(f"⚠️ 写入对话缓存失败: {e}", "WARN")
+
+    def _handle_retry(self, endpoint: str, error: MiniMaxError, attempt: int) -> bool:
+        """记录失败并判断是否重试；限流错误会暂停该接口分组"""
+        self._log(f"⚠️ {error}", "ERROR")
+        if isinstance(error, MiniMaxRateLimitError):
+            pause = error.retry_after if error.retry_after is not None else self.retry_policy.delay(attempt)
+            self.rate_limiter.penalize(RateLimiter.key_for(endpoint), pause)
+        if not self.retry_policy.should_retry(error, attempt):
+            self._log(f"❌ 请求失败: {error}", "ERROR")
+            return False
+        if self.metrics:
+            self.metrics.inc("minimax_retries_total", endpoint=endpoint.split('?')[0].strip('/'),
+                             code=_error_code(error))
+        self._log(f"🔄 重试第{attempt+1}次...", "WARN")
+        return True
+
+    def _request_stream(self, method: str, endpoint: str, base_url: str = None, **kwargs):
+        """流式请求，逐个产出 SSE 事件数据（dict）
+
+        仅在建立连接阶段重试；开始接收数据后出错会直接抛出。
+        服务端未以 text/event-stream 返回时（如参数错误），将整个 JSON 作为单个事件产出。
+        """
+        url = self._build_url(endpoint, base_url)
+        headers = self._headers()
+        headers['Accept'] = 'text/event-stream'
+
+        self._log_request(method, endpoint, kwargs.get('json'))
+
+        call = self._begin_call(endpoint, kwargs.get('json'))
+        try:
+            # 流式请求在整个接收过程中占用并发槽
+            with self.rate_limiter.limit(endpoint, kwargs.get('json')):
+                yield from self._request_stream_events(call, method, endpoint, url, headers, **kwargs)
+        except Exception as e:
+            self._finish_call(call, error=e)
+            raise
+        finally:
+            self._finish_call(call)  # 正常结束或调用方提前停止读取
+
+    def _request_stream_events(self, call: dict, method: str, endpoint: str, url: str,
+                               headers: dict, **kwargs):
+        """发送流式请求并解析 SSE 事件，接收过程数据记入 call"""
+        circuit_key = CircuitBreaker.key_for(endpoint)
+        for attempt in range(self.retry_policy.max_attempts):
+            plain_result = None
+            call['retries'] = attempt
+            probe = self.circuit_breaker.before_call(circuit_key)
+            try:
+                sent = time.monotonic()
+                response = self.session.request(method, url, headers=headers, stream=True, **kwargs)
+                call['request_bytes'] = len(response.request.body or b'')
+                if response.status_code >= 400:
+                    with response:
+                        _raise_for_http(response.status_code, response.headers, response.text)
+                if 'text/event-stream' not in response.headers.get('Content-Type', ''):
+                    # 非流式返回（通常是参数错误或限流），可按普通响应重试
+                    with response:
+                        try:
+                            plain_result = _check_result(response.json())
+                        except ValueError:
+                            raise MiniMaxNetworkError(f"响应不是有效JSON: {response.text[:200]}")
+                break
+            except requests.RequestException as e:
+                error = MiniMaxNetworkError(str(e))
+            except MiniMaxError as e:
+                error = e
+            except BaseException:
+                self.circuit_breaker.release(circuit_key, probe)
+                raise
+            self.circuit_breaker.record(circuit_key, error)
+            if not self._handle_retry(endpoint, error, attempt):
+                raise error
+            time.sleep(self.retry_policy.delay(attempt, error))
+
+        self._log(f"📥 响应状态: {response.status_code}")
+        # 熔断器在整个流读完（或出错）后才记录结果，流中途的错误同样计入失败率
+        try:
+            if plain_result is not None:
+                call['ttfb'] = time.monotonic() - sent
+                call['response_bytes'] = len(response.content)
+                yield self._check_stream_event(plain_result, call)
+            else:
+                yield from self._read_stream_events(response, call, sent)
+        except MiniMaxError as e:
+            self.circuit_breaker.record(circuit_key, e)
+            raise
+        except BaseException:
+            # 调用方提前停止读取等情况不计成败，只归还半开探测名额
+            self.circuit_breaker.release(circuit_key, probe)
+            raise
+        self.circuit_breaker.record(circuit_key)
+
+    def _read_stream_events(self, response, call: dict, sent: float):
+        """逐行解析 SSE 响应，产出事件"""
+        with response:
+            parser = _SSEParser()
+            try:
+                for line in response.iter_lines(chunk_size=None):
+                    if call['ttfb'] is None:
+                        call['ttfb'] = time.monotonic() - sent
+                    call['response_bytes'] += len(line) + 1
+                    event = parser.feed(line.decode('utf-8'))
+                    if event is not None:
+                        yield self._check_stream_event(event, call)
+            except requests.RequestException as e:
+                raise MiniMaxNetworkError(f"流式响应中断: {e}") from e
+            event = parser.flush()
+            if event is not None:
+                yield self._check_stream_event(event, call)
+
+    def _check_stream_event(self, event: Dict[str, Any], call: dict = None) -> Dict[str, Any]:
+        """检查流式事件中的错误信息，并把事件中的计费用量记入 call"""
+        if call is not None:
+            call['usage'].update(_extract_usage(event))
+        try:
+            _check_result(event)
+        except MiniMaxAPIError as e:
+            self._log(f"⚠️ {e}", "ERROR")
+            raise
+        if event.get('type') == 'error':
+            error = event.get('error', {})
+            self._log(f"⚠️ API错误: {error.get('message', error)}", "ERROR")
+            raise MiniMaxError(f"API错误: {error.get('message', error)}")
+        return event
+
     def chat(self, message: str, model: str = "M2-her",
              system_prompt: str = None, user_system: str = None,
              group: str = None, sample_user: str = None, sample_ai: str = None,
              temperature: float = 1.0, max_tokens: int = 1024, stream: bool = False,
-             use_anthropic_api: bool = False, show_thinking: bool = False) -> str:
+             use_anthropic_api: bool = False, show_thinking: bool = False,
+             history: list = None) -> str:
         """智能对话（支持 M2-her 和 Anthropic API 兼容接口）
 
         Args:
@@ -134,10 +1499,102 @@ class MiniMaxClient:
             stream: 是否使用流式响应
             use_anthropic_api: 是否使用 Anthropic API 兼容接口
             show_thinking: 是否显示思考过程（仅 Anthropic API 支持）
+            history: 之前的对话轮次 [{"role": "user"/"assistant", "content": "..."}]，
+                     插入在本次用户消息之前（多轮对话见 ChatSession）
 
         Returns:
             模型响应文本，如果 show_thinking=True 则返回包含思考过程的字典
         """
+        if stream:
+            deltas = list(self.chat_stream(
+                message, model, system_prompt, user_system, group, sample_user, sample_ai,
+                temperature, max_tokens, use_anthropic_api, show_thinking, history))
+            return self._join_chat_deltas(deltas, use_anthropic_api, show_thinking)
+
+        base_url, endpoint, data = self._build_chat_request(
+            message, model, system_prompt, user_system, group, sample_user, sample_ai,
+            temperature, max_tokens, stream, use_anthropic_api, history)
+        response = self._request("POST", endpoint, base_url=base_url, json=data)
+        return self._parse_chat_response(response, use_anthropic_api, show_thinking)
+
+    def chat_stream(self, message: str, model: str = "M2-her",
+                    system_prompt: str = None, user_system: str = None,
+                    group: str = None, sample_user: str = None, sample_ai: str = None,
+                    temperature: float = 1.0, max_tokens: int = 1024,
+                    use_anthropic_api: bool = False, show_thinking: bool = False,
+                    history: list = None):
+        """流式智能对话，收到增量即产出（参数同 chat）
+
+        Yields:
+            (kind, delta) 元组：kind 为 "text"（回复内容）或 "thinking"（思考过程，
+            仅 show_thinking=True 时产出），delta 为本次新增的文本
+        """
+        base_url, endpoint, data = self._build_chat_request(
+            message, model, system_prompt, user_system, group, sample_user, sample_ai,
+            temperature, max_tokens, True, use_anthropic_api, history)
+
+        received = False
+        for event in self._request_stream("POST", endpoint, base_url=base_url, json=data):
+            for kind, delta in self._parse_chat_stream_event(event, use_anthropic_api,
+                                                             show_thinking, received):
+                received = True
+                yield kind, delta
+
+    def _parse_chat_stream_event(self, event: Dict[str, Any], use_anthropic_api: bool = False,
+                                 show_thinking: bool = False, received: bool = False) -> list:
+        """解析单个流式事件，返回 [(kind, delta), ...]
+
+        received 为 False 时，也接受非流式的完整响应（服务端未按流式返回的情况）。
+        """
+        deltas = []
+        if use_anthropic_api:
+            if event.get('type') == 'content_block_delta':
+                delta = event.get('delta', {})
+                if delta.get('type') == 'text_delta' and delta.get('text'):
+                    deltas.append(("text", delta['text']))
+                elif delta.get('type') == 'thinking_delta' and show_thinking and delta.get('thinking'):
+                    deltas.append(("thinking", delta['thinking']))
+            elif not received and isinstance(event.get('content'), list):
+                for block in event['content']:
+                    if block.get('type') == 'text' and block.get('text'):
+                        deltas.append(("text", block['text']))
+                    elif block.get('type') == 'thinking' and show_thinking and block.get('thinking'):
+                        deltas.append(("thinking", block['thinking']))
+        else:
+            for choice in event.get('choices') or []:
+                delta = choice.get('delta')
+                if delta:
+                    if show_thinking and delta.get('reasoning_content'):
+                        deltas.append(("thinking", delta['reasoning_content']))
+                    if delta.get('content'):
+                        deltas.append(("text", delta['content']))
+                elif not received and (choice.get('message') or {}).get('content'):
+                    # 流结束时的汇总消息只在未收到任何增量时使用
+                    deltas.append(("text", choice['message']['content']))
+        return deltas
+
+    def _join_chat_deltas(self, deltas: list, use_anthropic_api: bool = False,
+                          show_thinking: bool = False) -> str | dict:
+        """将流式增量合并为与非流式 chat 相同格式的返回值"""
+        thinking_text = "".join(d for kind, d in deltas if kind == "thinking")
+        response_text = "".join(d for kind, d in deltas if kind == "text")
+        self._log(f"📄 生成内容长度: {len(response_text)} 字符")
+        if use_anthropic_api and show_thinking:
+            return {
+                "thinking": thinking_text,
+                "content": response_text,
+                "full_response": [{"type": "thinking", "thinking": thinking_text},
+                                  {"type": "text", "text": response_text}]
+            }
+        return response_text
+
+    def _build_chat_request(self, message: str, model: str = "M2-her",
+                            system_prompt: str = None, user_system: str = None,
+                            group: str = None, sample_user: str = None, sample_ai: str = None,
+                            temperature: float = 1.0, max_tokens: int = 1024, stream: bool = False,
+                            use_anthropic_api: bool = False, history: list = None) -> tuple:
+        """构建对话请求（参数同 chat），返回 (base_url, endpoint, data)"""
+        history = [{"role": m["role"], "content": m["content"]} for m in (history or [])]
         # 模型映射：M2-her 为对话模型，MiniMax-M2 系列为文本生成模型
         model_mapping = {
             "MiniMax-M2.1": "MiniMax-M2.1",
@@ -150,7 +1607,7 @@ class MiniMaxClient:
         # 选择 API 端点
         if use_anthropic_api:
             endpoint = "anthropic/v1/messages"
-            base_url = "https://api.minimaxi.com/anthropic"
+            base_url = self.base_url.rsplit('/v1', 1)[0]
             self._log(f"🤖 使用 Anthropic API 兼容接口 (模型: {model})")
         else:
             endpoint = "text/chatcompletion_v2"
@@ -160,7 +1617,9 @@ class MiniMaxClient:
         # 构建请求数据
         if use_anthropic_api:
             # Anthropic API 格式
-            messages = [{"role": "user", "content": [{"type": "text", "text": message}]}]
+            messages = [{"role": m["role"], "content": [{"type": "text", "text": m["content"]}]}
+                        for m in history]
+            messages.append({"role": "user", "content": [{"type": "text", "text": message}]})
             data = {
                 "model": model,
                 "messages": messages,
@@ -200,6 +1659,9 @@ class MiniMaxClient:
                 if sample_ai:
                     messages.append({"role": "sample_message_ai", "content": sample_ai})
 
+                # 之前的对话轮次
+                messages.extend(history)
+
                 # user: 用户消息
                 messages.append({"role": "user", "content": message})
 
@@ -216,7 +1678,7 @@ class MiniMaxClient:
 
             else:
                 # 原有模型格式（MiniMax-M2 系列）
-                messages = [{"role": "user", "content": message}]
+                messages = history + [{"role": "user", "content": message}]
                 data = {
                     "model": model,
                     "messages": messages,
@@ -232,19 +1694,11 @@ class MiniMaxClient:
             if stream:
                 data["stream"] = True
 
-        # 发送请求
-        if use_anthropic_api:
-            # 使用自定义 base_url
-            original_base_url = self.base_url
-            self.base_url = base_url
-            try:
-                response = self._request("POST", endpoint, json=data)
-            finally:
-                self.base_url = original_base_url
-        else:
-            response = self._request("POST", endpoint, json=data)
+        return base_url, endpoint, data
 
-        # 解析响应
+    def _parse_chat_response(self, response: dict, use_anthropic_api: bool = False,
+                             show_thinking: bool = False) -> str | dict:
+        """解析对话响应"""
         if use_anthropic_api:
             return self._parse_anthropic_response(response, show_thinking)
         else:
@@ -285,6 +1739,103 @@ class MiniMaxClient:
         else:
             self._log(f"📄 生成内容长度: {len(response_text)} 字符")
             return response_text
+
+    def chat_many(self, prompts, concurrency: int = 8, results_path: str = None, **chat_kwargs) -> list:
+        """批量对话：在同一客户端内并发执行多条对话，按输入顺序返回（并写入 JSONL）
+
+        并发请求同时受 rate_limiter 的 chat 配额约束；某条失败不影响其他条目。
+
+        Args:
+            prompts: 提示词序列（可为迭代器），元素为字符串，或包含 message 字段的字典
+                     （可带 id 及覆盖 chat_kwargs 的对话参数）
+            concurrency: 同时进行的请求数，默认8
+            results_path: 结果 JSONL 路径，按输入顺序逐条写入，None 表示不写文件
+            **chat_kwargs: 传给 chat 的公共参数（model, system_prompt, temperature 等，不支持 stream）
+
+        Returns:
+            结果列表，每项包含 index, id, status, content, latency, usage（失败时为 error）
+        """
+        chat_kwargs.pop('stream', None)
+        items = enumerate(prompts)
+        records = []
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool, \
+                self._open_chat_many_output(results_path) as out:
+            # 只预先提交有限个任务，按顺序取结果写出，内存占用不随提示词数量增长
+            pending = deque(pool.submit(self._chat_many_item, index, prompt, chat_kwargs)
+                            for index, prompt in islice(items, max(1, concurrency) * 2))
+            while pending:
+                record = pending.popleft().result()
+                self._write_chat_many_record(out, record, records)
+                for index, prompt in islice(items, 1):
+                    pending.append(pool.submit(self._chat_many_item, index, prompt, chat_kwargs))
+        self._log_chat_many_summary(records, time.monotonic() - start)
+        return records
+
+    def _chat_many_item(self, index: int, prompt, chat_kwargs: dict) -> dict:
+        """执行批量对话中的一条，返回结果记录"""
+        record, message, kwargs = self._prepare_chat_many_item(index, prompt, chat_kwargs)
+        start = time.monotonic()
+        try:
+            base_url, endpoint, data = self._build_chat_many_request(message, kwargs)
+            response = self._request("POST", endpoint, base_url=base_url, json=data)
+            self._finish_chat_many_item(record, response, kwargs)
+        except (MiniMaxError, ValueError, KeyError, IndexError, TypeError) as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+        record["latency"] = round(time.monotonic() - start, 3)
+        return record
+
+    @staticmethod
+    def _prepare_chat_many_item(index: int, prompt, chat_kwargs: dict) -> tuple:
+        """拆分批量条目为 (结果记录, 消息, 对话参数)"""
+        if isinstance(prompt, dict):
+            prompt = dict(prompt)
+            item_id = prompt.pop('id', index)
+            message = prompt.pop('message', '')
+            kwargs = {**chat_kwargs, **prompt}
+        else:
+            item_id, message, kwargs = index, prompt, chat_kwargs
+        return {"index": index, "id": item_id, "message": message}, message, kwargs
+
+    def _build_chat_many_request(self, message: str, kwargs: dict) -> tuple:
+        """按 chat 的参数构建批量条目的请求"""
+        kwargs = {k: v for k, v in kwargs.items() if k not in ('show_thinking', 'stream')}
+        return self._build_chat_request(message, stream=False, **kwargs)
+
+    def _finish_chat_many_item(self, record: dict, response: dict, kwargs: dict):
+        """解析批量条目的响应，填充内容和 token 用量"""
+        use_anthropic_api = kwargs.get('use_anthropic_api', False)
+        if not use_anthropic_api and not response.get('choices'):
+            raise ValueError("响应中没有 choices")
+        content = self._parse_chat_response(response, use_anthropic_api, kwargs.get('show_thinking', False))
+        if isinstance(content, dict):
+            record["thinking"] = content.get('thinking', '')
+            content = content.get('content', '')
+        record.update(status="ok", content=content,
+                      usage={"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+                             **_extract_usage(response)})
+
+    @staticmethod
+    def _open_chat_many_output(results_path: str):
+        if not results_path:
+            return nullcontext()
+        results_path = Path(results_path)
+        results_path.parent.mkdir(parents=True, exist_ok=True)
+        return open(results_path, 'w', encoding='utf-8')
+
+    @staticmethod
+    def _write_chat_many_record(out, record: dict, records: list):
+        records.append(record)
+        if out is not None:
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+
+    def _log_chat_many_summary(self, records: list, elapsed: float):
+        ok = [r for r in records if r['status'] == 'ok']
+        tokens = sum(r['usage']['total_tokens'] for r in ok)
+        rate = len(records) / elapsed if elapsed > 0 else 0
+        self._log(f"🏁 批量对话完成: 成功{len(ok)}/{len(records)}，耗时{elapsed:.1f}s"
+                  f"（{rate:.1f}条/s），共{tokens} tokens")
     
     def image(self, prompt: str, model: str = "image-01", n: int = 1,
                 aspect_ratio: str = "1:1", width: int = None, height: int = None,
@@ -312,6 +1863,19 @@ class MiniMaxClient:
         Returns:
             图片URL列表或Base64编码列表
         """
+        data = self._build_image_request(prompt, model, n, aspect_ratio, width, height, seed,
+                                         response_format, prompt_optimizer, aigc_watermark,
+                                         style_type, style_weight, reference_image)
+        response = self._request("POST", "image_generation", json=data)
+        return self._parse_image_response(response, response_format, reference_image)
+
+    def _build_image_request(self, prompt: str, model: str = "image-01", n: int = 1,
+                             aspect_ratio: str = "1:1", width: int = None, height: int = None,
+                             seed: int = None, response_format: str = "url",
+                             prompt_optimizer: bool = False, aigc_watermark: bool = False,
+                             style_type: str = None, style_weight: float = 0.8,
+                             reference_image: str = None) -> dict:
+        """构建图像生成请求数据（参数同 image）"""
         # 检测生成模式
         if reference_image:
             self._log(f"🎨 开始图生图...")
@@ -389,7 +1953,12 @@ class MiniMaxClient:
         if style_type:
             self._log(f"🎨 风格设置: {style_type} (权重: {style_weight})")
 
-        response = self._request("POST", "image_generation", json=data)
+        return data
+
+    def _parse_image_response(self, response: dict, response_format: str = "url",
+                              reference_image: str = None) -> list:
+        """解析图像生成响应"""
+        generation_mode = "图生图" if reference_image else "文生图"
 
         # 根据response_format返回不同格式的数据
         if response_format == "url":
@@ -431,6 +2000,16 @@ class MiniMaxClient:
         Returns:
             task_id: 视频生成任务ID
         """
+        data = self._build_video_request(prompt, model, duration, resolution, prompt_optimizer,
+                                         fast_pretreatment, aigc_watermark, callback_url)
+        response = self._request("POST", "video_generation", json=data)
+        return self._parse_task_id(response, "视频任务ID")
+
+    def _build_video_request(self, prompt: str, model: str = "MiniMax-Hailuo-2.3", duration: int = 6,
+                             resolution: str = None, prompt_optimizer: bool = True,
+                             fast_pretreatment: bool = False, aigc_watermark: bool = False,
+                             callback_url: str = None) -> dict:
+        """构建文生视频请求数据（参数同 video）"""
         self._log(f"🎬 开始生成视频...")
         self._log(f"📋 使用模型: {model}")
 
@@ -477,9 +2056,12 @@ class MiniMaxClient:
             data["callback_url"] = callback_url
             self._log(f"📞 设置回调URL: {callback_url}")
 
-        response = self._request("POST", "video_generation", json=data)
+        return data
+
+    def _parse_task_id(self, response: dict, label: str = "视频任务ID") -> str:
+        """从视频生成响应中提取任务ID"""
         task_id = response.get('task_id', '')
-        self._log(f"🎯 视频任务ID: {task_id}")
+        self._log(f"🎯 {label}: {task_id}")
         return task_id
 
     def _get_valid_duration_resolution(self, model: str) -> list:
@@ -529,6 +2111,10 @@ class MiniMaxClient:
         Returns:
             task_id: 视频生成任务ID
         """
+        return self.video(self._apply_camera_sequence(prompt, camera_sequence), **kwargs)
+
+    def _apply_camera_sequence(self, prompt: str, camera_sequence: list = None) -> str:
+        """将镜头序列转换为prompt中的运镜指令"""
         if camera_sequence:
             # 将镜头序列转换为prompt中的运镜指令
             camera_prompt = prompt
@@ -554,7 +2140,7 @@ class MiniMaxClient:
             prompt = camera_prompt
             self._log(f"🎥 应用镜头序列: {len(camera_sequence)}个镜头")
 
-        return self.video(prompt, **kwargs)
+        return prompt
 
     def _process_image_input(self, image_input: str) -> str:
         """处理图片输入，支持本地路径和URL，转换为Base64或验证URL
@@ -581,7 +2167,8 @@ class MiniMaxClient:
                 raise FileNotFoundError(f"图片文件不存在: {image_path}")
 
             # 检查文件大小 (统一20MB限制，API会根据用途自行验证)
-            file_size = image_path.stat().st_size
+            stat = image_path.stat()
+            file_size = stat.st_size
             if file_size > 20 * 1024 * 1024:  # 20MB
                 raise ValueError(f"图片文件过大: {file_size/1024/1024:.1f}MB (限制: 20MB，图生图建议10MB以内)")
 
@@ -590,13 +2177,15 @@ class MiniMaxClient:
             if mime_type not in ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']:
                 raise ValueError(f"不支持的图片格式: {mime_type}")
 
-            # 读取并编码为Base64
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
-                base64_data = base64.b64encode(image_data).decode('utf-8')
-                data_url = f"data:{mime_type};base64,{base64_data}"
+            # 读取并编码为Base64（按 路径+大小+修改时间 缓存，批量任务复用同一张图时只编码一次）
+            cache_key = f"{image_path.resolve()}|{file_size}|{stat.st_mtime_ns}"
+            data_url, hit = self.image_cache.get_or_create(
+                cache_key, lambda: _encode_data_url(image_path, mime_type))
 
-            self._log(f"📷 图片已编码: {image_path.name} ({len(image_data)/1024:.1f}KB)")
+            if hit:
+                self._log(f"💾 命中图片编码缓存: {image_path.name}")
+            else:
+                self._log(f"📷 图片已编码: {image_path.name} ({file_size/1024:.1f}KB)")
             return data_url
 
         except Exception as e:
@@ -628,6 +2217,18 @@ class MiniMaxClient:
         Returns:
             task_id: 视频生成任务ID
         """
+        data = self._build_image_to_video_request(first_frame_image, prompt, model, duration, resolution,
+                                                  prompt_optimizer, fast_pretreatment, aigc_watermark,
+                                                  callback_url)
+        response = self._request("POST", "video_generation", json=data)
+        return self._parse_task_id(response, "图生视频任务ID")
+
+    def _build_image_to_video_request(self, first_frame_image: str, prompt: str = "",
+                                      model: str = "I2V-01", duration: int = 6,
+                                      resolution: str = None, prompt_optimizer: bool = True,
+                                      fast_pretreatment: bool = False, aigc_watermark: bool = False,
+                                      callback_url: str = None) -> dict:
+        """构建图生视频请求数据（参数同 image_to_video）"""
         self._log(f"🎬 开始图生视频...")
         self._log(f"📋 使用模型: {model}")
 
@@ -682,10 +2283,7 @@ class MiniMaxClient:
             data["callback_url"] = callback_url
             self._log(f"📞 设置回调URL: {callback_url}")
 
-        response = self._request("POST", "video_generation", json=data)
-        task_id = response.get('task_id', '')
-        self._log(f"🎯 图生视频任务ID: {task_id}")
-        return task_id
+        return data
 
     def start_end_to_video(self, first_frame_image: str, last_frame_image: str,
                                 prompt: str = "", duration: int = 6,
@@ -707,6 +2305,24 @@ class MiniMaxClient:
         Returns:
             task_id: 视频生成任务ID
         """
+        data = self._build_start_end_request(first_frame_image, last_frame_image, prompt, duration,
+                                             resolution, prompt_optimizer, aigc_watermark, callback_url)
+        response = self._request("POST", "video_generation", json=data)
+        task_id = self._parse_task_id(response, "首尾帧视频任务ID")
+
+        # 显示关键信息
+        self._log(f"📐 分辨率: {data['resolution']}")
+        self._log(f"⏱️ 时长: {duration}秒")
+        self._log(f"🖼️ 首尾帧尺寸将根据首帧自动调整")
+
+        return task_id
+
+    def _build_start_end_request(self, first_frame_image: str, last_frame_image: str,
+                                 prompt: str = "", duration: int = 6,
+                                 resolution: str = None, prompt_optimizer: bool = True,
+                                 aigc_watermark: bool = False,
+                                 callback_url: str = None) -> dict:
+        """构建首尾帧视频请求数据（参数同 start_end_to_video）"""
         self._log(f"🎬 开始首尾帧视频生成...")
         self._log(f"📋 使用模型: MiniMax-Hailuo-02 (首尾帧专用)")
 
@@ -758,16 +2374,7 @@ class MiniMaxClient:
             data["callback_url"] = callback_url
             self._log(f"📞 设置回调URL: {callback_url}")
 
-        response = self._request("POST", "video_generation", json=data)
-        task_id = response.get('task_id', '')
-        self._log(f"🎯 首尾帧视频任务ID: {task_id}")
-
-        # 显示关键信息
-        self._log(f"📐 分辨率: {resolution}")
-        self._log(f"⏱️ 时长: {duration}秒")
-        self._log(f"🖼️ 首尾帧尺寸将根据首帧自动调整")
-
-        return task_id
+        return data
 
     def video_advanced(self, prompt: str = "", model: str = "MiniMax-Hailuo-2.3",
                              first_frame_image: str = None, last_frame_image: str = None,
@@ -902,7 +2509,15 @@ class MiniMaxClient:
 
         # 获取文件信息
         file_response = self._request("GET", f"files/retrieve?file_id={file_id}")
+        download_url, filepath = self._prepare_video_download(file_id, file_response, filename)
+
+        # 下载文件（分段并行，支持断点续传）
+        self._download(download_url, filepath, file_response['file'].get('bytes'))
+        self._log(f"✅ 下载完成: {filepath}")
+        return str(filepath)
 
+    def _prepare_video_download(self, file_id: str, file_response: dict, filename: str = None) -> tuple:
+        """解析文件信息，返回 (download_url, 本地保存路径)"""
         if 'file' not in file_response:
             raise Exception(f"无法获取文件信息: {file_response}")
 
@@ -915,7 +2530,13 @@ class MiniMaxClient:
             # 确保文件扩展名为.mp4
             if not original_name.endswith('.mp4'):
                 original_name += '.mp4'
-            filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{original_name}"
+            # 有同一 file_id 未完成的下载时沿用其文件名以便续传（API 返回的文件名不唯一，必须按 file_id 区分）
+            pattern = glob.escape(f"_{file_id}_{original_name}.part")
+            unfinished = sorted(Path('./output/videos').glob(f"*{pattern}"))
+            if unfinished:
+                filename = unfinished[-1].name[:-len('.part')]
+            else:
+                filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file_id}_{original_name}"
 
         # 显示文件信息
         file_size = file_info.get('bytes', 0)
@@ -927,14 +2548,237 @@ class MiniMaxClient:
             self._log(f"📊 文件大小: {file_size_mb:.1f} MB")
         self._log(f"📅 创建时间: {datetime.fromtimestamp(created_time).strftime('%Y-%m-%d %H:%M:%S')}" if created_time else "")
 
-        # 下载文件
-        import urllib.request
         filepath = Path('./output/videos') / filename
         filepath.parent.mkdir(exist_ok=True)
         self._log(f"🎯 正在下载: {filename}")
-        urllib.request.urlretrieve(download_url, filepath)
-        self._log(f"✅ 下载完成: {filepath}")
-        return str(filepath)
+        return download_url, filepath
+
+    def _download(self, url: str, filepath: Path, expected_size: int = None,
+                  headers: dict = None, params: dict = None) -> Path:
+        """下载到本地文件，服务端支持 Range 时分段并行下载
+
+        下载中的数据写入 <文件名>.part，分段进度记录在 <文件名>.part.json，
+        中断后再次下载同一文件会从已完成的位置继续；完成后校验大小并重命名。
+
+        Args:
+            url: 下载地址
+            filepath: 目标文件路径
+            expected_size: 预期文件大小（files/retrieve 返回的 bytes），用于校验
+            headers: 额外请求头（如鉴权）
+            params: 查询参数
+        """
+        filepath = Path(filepath)
+        part_path, state_path = self._download_temp_paths(filepath)
+        headers = dict(headers or {})
+
+        # 探测是否支持 Range 及文件总大小
+        probe = self.session.get(url, headers={**headers, 'Range': 'bytes=0-0'},
+                                 params=params, stream=True, timeout=60)
+        probe.raise_for_status()
+        size = self._parse_range_total(probe.status_code, probe.headers)
+
+        if size is None:
+            self._log("📶 服务端不支持分段下载，使用单连接下载", "WARN")
+            if probe.status_code == 206:
+                probe.close()
+                probe = self.session.get(url, headers=headers, params=params, stream=True, timeout=300)
+                probe.raise_for_status()
+            with probe, open(part_path, 'wb') as f:
+                for chunk in probe.iter_content(chunk_size=self.download_chunk_size):
+                    f.write(chunk)
+            return self._finish_download(part_path, state_path, filepath, expected_size)
+        probe.close()
+
+        segments = self._load_download_state(part_path, state_path, size)
+        lock = threading.Lock()
+
+        def fetch(index: int):
+            start, end, done = segments[index]
+            if start + done > end:
+                return
+            range_headers = {**headers, 'Range': f'bytes={start + done}-{end}'}
+            with self.session.get(url, headers=range_headers, params=params,
+                                  stream=True, timeout=300) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise MiniMaxNetworkError(f"分段请求未返回206: {response.status_code}")
+                with open(part_path, 'r+b') as f:
+                    f.seek(start + done)
+                    unsaved = 0
+                    try:
+                        for chunk in response.iter_content(chunk_size=self.download_chunk_size):
+                            f.write(chunk)
+                            unsaved += len(chunk)
+                            if unsaved >= self.DOWNLOAD_STATE_INTERVAL:
+                                f.flush()
+                                with lock:
+                                    segments[index][2] += unsaved
+                                    self._save_download_state(state_path, size, segments)
+                                unsaved = 0
+                    finally:
+                        # 分段结束或中断时记录已写入的部分
+                        f.flush()
+                        with lock:
+                            segments[index][2] += unsaved
+                            self._save_download_state(state_path, size, segments)
+
+        with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+            list(executor.map(fetch, range(len(segments))))
+
+        return self._finish_download(part_path, state_path, filepath, expected_size, segments)
+
+    def _download_temp_paths(self, filepath: Path) -> tuple:
+        """返回 (.part 数据文件, .part.json 进度文件) 路径"""
+        return (filepath.with_name(filepath.name + '.part'),
+                filepath.with_name(filepath.name + '.part.json'))
+
+    def _parse_range_total(self, status_code: int, headers) -> Optional[int]:
+        """从探测响应的 Content-Range 中解析文件总大小，不支持分段时返回 None"""
+        if status_code != 206:
+            return None
+        total = headers.get('Content-Range', '').rpartition('/')[2]
+        return int(total) if total.isdigit() and int(total) > 0 else None
+
+    def _load_download_state(self, part_path: Path, state_path: Path, size: int) -> list:
+        """读取续传进度；没有可用进度时按并行数切分并预分配 .part 文件
+
+        Returns:
+            分段列表 [[start, end, 已下载字节数], ...]
+        """
+        if part_path.exists() and state_path.exists():
+            try:
+                with open(state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get('size') == size and part_path.stat().st_size == size:
+                    segments = state['segments']
+                    finished = sum(done for _, _, done in segments)
+                    self._log(f"⏯️ 断点续传: 已完成 {finished/1024/1024:.1f}/{size/1024/1024:.1f} MB")
+                    return segments
+            except (OSError, ValueError, KeyError):
+                pass
+
+        segment_size = max(self.download_chunk_size, -(-size // self.download_workers))
+        segments = [[start, min(start + segment_size, size) - 1, 0]
+                    for start in range(0, size, segment_size)]
+        with open(part_path, 'wb') as f:
+            f.truncate(size)
+        self._save_download_state(state_path, size, segments)
+        self._log(f"📶 分段下载: {len(segments)}段, {size/1024/1024:.1f} MB")
+        return segments
+
+    def _save_download_state(self, state_path: Path, size: int, segments: list):
+        """原子写入分段进度"""
+        tmp_path = state_path.with_name(state_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'size': size, 'segments': segments}, f)
+        os.replace(tmp_path, state_path)
+
+    def _finish_download(self, part_path: Path, state_path: Path, filepath: Path,
+                         expected_size: int = None, segments: list = None) -> Path:
+        """校验下载结果并将 .part 重命名为目标文件"""
+        if segments and any(start + done <= end for start, end, done in segments):
+            raise MiniMaxNetworkError(f"下载不完整，重新执行可继续下载: {part_path}")
+        actual_size = part_path.stat().st_size
+        if expected_size and actual_size != expected_size:
+            # 删除临时文件和进度，避免下次"续传"到同一个错误结果
+            part_path.unlink()
+            state_path.unlink(missing_ok=True)
+            raise MiniMaxError(f"文件大小校验失败: 预期{expected_size}字节，实际{actual_size}字节，已删除临时文件")
+        os.replace(part_path, filepath)
+        if state_path.exists():
+            state_path.unlink()
+        return filepath
+
+    def wait_for_video(self, task_ids, download: bool = True, timeout: float = 1800,
+                       min_interval: float = 5, max_interval: float = 60,
+                       download_workers: int = 4, on_update=None) -> Dict[str, Dict[str, Any]]:
+        """等待一个或多个视频任务完成，成功的任务自动下载
+
+        每个任务独立退避：刚提交时轮询较快，之后逐渐放慢，排队中（Queueing）放慢得更快。
+        下载在后台线程中进行，不阻塞其他任务的轮询。
+
+        Args:
+            task_ids: 任务ID或任务ID列表
+            download: 成功后是否自动下载视频，默认True
+            timeout: 最长等待时间（秒），默认1800
+            min_interval: 初始轮询间隔（秒），默认5
+            max_interval: 最大轮询间隔（秒），默认60
+            download_workers: 并发下载数，默认4
+            on_update: 状态变化回调 on_update(task_id, result)
+
+        Returns:
+            {task_id: {"status", "file_id", "filepath", "error"}}，超时未完成的任务 status 为 Timeout
+        """
+        if isinstance(task_ids, str):
+            task_ids = [task_ids]
+        results = {task_id: {"status": "Pending"} for task_id in task_ids}
+        intervals = {task_id: min_interval for task_id in task_ids}
+        next_poll = {task_id: 0.0 for task_id in task_ids}
+        deadline = time.monotonic() + timeout
+        downloads = {}
+
+        self._log(f"⏳ 等待{len(task_ids)}个视频任务完成...")
+        with ThreadPoolExecutor(max_workers=download_workers) as executor:
+            while next_poll and time.monotonic() < deadline:
+                now = time.monotonic()
+                for task_id in [t for t, due in next_poll.items() if due <= now]:
+                    try:
+                        status = self.video_status(task_id)
+                    except Exception as e:
+                        self._log(f"⚠️ 查询任务{task_id}失败: {e}", "WARN")
+                        status = {}
+                    state = self._update_video_wait(task_id, status, results, intervals,
+                                                    max_interval, on_update)
+                    if state in ("Success", "Fail"):
+                        del next_poll[task_id]
+                        if state == "Success" and download:
+                            downloads[task_id] = executor.submit(self.download_video,
+                                                                 results[task_id]["file_id"])
+                    else:
+                        next_poll[task_id] = time.monotonic() + intervals[task_id]
+
+                if next_poll:
+                    wake = min(min(next_poll.values()), deadline)
+                    time.sleep(max(0, wake - time.monotonic()))
+
+            for task_id, future in downloads.items():
+                try:
+                    results[task_id]["filepath"] = future.result()
+                except Exception as e:
+                    results[task_id]["error"] = f"下载失败: {e}"
+
+        return self._finish_video_wait(results, next_poll)
+
+    def _update_video_wait(self, task_id: str, status: dict, results: dict, intervals: dict,
+                           max_interval: float, on_update=None) -> Optional[str]:
+        """记录一次轮询结果并调整该任务的轮询间隔，返回最新状态"""
+        state = status.get("status")
+        factor = 2.0 if state == "Queueing" else 1.5
+        intervals[task_id] = min(intervals[task_id] * factor, max_interval)
+        if not state:
+            return None
+
+        result = results[task_id]
+        changed = result.get("status") != state
+        result["status"] = state
+        if status.get("file_id"):
+            result["file_id"] = status["file_id"]
+        if state == "Fail":
+            result["error"] = status.get("error_message") or "生成失败"
+
+        if changed:
+            self._log(f"📊 任务{task_id}: {state}")
+            if on_update:
+                on_update(task_id, result)
+        return state
+
+    def _finish_video_wait(self, results: dict, pending) -> Dict[str, Dict[str, Any]]:
+        """标记超时任务并输出汇总"""
+        for task_id in pending:
+            results[task_id]["status"] = "Timeout"
+        done = sum(1 for r in results.values() if r["status"] == "Success")
+        self._log(f"🏁 视频任务结束: 成功{done}/{len(results)}")
+        return results
 
     def subject_reference_to_video(self, subject_image: str, prompt: str,
                                    prompt_optimizer: bool = True,
@@ -957,6 +2801,22 @@ class MiniMaxClient:
         Raises:
             ValueError: 参数验证失败时抛出
         """
+        data = self._build_subject_reference_request(subject_image, prompt, prompt_optimizer,
+                                                     aigc_watermark, callback_url)
+
+        # 发送请求
+        response = self._request("POST", "video_generation", json=data)
+
+        task_id = response.get("task_id", "")
+        self._log(f"✅ 主体参考视频生成任务已提交，任务ID: {task_id}")
+
+        return task_id
+
+    def _build_subject_reference_request(self, subject_image: str, prompt: str,
+                                         prompt_optimizer: bool = True,
+                                         aigc_watermark: bool = False,
+                                         callback_url: str = None) -> dict:
+        """构建主体参考视频请求数据（参数同 subject_reference_to_video）"""
         self._log("👤 开始主体参考视频生成...")
 
         # 参数验证
@@ -996,13 +2856,7 @@ class MiniMaxClient:
         self._log(f"📝 视频描述: {prompt[:100]}{'...' if len(prompt) > 100 else ''}")
         self._log(f"👤 主体图片: {subject_image}")
 
-        # 发送请求
-        response = self._request("POST", "video_generation", json=data)
-
-        task_id = response.get("task_id", "")
-        self._log(f"✅ 主体参考视频生成任务已提交，任务ID: {task_id}")
-
-        return task_id
+        return data
 
     def music(self, prompt: str = None, lyrics: str = None, stream: bool = False,
                 output_format: str = "hex", sample_rate: int = 44100,
@@ -1028,6 +2882,16 @@ class MiniMaxClient:
         Returns:
             音频数据（hex编码或URL）
         """
+        data = self._build_music_request(prompt, lyrics, stream, output_format, sample_rate,
+                                         bitrate, format, aigc_watermark, model)
+        response = self._request("POST", "music_generation", json=data)
+        return self._parse_music_response(response)
+
+    def _build_music_request(self, prompt: str = None, lyrics: str = None, stream: bool = False,
+                             output_format: str = "hex", sample_rate: int = 44100,
+                             bitrate: int = 256000, format: str = "mp3",
+                             aigc_watermark: bool = False, model: str = "music-2.5") -> dict:
+        """构建音乐生成请求数据（参数同 music）"""
         self._log("🎵 开始生成音乐...")
         import sys
 
@@ -1146,8 +3010,10 @@ class MiniMaxClient:
         self._log(f"🌊 流式传输: {'是' if stream else '否'}")
         self._log(f"🔗 返回格式: {output_format}")
 
-        response = self._request("POST", "music_generation", json=data)
+        return data
 
+    def _parse_music_response(self, response: dict) -> str:
+        """解析音乐生成响应"""
         # 检查音乐生成状态
         music_data = response.get('data', {})
         status = music_data.get('status', 0)
@@ -1188,11 +3054,37 @@ class MiniMaxClient:
             ValueError: 参数验证失败时抛出
         """
         self._log(f"📤 开始上传文件: {file_path}")
+        file_size, file_ext = self._validate_upload(file_path, purpose)
+
+        # 构建multipart/form-data请求
+        url = self._build_url("files/upload")
+        headers = self._headers(content_type=None)
 
+        # 准备文件数据
+        with open(file_path, 'rb') as f:
+            files = {
+                'file': (Path(file_path).name, f, 'application/octet-stream'),
+                'purpose': (None, purpose)
+            }
+
+            self._log(f"📋 文件用途: {purpose}")
+            self._log(f"📊 文件大小: {file_size/1024:.1f} KB")
+            self._log(f"📄 文件格式: {file_ext}")
+
+            try:
+                response = self.session.post(url, headers=headers, files=files, timeout=60)
+                response.raise_for_status()
+                return self._parse_upload_response(response.json())
+
+            except requests.exceptions.Timeout:
+                raise Exception("文件上传超时，请检查网络连接")
+            except Exception as e:
+                raise Exception(f"文件上传失败: {str(e)}")
+
+    def _validate_upload(self, file_path: str, purpose: str) -> tuple:
+        """验证待上传文件，返回 (文件大小, 扩展名)"""
         # 参数验证
-        valid_purposes = ["voice_clone", "prompt_audio", "t2a_async_input"]
-        if purpose not in valid_purposes:
-            raise ValueError(f"无效的purpose: {purpose}，可选值: {valid_purposes}")
+        self._validate_purpose(purpose, ["voice_clone", "prompt_audio", "t2a_async_input"])
 
         if not Path(file_path).exists():
             raise ValueError(f"文件不存在: {file_path}")
@@ -1214,52 +3106,32 @@ class MiniMaxClient:
             if file_ext not in valid_formats:
                 raise ValueError(f"t2a_async_input仅支持文本文件，当前格式: {file_ext}")
 
-        # 构建multipart/form-data请求
-        import requests
-
-        url = f"{self.base_url}/files/upload"
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-        }
+        return file_size, file_ext
 
-        # 准备文件数据
-        with open(file_path, 'rb') as f:
-            files = {
-                'file': (Path(file_path).name, f, 'application/octet-stream'),
-                'purpose': (None, purpose)
-            }
-
-            self._log(f"📋 文件用途: {purpose}")
-            self._log(f"📊 文件大小: {file_size/1024:.1f} KB")
-            self._log(f"📄 文件格式: {file_ext}")
-
-            try:
-                response = requests.post(url, headers=headers, files=files, timeout=60)
-                response.raise_for_status()
-                result = response.json()
-
-                if 'base_resp' in result and result['base_resp']['status_code'] != 0:
-                    error_msg = result['base_resp'].get('status_msg', 'Unknown error')
-                    raise Exception(f"文件上传失败: {error_msg}")
+    def _validate_purpose(self, purpose: str, valid_purposes: list):
+        """验证文件用途"""
+        if purpose not in valid_purposes:
+            raise ValueError(f"无效的purpose: {purpose}，可选值: {valid_purposes}")
 
-                file_info = result.get('file', {})
-                file_id = file_info.get('file_id', '')
-                filename = file_info.get('filename', '')
-                bytes_size = file_info.get('bytes', 0)
-                created_at = file_info.get('created_at', 0)
+    def _parse_upload_response(self, result: dict) -> Dict[str, Any]:
+        """解析文件上传响应"""
+        if 'base_resp' in result and result['base_resp']['status_code'] != 0:
+            error_msg = result['base_resp'].get('status_msg', 'Unknown error')
+            raise Exception(f"文件上传失败: {error_msg}")
 
-                self._log(f"✅ 文件上传成功")
-                self._log(f"📁 文件ID: {file_id}")
-                self._log(f"📄 文件名: {filename}")
-                self._log(f"📊 大小: {bytes_size/1024:.1f} KB")
-                self._log(f"📅 上传时间: {datetime.fromtimestamp(created_at).strftime('%Y-%m-%d %H:%M:%S')}" if created_at else "")
+        file_info = result.get('file', {})
+        file_id = file_info.get('file_id', '')
+        filename = file_info.get('filename', '')
+        bytes_size = file_info.get('bytes', 0)
+        created_at = file_info.get('created_at', 0)
 
-                return result
+        self._log(f"✅ 文件上传成功")
+        self._log(f"📁 文件ID: {file_id}")
+        self._log(f"📄 文件名: {filename}")
+        self._log(f"📊 大小: {bytes_size/1024:.1f} KB")
+        self._log(f"📅 上传时间: {datetime.fromtimestamp(created_at).strftime('%Y-%m-%d %H:%M:%S')}" if created_at else "")
 
-            except requests.exceptions.Timeout:
-                raise Exception("文件上传超时，请检查网络连接")
-            except Exception as e:
-                raise Exception(f"文件上传失败: {str(e)}")
+        return result
 
     def list_files(self, purpose: str) -> Dict[str, Any]:
         """
@@ -1281,9 +3153,7 @@ class MiniMaxClient:
         """
         try:
             # 参数验证
-            valid_purposes = ["voice_clone", "prompt_audio", "t2a_async_input"]
-            if purpose not in valid_purposes:
-                raise ValueError(f"无效的purpose: {purpose}，可选值: {valid_purposes}")
+            self._validate_purpose(purpose, ["voice_clone", "prompt_audio", "t2a_async_input"])
 
             # 构建查询参数
             params = {'purpose': purpose}
@@ -1328,10 +3198,6 @@ class MiniMaxClient:
             下载文件的本地路径
         """
         try:
-            import requests
-            import os
-            from pathlib import Path
-
             # 首先获取文件信息
             file_info = self.retrieve_file(file_id)
             if 'error' in file_info:
@@ -1342,28 +3208,16 @@ class MiniMaxClient:
 
             # 构建下载URL
             params = {'file_id': file_id}
-            download_url = f"{self.base_url}/files/retrieve_content"
-            headers = {'Authorization': f'Bearer {self.api_key}'}
+            download_url = self._build_url("files/retrieve_content")
+            headers = self._headers(content_type=None)
 
             self._log(f"📥 开始下载文件: {filename}")
 
-            response = requests.get(download_url, headers=headers, params=params, stream=True, timeout=300)
-            response.raise_for_status()
+            save_path = self._resolve_save_path(filename, save_path)
 
-            # 确定保存路径
-            if save_path is None:
-                output_dir = self.base_dir / "downloads"
-                output_dir.mkdir(parents=True, exist_ok=True)
-                save_path = output_dir / filename
-            else:
-                save_path = Path(save_path)
-                save_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # 写入文件
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            # 分段并行下载，支持断点续传
+            self._download(download_url, save_path, file_data.get('bytes'),
+                           headers=headers, params=params)
 
             file_size = save_path.stat().st_size
             self._log(f"✅ 文件下载成功: {save_path}")
@@ -1376,6 +3230,16 @@ class MiniMaxClient:
             self._log(error_msg)
             return error_msg
 
+    def _resolve_save_path(self, filename: str, save_path: str = None) -> Path:
+        """确定下载文件的保存路径"""
+        if save_path is None:
+            output_dir = self.base_dir / "downloads"
+            output_dir.mkdir(parents=True, exist_ok=True)
+            return output_dir / filename
+        save_path = Path(save_path)
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        return save_path
+
     def delete_file(self, file_id: str, purpose: str) -> Dict[str, Any]:
         """
         删除文件
@@ -1389,9 +3253,8 @@ class MiniMaxClient:
         """
         try:
             # 参数验证
-            valid_purposes = ["voice_clone", "prompt_audio", "t2a_async", "t2a_async_input", "video_generation"]
-            if purpose not in valid_purposes:
-                raise ValueError(f"无效的purpose: {purpose}，可选值: {valid_purposes}")
+            self._validate_purpose(purpose, ["voice_clone", "prompt_audio", "t2a_async",
+                                             "t2a_async_input", "video_generation"])
 
             data = {
                 'file_id': file_id,
@@ -1405,20 +3268,23 @@ class MiniMaxClient:
                 '/files/delete',
                 json=data
             )
-
-            if 'base_resp' in result and result['base_resp']['status_code'] == 0:
-                self._log(f"✅ 文件删除成功: {file_id}")
-            else:
-                error_msg = result.get('base_resp', {}).get('status_msg', 'Unknown error')
-                self._log(f"❌ 文件删除失败: {error_msg}")
-
-            return result
+            return self._parse_delete_response(result, file_id)
 
         except Exception as e:
             error_msg = f"文件删除失败: {str(e)}"
             self._log(error_msg)
             return {'error': error_msg}
 
+    def _parse_delete_response(self, result: dict, file_id: str) -> Dict[str, Any]:
+        """解析文件删除响应"""
+        if 'base_resp' in result and result['base_resp']['status_code'] == 0:
+            self._log(f"✅ 文件删除成功: {file_id}")
+        else:
+            error_msg = result.get('base_resp', {}).get('status_msg', 'Unknown error')
+            self._log(f"❌ 文件删除失败: {error_msg}")
+
+        return result
+
     def tts(self, text: str, voice_id: str = "female-chengshu", emotion: str = None,
                model: str = "speech-2.8-hd",
                speed: float = 1.0, vol: float = 1.0, pitch: int = 0,
@@ -1431,7 +3297,7 @@ class MiniMaxClient:
         """文本转语音（支持8个模型和完整参数）
 
         Args:
-            text: 需要合成语音的文本 (< 10000字符)
+            text: 需要合成语音的文本 (≤ 10000字符；更长的 mp3/pcm 非流式hex输出自动改用 tts_long 分段合成)
             voice_id: 音色ID (支持系统音色、复刻音色、文生音色)
             model: 语音模型 [speech-2.8-hd, speech-2.8-turbo, speech-2.6-hd, speech-2.6-turbo, speech-02-hd, speech-02-turbo]
             emotion: 情感控制 [happy, sad, angry, fearful, disgusted, surprised, calm, fluent, whisper]
@@ -1455,8 +3321,112 @@ class MiniMaxClient:
             aigc_watermark: 添加音频水印（仅非流式），默认False
 
         Returns:
-            音频数据URL或hex编码
+            音频数据URL或hex编码（流式时为各音频块合并后的hex）
         """
+        if self._should_use_tts_long(text, format, stream, subtitle_enable, output_format):
+            return self.tts_long(text, voice_id, emotion=emotion, model=model, speed=speed, vol=vol,
+                                 pitch=pitch, sample_rate=sample_rate, format=format, bitrate=bitrate,
+                                 channel=channel, language_boost=language_boost,
+                                 text_normalization=text_normalization, latex_read=latex_read,
+                                 continuous_sound=continuous_sound, voice_modify=voice_modify,
+                                 aigc_watermark=aigc_watermark)
+
+        data = self._build_tts_request(text, voice_id, emotion, model, speed, vol, pitch,
+                                       sample_rate, format, bitrate, channel, stream,
+                                       language_boost, subtitle_enable, output_format,
+                                       text_normalization, latex_read, force_cbr,
+                                       continuous_sound, voice_modify, aigc_watermark)
+        if stream:
+            return b"".join(self._iter_tts_stream(data)).hex()
+
+        cache_key = self._tts_cache_key(data)
+        cached = self._read_tts_cache(cache_key)
+        if cached is not None:
+            return cached.hex()
+        response = self._request("POST", "t2a_v2", json=data)
+        audio = self._parse_tts_response(response, stream)
+        self._write_tts_cache(cache_key, audio, response.get('extra_info'))
+        return audio
+
+    def _iter_tts_stream(self, data: dict):
+        """流式语音合成，逐块产出解码后的音频字节（命中缓存时一次产出完整音频）"""
+        cache_key = self._tts_cache_key(data)
+        cached = self._read_tts_cache(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = 0
+        received = []  # 启用缓存时暂存音频块，完整接收后写入缓存
+        extra_info = None
+        for event in self._request_stream("POST", "t2a_v2", json=data):
+            extra_info = event.get('extra_info') or extra_info
+            audio = self._parse_tts_stream_event(event)
+            if audio:
+                chunks += 1
+                if cache_key:
+                    received.append(audio)
+                yield audio
+        self._log(f"📡 流式语音合成完成，共{chunks}个音频块")
+        self._write_tts_cache(cache_key, b"".join(received), extra_info)
+
+    def _tts_cache_key(self, data: dict) -> Optional[str]:
+        """语音缓存键：规范化后的完整 t2a_v2 请求（忽略流式开关），不可缓存时返回 None
+
+        url 输出是带有效期的临时链接，字幕同样以链接返回，这两种情况不缓存。
+        """
+        if self.tts_cache is None or data.get('output_format', 'hex') != 'hex' or data.get('subtitle_enable'):
+            return None
+        payload = {k: v for k, v in data.items() if k not in ('stream', 'stream_options')}
+        return DiskCache.make_key(payload)
+
+    def _read_tts_cache(self, cache_key: Optional[str]) -> Optional[bytes]:
+        """读取语音缓存，返回音频字节"""
+        if not cache_key:
+            return None
+        entry = self.tts_cache.get(cache_key)
+        if entry is None:
+            return None
+        audio, extra_info = entry
+        self._log(f"💾 命中语音缓存 (时长{extra_info.get('audio_length', 0)//1000}秒, "
+                  f"大小{len(audio)//1024}KB)")
+        return audio
+
+    def _write_tts_cache(self, cache_key: Optional[str], audio, extra_info: dict = None):
+        """写入语音缓存，audio 可为字节或 hex 字符串"""
+        if not cache_key or not audio:
+            return
+        if isinstance(audio, str):
+            audio = bytes.fromhex(audio)
+        try:
+            self.tts_cache.set(cache_key, audio, extra_info or {})
+        except OSError as e:
+            self._log(f"⚠️ 写入语音缓存失败: {e}", "WARN")
+
+    def _parse_tts_stream_event(self, event: dict) -> bytes:
+        """解析单个流式语音事件，返回本块音频字节（汇总块返回空）"""
+        payload = event.get('data') or {}
+        if payload.get('status') == 2:
+            # 结束事件：只记录音频信息，不重复输出汇总音频
+            extra_info = event.get('extra_info', {})
+            if extra_info:
+                self._log(f"📊 音频信息: 时长{extra_info.get('audio_length', 0)//1000}秒, "
+                         f"大小{extra_info.get('audio_size', 0)//1024}KB, "
+                         f"字数{extra_info.get('word_count', 0)}")
+            return b""
+        audio = payload.get('audio')
+        return bytes.fromhex(audio) if audio else b""
+
+    def _build_tts_request(self, text: str, voice_id: str = "female-chengshu", emotion: str = None,
+                           model: str = "speech-2.8-hd",
+                           speed: float = 1.0, vol: float = 1.0, pitch: int = 0,
+                           sample_rate: int = 32000, format: str = "mp3", bitrate: int = 128000,
+                           channel: int = 1, stream: bool = False, language_boost: str = None,
+                           subtitle_enable: bool = False, output_format: str = "hex",
+                           text_normalization: bool = False, latex_read: bool = False,
+                           force_cbr: bool = False, continuous_sound: bool = False,
+                           voice_modify: dict = None, aigc_watermark: bool = False) -> dict:
+        """构建语音合成请求数据（参数同 tts）"""
         self._log(f"🎤 开始语音合成 (模型: {model})...")
 
         # 模型验证（仅保留 speech-02 及以后的新模型）
@@ -1466,8 +3436,8 @@ class MiniMaxClient:
             raise ValueError(f"模型必须是{valid_models}之一")
 
         # 参数验证
-        if len(text) > 10000:
-            raise ValueError("文本长度不能超过10000字符")
+        if len(text) > self.TTS_MAX_CHARS:
+            raise ValueError(f"文本长度不能超过{self.TTS_MAX_CHARS}字符（更长文本请使用 tts_long）")
         if speed < 0.5 or speed > 2.0:
             raise ValueError("语速参数必须在0.5-2.0之间")
         if vol <= 0 or vol > 10:
@@ -1546,20 +3516,21 @@ class MiniMaxClient:
             data["aigc_watermark"] = True
 
         if stream:
+            # 已逐块接收，无需服务端在结束时再返回一份完整音频
             data["stream_options"] = {
-                "exclude_aggregated_audio": False
+                "exclude_aggregated_audio": True
             }
             # force_cbr 仅在流式+mp3时生效
             if format == "mp3" and force_cbr:
                 data["audio_setting"]["force_cbr"] = True
 
-        response = self._request("POST", "t2a_v2", json=data)
+        return data
 
-        # 处理响应
+    def _parse_tts_response(self, response: dict, stream: bool = False) -> str:
+        """解析语音合成响应"""
         if stream:
-            # 流式响应处理
+            # 服务端未按流式返回时的兜底
             self._log("📡 流式语音合成完成")
-            # TODO: 实现流式音频合并
             return response.get('data', {}).get('audio', '')
         else:
             audio_data = response.get('data', {}).get('audio', '')
@@ -1601,6 +3572,20 @@ class MiniMaxClient:
         Returns:
             音频数据URL或hex编码
         """
+        data = self._build_tts_advanced_request(text, voice_id, pronunciation_dict, timber_weights,
+                                                voice_modify, aigc_watermark, text_normalization,
+                                                latex_read)
+        response = self._request("POST", "t2a_v2", json=data)
+        return self._parse_tts_advanced_response(response, data)
+
+    def _build_tts_advanced_request(self, text: str, voice_id: str = "female-chengshu",
+                                    pronunciation_dict: dict = None,
+                                    timber_weights: list = None,
+                                    voice_modify: dict = None,
+                                    aigc_watermark: bool = False,
+                                    text_normalization: bool = False,
+                                    latex_read: bool = False) -> dict:
+        """构建高级语音合成请求数据（参数同 tts_advanced）"""
         self._log("🎨 开始高级语音合成...")
 
         # 构建请求数据
@@ -1637,7 +3622,14 @@ class MiniMaxClient:
         if voice_modify:
             data["voice_modify"] = voice_modify
 
-        response = self._request("POST", "t2a_v2", json=data)
+        return data
+
+    def _parse_tts_advanced_response(self, response: dict, data: dict) -> str:
+        """解析高级语音合成响应"""
+        timber_weights = data.get("timber_weights")
+        pronunciation_dict = data.get("pronunciation_dict")
+        voice_modify = data.get("voice_modify")
+
         audio_url = response.get('data', {}).get('audio', '')
         self._log("🎭 高级语音合成完成")
 
@@ -1652,40 +3644,120 @@ class MiniMaxClient:
         return audio_url
 
     def tts_stream(self, text: str, voice_id: str = "female-chengshu",
-                         callback_func=None, **kwargs) -> str:
-        """流式文本转语音
+                         callback_func=None, output_path: str = None, **kwargs) -> str:
+        """流式文本转语音，每收到一个音频块即回调/写入文件
 
         Args:
             text: 需要合成语音的文本
             voice_id: 音色ID
-            callback_func: 流式数据回调函数
+            callback_func: 流式数据回调函数，参数为本块音频字节 callback_func(chunk: bytes)
+            output_path: 边接收边写入的文件路径（指定后不在内存中保留完整音频，启用语音缓存时除外）
             **kwargs: 其他TTS参数
 
         Returns:
-            最终合并的音频数据
+            指定 output_path 时返回文件路径，否则返回合并后的hex音频数据
         """
         self._log("📡 开始流式语音合成...")
+        data = self._build_tts_stream_request(text, voice_id, kwargs)
+
+        chunks = []
+        with (open(output_path, 'wb') if output_path else nullcontext()) as f:
+            for chunk in self._iter_tts_stream(data):
+                if f:
+                    f.write(chunk)
+                    f.flush()
+                else:
+                    chunks.append(chunk)
+                if callback_func:
+                    callback_func(chunk)
+
+        return str(output_path) if output_path else b"".join(chunks).hex()
 
+    def _build_tts_stream_request(self, text: str, voice_id: str, kwargs: dict) -> dict:
+        """构建流式语音合成请求数据"""
         kwargs["stream"] = True
-        if "output_format" not in kwargs:
-            kwargs["output_format"] = "hex"  # 流式仅支持hex格式
+        kwargs.setdefault("output_format", "hex")  # 流式仅支持hex格式
+        return self._build_tts_request(text, voice_id, **kwargs)
 
-        # 使用基础TTS方法进行流式调用
-        audio_chunks = []
-        # TODO: 实现真正的流式处理和回调
+    def tts_long(self, text: str, voice_id: str = "female-chengshu", max_chars: int = 3000,
+                 workers: int = 8, **kwargs) -> str:
+        """长文本语音合成：按段落/句子切分，并发合成后按顺序拼接
 
-        return self.tts(text, voice_id, **kwargs)
+        各段使用相同的音色和参数；已合成的段落会进入语音缓存，失败重跑时只合成缺失部分。
+
+        Args:
+            text: 任意长度的文本
+            voice_id: 音色ID
+            max_chars: 每段最大字符数（不超过10000），默认3000
+            workers: 并发合成的段数（同时受 rate_limiter 的 t2a_v2 配额约束），默认8
+            **kwargs: 其他TTS参数（同 tts，仅支持 mp3/pcm 格式的非流式 hex 输出）
+
+        Returns:
+            拼接后音频的hex编码
+        """
+        chunks, format = self._prepare_tts_long(text, max_chars, kwargs)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+            audios = list(pool.map(lambda chunk: bytes.fromhex(self.tts(chunk, voice_id, **kwargs)), chunks))
+        return self._finish_tts_long(audios, format)
+
+    def _should_use_tts_long(self, text: str, format: str, stream: bool,
+                             subtitle_enable: bool, output_format: str) -> bool:
+        """超过单次合成上限且输出可拼接时，tts 自动改用分段合成"""
+        return (len(text) > self.TTS_MAX_CHARS and format in ("mp3", "pcm") and not stream
+                and not subtitle_enable and output_format == "hex")
+
+    def _prepare_tts_long(self, text: str, max_chars: int, kwargs: dict) -> tuple:
+        """校验长文本合成参数并切分文本，返回 (分段列表, 音频格式)"""
+        if not 0 < max_chars <= self.TTS_MAX_CHARS:
+            raise ValueError(f"max_chars 必须在1-{self.TTS_MAX_CHARS}之间")
+        format = kwargs.get("format", "mp3")
+        if format not in ("mp3", "pcm"):
+            raise ValueError("长文本合成仅支持mp3,pcm格式")
+        if kwargs.get("stream") or kwargs.get("subtitle_enable") or kwargs.get("output_format", "hex") != "hex":
+            raise ValueError("长文本合成仅支持非流式hex输出，且不支持字幕")
+        chunks = _split_tts_text(text, max_chars)
+        if not chunks:
+            raise ValueError("文本不能为空")
+        self._log(f"📚 长文本语音合成: {len(text)}字符，切分为{len(chunks)}段")
+        return chunks, format
+
+    def _finish_tts_long(self, audios: list, format: str) -> str:
+        """拼接各段音频，返回hex"""
+        audio = _join_audio_chunks(audios, format)
+        self._log(f"✅ 长文本语音合成完成: {len(audios)}段, 大小{len(audio)//1024}KB")
+        return audio.hex()
 
     def list_voices(self, voice_type: str = "all") -> Dict[str, Any]:
         """查询可用音色列表"""
         self._log("🔍 查询可用音色列表...")
-        
+
         # 检查缓存
+        cached = self._read_voice_cache(voice_type)
+        if cached is not None:
+            return cached
+
+        url, data = self._build_list_voices_request(voice_type)
+
+        try:
+            response = self.session.post(url, headers=self._headers(), json=data)
+            response.raise_for_status()
+            result = response.json()
+            self._write_voice_cache(voice_type, result)
+            return result
+
+        except Exception as e:
+            return self._fallback_voice_cache(e)
+
+    def _voice_cache_file(self) -> Path:
         cache_file = Path("./cache/voices.json")
         cache_file.parent.mkdir(exist_ok=True)
-        
+        return cache_file
+
+    def _read_voice_cache(self, voice_type: str) -> Optional[Dict[str, Any]]:
+        """读取未过期的音色缓存，无有效缓存时返回None"""
+        cache_file = self._voice_cache_file()
+
         # 缓存有效期：2小时
-        cache_valid = False
         if cache_file.exists():
             try:
                 with open(cache_file, 'r', encoding='utf-8') as f:
@@ -1697,7 +3769,10 @@ class MiniMaxClient:
                             return cache_data.get('data', {})
             except Exception:
                 pass
-        
+        return None
+
+    def _build_list_voices_request(self, voice_type: str) -> tuple:
+        """构建音色查询请求，返回 (url, data)"""
         # API支持的参数映射（根据官方文档）
         valid_types = {
             'system': 'system',
@@ -1708,45 +3783,36 @@ class MiniMaxClient:
 
         # 使用有效的API参数
         api_param = valid_types.get(voice_type, 'all')
-        
+
         # 调用API获取最新数据
-        url = "https://api.minimaxi.com/v1/get_voice"
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json'
+        return self._build_url("get_voice"), {'voice_type': api_param}
+
+    def _write_voice_cache(self, voice_type: str, result: Dict[str, Any]):
+        """缓存音色查询结果"""
+        cache_data = {
+            'voice_type': voice_type,
+            'timestamp': datetime.now().isoformat(),
+            'data': result
         }
-        data = {'voice_type': api_param}
-        
-        try:
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            result = response.json()
-            
-            # 缓存结果
-            cache_data = {
-                'voice_type': voice_type,
-                'timestamp': datetime.now().isoformat(),
-                'data': result
-            }
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-            
-            self._log("✅ 音色列表已更新并缓存")
-            return result
-            
-        except Exception as e:
-            # 如果API失败，尝试使用缓存（即使过期也显示提示）
-            if cache_file.exists():
-                try:
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        cache_data = json.load(f)
-                        self._log("⚠️ 使用过期缓存数据，建议稍后刷新", "WARN")
-                        return cache_data.get('data', {})
-                except Exception:
-                    pass
-            
-            self._log(f"❌ 获取音色列表失败: {e}", "ERROR")
-            return {}
+        with open(self._voice_cache_file(), 'w', encoding='utf-8') as f:
+            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+
+        self._log("✅ 音色列表已更新并缓存")
+
+    def _fallback_voice_cache(self, error: Exception) -> Dict[str, Any]:
+        """API失败时尝试使用缓存（即使过期也显示提示）"""
+        cache_file = self._voice_cache_file()
+        if cache_file.exists():
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    cache_data = json.load(f)
+                    self._log("⚠️ 使用过期缓存数据，建议稍后刷新", "WARN")
+                    return cache_data.get('data', {})
+            except Exception:
+                pass
+
+        self._log(f"❌ 获取音色列表失败: {error}", "ERROR")
+        return {}
 
     def voice_clone(self, file_id: int, voice_id: str,
                    prompt_audio: int = None, prompt_text: str = None,
@@ -1789,6 +3855,22 @@ class MiniMaxClient:
             (burps), (lip-smacking), (humming), (hissing), (emm), (whistles),
             (sneezes), (crying), (applause)
         """
+        data = self._build_voice_clone_request(file_id, voice_id, prompt_audio, prompt_text, text,
+                                               model, language_boost, need_noise_reduction,
+                                               need_volume_normalization, aigc_watermark,
+                                               continuous_sound)
+        response = self._request("POST", "voice_clone", json=data)
+        return self._parse_voice_clone_response(response)
+
+    def _build_voice_clone_request(self, file_id: int, voice_id: str,
+                                   prompt_audio: int = None, prompt_text: str = None,
+                                   text: str = None, model: str = "speech-2.8-hd",
+                                   language_boost: str = None,
+                                   need_noise_reduction: bool = False,
+                                   need_volume_normalization: bool = False,
+                                   aigc_watermark: bool = False,
+                                   continuous_sound: bool = False) -> dict:
+        """构建音色复刻请求数据（参数同 voice_clone）"""
         self._log("🎤 开始音色快速复刻...")
 
         # 参数验证
@@ -1839,8 +3921,10 @@ class MiniMaxClient:
         self._log(f"📁 复刻音频ID: {file_id}")
         self._log(f"🎭 目标音色ID: {voice_id}")
 
-        response = self._request("POST", "voice_clone", json=data)
+        return data
 
+    def _parse_voice_clone_response(self, response: dict) -> Dict[str, Any]:
+        """解析音色复刻响应"""
         # 处理响应
         demo_audio = response.get('demo_audio', '')
         if demo_audio:
@@ -1871,6 +3955,13 @@ class MiniMaxClient:
         Returns:
             包含 voice_id 和 trial_audio (hex编码) 的字典
         """
+        data = self._build_voice_design_request(prompt, preview_text, voice_id, aigc_watermark)
+        response = self._request("POST", "voice_design", json=data)
+        return self._parse_voice_design_response(response)
+
+    def _build_voice_design_request(self, prompt: str, preview_text: str,
+                                    voice_id: str = None, aigc_watermark: bool = False) -> dict:
+        """构建音色设计请求数据（参数同 voice_design）"""
         self._log("🎨 开始音色设计...")
 
         # 参数验证
@@ -1895,8 +3986,10 @@ class MiniMaxClient:
         self._log(f"📝 音色描述: {prompt[:100]}{'...' if len(prompt) > 100 else ''}")
         self._log(f"🎧 试听文本: {preview_text[:100]}{'...' if len(preview_text) > 100 else ''}")
 
-        response = self._request("POST", "voice_design", json=data)
+        return data
 
+    def _parse_voice_design_response(self, response: dict) -> Dict[str, Any]:
+        """解析音色设计响应"""
         # 处理响应
         result_voice_id = response.get('voice_id', '')
         trial_audio = response.get('trial_audio', '')
@@ -1907,6 +4000,1338 @@ class MiniMaxClient:
 
         return response
 
+class AsyncMiniMaxClient(MiniMaxClient):
+    """异步MiniMax客户端（需安装 aiohttp：pip install aiohttp）
+
+    与 MiniMaxClient 共用参数验证和请求构建逻辑，所有网络I/O均可 await，
+    所有请求共享一个 aiohttp 连接池。调用方可对任务执行 cancel()，
+    取消会立即中断当前请求或重试等待。
+
+    用法:
+        async with AsyncMiniMaxClient() as client:
+            audios = await asyncio.gather(*(client.tts(t) for t in texts))
+    """
+
+    def __init__(self, max_connections: int = 100, max_connections_per_host: int = 0,
+                 keepalive_timeout: float = 30, timeout: float = 300,
+                 pool_maxsize: int = None, keep_alive: bool = True,
+                 download_workers: int = 4, download_chunk_size: int = 1024 * 1024,
+                 rate_limiter: RateLimiter = None, retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None, tts_cache: bool = True,
+                 tts_cache_max_bytes: int = 512 * 1024 * 1024,
+                 chat_cache: bool = False, chat_cache_ttl: float = 7 * 86400,
+                 image_cache_max_bytes: int = 64 * 1024 * 1024, image_cache_disk: bool = False,
+                 stats: UsageStats = None, metrics: MetricsRegistry = None):
+        """
+        Args:
+            max_connections: 连接池总连接数上限
+            max_connections_per_host: 每个主机的连接数上限，0表示不单独限制
+            keepalive_timeout: 空闲连接保活时间（秒）
+            timeout: 单次请求总超时（秒）
+            pool_maxsize: 每个主机保持的最大连接数（同 MiniMaxClient），指定时覆盖 max_connections_per_host
+            keep_alive: 是否复用TCP/TLS连接（同 MiniMaxClient）
+            download_workers: 分段下载的并行连接数（同 MiniMaxClient）
+            download_chunk_size: 下载读写缓冲大小（字节）
+            rate_limiter: 客户端限流器（同 MiniMaxClient）
+            retry_policy: 重试策略（同 MiniMaxClient）
+            circuit_breaker: 熔断器（同 MiniMaxClient）
+            tts_cache: 是否启用语音合成结果缓存（同 MiniMaxClient）
+            tts_cache_max_bytes: 语音缓存总大小上限（字节）
+            chat_cache: 是否缓存对话响应（同 MiniMaxClient）
+            chat_cache_ttl: 对话缓存有效期（秒）
+            image_cache_max_bytes: 本地图片 Base64 编码结果的内存缓存上限（字节）
+            image_cache_disk: 是否同时把编码结果缓存到磁盘（同 MiniMaxClient）
+            stats: 调用统计（同 MiniMaxClient）
+            metrics: 指标注册表（同 MiniMaxClient）
+        """
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self._aio_session = None
+        self._aio_slots = {}
+        self._network_errors = (OSError, asyncio.TimeoutError)
+        super().__init__(pool_maxsize=pool_maxsize or 16, keep_alive=keep_alive,
+                         download_workers=download_workers,
+                         download_chunk_size=download_chunk_size,
+                         rate_limiter=rate_limiter, retry_policy=retry_policy,
+                         circuit_breaker=circuit_breaker, tts_cache=tts_cache,
+                         tts_cache_max_bytes=tts_cache_max_bytes,
+                         chat_cache=chat_cache, chat_cache_ttl=chat_cache_ttl,
+                         image_cache_max_bytes=image_cache_max_bytes,
+                         image_cache_disk=image_cache_disk, stats=stats, metrics=metrics)
+        if pool_maxsize:
+            self.max_connections_per_host = pool_maxsize
+
+    def _create_session(self, *args, **kwargs):
+        # 异步客户端使用 aiohttp 连接池，在首次请求时于事件循环内创建
+        return None
+
+    async def _get_session(self):
+        """获取（或懒创建）共享的 aiohttp 会话"""
+        if self._aio_session is None or self._aio_session.closed:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError("异步客户端需要 aiohttp，请执行: pip install aiohttp")
+            self._network_errors = (aiohttp.ClientError, OSError, asyncio.TimeoutError)
+            connector = aiohttp.TCPConnector(limit=self.max_connections,
+                                             limit_per_host=self.max_connections_per_host,
+                                             keepalive_timeout=self.keepalive_timeout if self.keep_alive else None,
+                                             force_close=not self.keep_alive)
+            self._aio_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._aio_session
+
+    async def close(self):
+        """关闭连接池"""
+        if self._aio_session is not None and not self._aio_session.closed:
+            await self._aio_session.close()
+        self._aio_session = None
+
+    def __enter__(self):
+        raise TypeError("AsyncMiniMaxClient 请使用 async with")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @asynccontextmanager
+    async def _limit(self, endpoint: str, payload: dict = None):
+        """异步等待速率配额和并发槽（配额与同步客户端共用 RateLimiter 的令牌桶，先等配额再占槽）"""
+        key = RateLimiter.key_for(endpoint)
+        if key is None:
+            yield
+            return
+        limit = self.rate_limiter.limits.get(key, {})
+        if limit.get('concurrency') and key not in self._aio_slots:
+            self._aio_slots[key] = asyncio.Semaphore(limit['concurrency'])
+        delay = self.rate_limiter.reserve(key, RateLimiter.estimate_tokens(key, payload))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with self._aio_slots.get(key) or nullcontext():
+            yield
+
+    @staticmethod
+    def _encode_json_body(kwargs: dict, call: dict) -> dict:
+        """预先序列化 JSON 请求体（aiohttp 不提供实际发送的字节数），并把请求体大小记入 call"""
+        kwargs = dict(kwargs)
+        payload = kwargs.pop('json', None)
+        if payload is not None:
+            kwargs['data'] = json.dumps(payload).encode('utf-8')
+        if isinstance(kwargs.get('data'), (bytes, str)):
+            call['request_bytes'] = len(kwargs['data'])
+        return kwargs
+
+    async def _request(self, method: str, endpoint: str, base_url: str = None, **kwargs) -> Dict[str, Any]:
+        """统一请求（重试与异常同 MiniMaxClient._request）"""
+        call = self._begin_call(endpoint, kwargs.get('json'))
+        try:
+            result = await self._send_request(call, method, endpoint, base_url, **kwargs)
+        except Exception as e:
+            self._finish_call(call, error=e)
+            raise
+        self._finish_call(call, result)
+        return result
+
+    async def _send_request(self, call: dict, method: str, endpoint: str, base_url: str = None,
+                            **kwargs) -> Dict[str, Any]:
+        """发送请求并重试（_request 的实现），过程数据记入 call"""
+        url = self._build_url(endpoint, base_url)
+        headers = self._headers()
+
+        cache_key = self._chat_cache_key(endpoint, kwargs.get('json'))
+        cached = self._read_chat_cache(cache_key)
+        if cached is not None:
+            call['cached'] = True
+            return cached
+
+        payload = kwargs.get('json')
+        self._log_request(method, endpoint, payload)
+        session = await self._get_session()
+        kwargs = self._encode_json_body(kwargs, call)
+
+        circuit_key = CircuitBreaker.key_for(endpoint)
+        for attempt in range(self.retry_policy.max_attempts):
+            call['retries'] = attempt
+            probe = self.circuit_breaker.before_call(circuit_key)
+            try:
+                async with self._limit(endpoint, payload):
+                    sent = time.monotonic()
+                    async with session.request(method, url, headers=headers, **kwargs) as response:
+                        call['ttfb'] = time.monotonic() - sent
+                        body = await response.read()
+                text = body.decode(response.get_encoding())
+                call['response_bytes'] = len(body)
+                self._log(f"📥 响应状态: {response.status}")
+                _raise_for_http(response.status, response.headers, text)
+                try:
+                    result = json.loads(text)
+                except ValueError:
+                    raise MiniMaxNetworkError(f"响应不是有效JSON: {text[:200]}")
+                _check_result(result)
+                self.circuit_breaker.record(circuit_key)
+                self._log(f"✅ 请求成功")
+                self._write_chat_cache(cache_key, result)
+                return result
+            except self._network_errors as e:
+                error = MiniMaxNetworkError(str(e) or type(e).__name__)
+            except MiniMaxError as e:
+                error = e
+            except BaseException:
+                self.circuit_breaker.release(circuit_key, probe)
+                raise
+
+            self.circuit_breaker.record(circuit_key, error)
+            if not self._handle_retry(endpoint, error, attempt):
+                raise error
+            await asyncio.sleep(self.retry_policy.delay(attempt, error))
+
+    async def _request_stream(self, method: str, endpoint: str, base_url: str = None, **kwargs):
+        """流式请求，逐个产出 SSE 事件数据（同 MiniMaxClient._request_stream）"""
+        url = self._build_url(endpoint, base_url)
+        headers = self._headers()
+        headers['Accept'] = 'text/event-stream'
+
+        self._log_request(method, endpoint, kwargs.get('json'))
+        session = await self._get_session()
+
+        call = self._begin_call(endpoint, kwargs.get('json'))
+        try:
+            async for event in self._request_stream_events(call, session, method, endpoint, url,
+                                                           headers, **kwargs):
+                yield event
+        except Exception as e:
+            self._finish_call(call, error=e)
+            raise
+        finally:
+            self._finish_call(call)  # 正常结束或调用方提前停止读取
+
+    async def _request_stream_events(self, call: dict, session, method: str, endpoint: str,
+                                     url: str, headers: dict, **kwargs):
+        """发送流式请求并解析 SSE 事件，接收过程数据记入 call"""
+        payload = kwargs.get('json')
+        kwargs = self._encode_json_body(kwargs, call)
+        # 流式请求在整个接收过程中占用并发槽
+        async with self._limit(endpoint, payload):
+            circuit_key = CircuitBreaker.key_for(endpoint)
+            for attempt in range(self.retry_policy.max_attempts):
+                plain_result = None
+                call['retries'] = attempt
+                probe = self.circuit_breaker.before_call(circuit_key)
+                try:
+                    sent = time.monotonic()
+                    response = await session.request(method, url, headers=headers, **kwargs)
+                    if response.status >= 400 or 'text/event-stream' not in response.headers.get('Content-Type', ''):
+                        async with response:
+                            text = await response.text()
+                        call['ttfb'] = time.monotonic() - sent
+                        call['response_bytes'] = len(text.encode('utf-8'))
+                        _raise_for_http(response.status, response.headers, text)
+                        try:
+                            plain_result = _check_result(json.loads(text))
+                        except ValueError:
+                            raise MiniMaxNetworkError(f"响应不是有效JSON: {text[:200]}")
+                    break
+                except self._network_errors as e:
+                    error = MiniMaxNetworkError(str(e) or type(e).__name__)
+                except MiniMaxError as e:
+                    error = e
+                except BaseException:
+                    self.circuit_breaker.release(circuit_key, probe)
+                    raise
+                self.circuit_breaker.record(circuit_key, error)
+                if not self._handle_retry(endpoint, error, attempt):
+                    raise error
+                await asyncio.sleep(self.retry_policy.delay(attempt, error))
+
+            self._log(f"📥 响应状态: {response.status}")
+            # 熔断器在整个流读完（或出错）后才记录结果（同 MiniMaxClient）
+            try:
+                if plain_result is not None:
+                    yield self._check_stream_event(plain_result, call)
+                else:
+                    async with response:
+                        parser = _SSEParser()
+                        try:
+                            async for line in response.content:
+                                if call['ttfb'] is None:
+                                    call['ttfb'] = time.monotonic() - sent
+                                call['response_bytes'] += len(line)
+                                event = parser.feed(line.decode('utf-8').rstrip('\r\n'))
+                                if event is not None:
+                                    yield self._check_stream_event(event, call)
+                        except self._network_errors as e:
+                            raise MiniMaxNetworkError(f"流式响应中断: {e}") from e
+                        event = parser.flush()
+                        if event is not None:
+                            yield self._check_stream_event(event, call)
+            except MiniMaxError as e:
+                self.circuit_breaker.record(circuit_key, e)
+                raise
+            except BaseException:
+                self.circuit_breaker.release(circuit_key, probe)
+                raise
+            self.circuit_breaker.record(circuit_key)
+
+    async def _download(self, url: str, filepath: Path, expected_size: int = None,
+                        headers: dict = None, params: dict = None) -> Path:
+        """下载到本地文件，支持分段并行与断点续传（同 MiniMaxClient._download）"""
+        filepath = Path(filepath)
+        part_path, state_path = self._download_temp_paths(filepath)
+        headers = dict(headers or {})
+        session = await self._get_session()
+
+        async with session.get(url, headers={**headers, 'Range': 'bytes=0-0'}, params=params) as probe:
+            probe.raise_for_status()
+            size = self._parse_range_total(probe.status, probe.headers)
+            if size is None and probe.status == 200:
+                self._log("📶 服务端不支持分段下载，使用单连接下载", "WARN")
+                with open(part_path, 'wb') as f:
+                    async for chunk in probe.content.iter_chunked(self.download_chunk_size):
+                        f.write(chunk)
+                return self._finish_download(part_path, state_path, filepath, expected_size)
+
+        if size is None:
+            self._log("📶 服务端未返回文件大小，使用单连接下载", "WARN")
+            async with session.get(url, headers=headers, params=params) as response:
+                response.raise_for_status()
+                with open(part_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(self.download_chunk_size):
+                        f.write(chunk)
+            return self._finish_download(part_path, state_path, filepath, expected_size)
+
+        segments = self._load_download_state(part_path, state_path, size)
+
+        async def fetch(segment: list):
+            start, end, done = segment
+            if start + done > end:
+                return
+            range_headers = {**headers, 'Range': f'bytes={start + done}-{end}'}
+            async with session.get(url, headers=range_headers, params=params) as response:
+                response.raise_for_status()
+                if response.status != 206:
+                    raise MiniMaxNetworkError(f"分段请求未返回206: {response.status}")
+                with open(part_path, 'r+b') as f:
+                    f.seek(start + done)
+                    unsaved = 0
+                    try:
+                        async for chunk in response.content.iter_chunked(self.download_chunk_size):
+                            f.write(chunk)
+                            unsaved += len(chunk)
+                            if unsaved >= self.DOWNLOAD_STATE_INTERVAL:
+                                f.flush()
+                                segment[2] += unsaved
+                                unsaved = 0
+                                self._save_download_state(state_path, size, segments)
+                    finally:
+                        f.flush()
+                        segment[2] += unsaved
+                        self._save_download_state(state_path, size, segments)
+
+        tasks = [asyncio.ensure_future(fetch(segment)) for segment in segments]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # 某一段失败时取消其余分段，等待它们保存进度后再抛出
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return self._finish_download(part_path, state_path, filepath, expected_size, segments)
+
+    async def chat(self, message: str, model: str = "M2-her",
+                   system_prompt: str = None, user_system: str = None,
+                   group: str = None, sample_user: str = None, sample_ai: str = None,
+                   temperature: float = 1.0, max_tokens: int = 1024, stream: bool = False,
+                   use_anthropic_api: bool = False, show_thinking: bool = False,
+                   history: list = None) -> str:
+        """智能对话（参数同 MiniMaxClient.chat）"""
+        if stream:
+            deltas = [item async for item in self.chat_stream(
+                message, model, system_prompt, user_system, group, sample_user, sample_ai,
+                temperature, max_tokens, use_anthropic_api, show_thinking, history)]
+            return self._join_chat_deltas(deltas, use_anthropic_api, show_thinking)
+
+        base_url, endpoint, data = self._build_chat_request(
+            message, model, system_prompt, user_system, group, sample_user, sample_ai,
+            temperature, max_tokens, stream, use_anthropic_api, history)
+        response = await self._request("POST", endpoint, base_url=base_url, json=data)
+        return self._parse_chat_response(response, use_anthropic_api, show_thinking)
+
+    async def chat_many(self, prompts, concurrency: int = 8, results_path: str = None,
+                        **chat_kwargs) -> list:
+        """批量对话（参数同 MiniMaxClient.chat_many）"""
+        chat_kwargs.pop('stream', None)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(index, prompt) -> dict:
+            async with semaphore:
+                return await self._chat_many_item(index, prompt, chat_kwargs)
+
+        items = enumerate(prompts)
+        records = []
+        start = time.monotonic()
+        # 与同步版本相同：只预先创建有限个任务，按顺序取结果后再从迭代器补充
+        pending = deque(asyncio.ensure_future(run(index, prompt))
+                        for index, prompt in islice(items, max(1, concurrency) * 2))
+        try:
+            with self._open_chat_many_output(results_path) as out:
+                while pending:
+                    record = await pending.popleft()
+                    self._write_chat_many_record(out, record, records)
+                    for index, prompt in islice(items, 1):
+                        pending.append(asyncio.ensure_future(run(index, prompt)))
+        finally:
+            for task in pending:
+                task.cancel()
+        self._log_chat_many_summary(records, time.monotonic() - start)
+        return records
+
+    async def _chat_many_item(self, index: int, prompt, chat_kwargs: dict) -> dict:
+        record, message, kwargs = self._prepare_chat_many_item(index, prompt, chat_kwargs)
+        start = time.monotonic()
+        try:
+            base_url, endpoint, data = self._build_chat_many_request(message, kwargs)
+            response = await self._request("POST", endpoint, base_url=base_url, json=data)
+            self._finish_chat_many_item(record, response, kwargs)
+        except (MiniMaxError, ValueError, KeyError, IndexError, TypeError) as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+        record["latency"] = round(time.monotonic() - start, 3)
+        return record
+
+    async def chat_stream(self, message: str, model: str = "M2-her",
+                          system_prompt: str = None, user_system: str = None,
+                          group: str = None, sample_user: str = None, sample_ai: str = None,
+                          temperature: float = 1.0, max_tokens: int = 1024,
+                          use_anthropic_api: bool = False, show_thinking: bool = False,
+                          history: list = None):
+        """流式智能对话（异步生成器，产出同 MiniMaxClient.chat_stream）"""
+        base_url, endpoint, data = self._build_chat_request(
+            message, model, system_prompt, user_system, group, sample_user, sample_ai,
+            temperature, max_tokens, True, use_anthropic_api, history)
+
+        received = False
+        async for event in self._request_stream("POST", endpoint, base_url=base_url, json=data):
+            for kind, delta in self._parse_chat_stream_event(event, use_anthropic_api,
+                                                             show_thinking, received):
+                received = True
+                yield kind, delta
+
+    async def image(self, prompt: str, model: str = "image-01", n: int = 1,
+                    aspect_ratio: str = "1:1", width: int = None, height: int = None,
+                    seed: int = None, response_format: str = "url",
+                    prompt_optimizer: bool = False, aigc_watermark: bool = False,
+                    style_type: str = None, style_weight: float = 0.8,
+                    reference_image: str = None) -> list:
+        """图像生成（参数同 MiniMaxClient.image）"""
+        data = self._build_image_request(prompt, model, n, aspect_ratio, width, height, seed,
+                                         response_format, prompt_optimizer, aigc_watermark,
+                                         style_type, style_weight, reference_image)
+        response = await self._request("POST", "image_generation", json=data)
+        return self._parse_image_response(response, response_format, reference_image)
+
+    async def video(self, prompt: str, model: str = "MiniMax-Hailuo-2.3", duration: int = 6,
+                    resolution: str = None, prompt_optimizer: bool = True,
+                    fast_pretreatment: bool = False, aigc_watermark: bool = False,
+                    callback_url: str = None) -> str:
+        """文生视频（参数同 MiniMaxClient.video）"""
+        data = self._build_video_request(prompt, model, duration, resolution, prompt_optimizer,
+                                         fast_pretreatment, aigc_watermark, callback_url)
+        response = await self._request("POST", "video_generation", json=data)
+        return self._parse_task_id(response, "视频任务ID")
+
+    async def video_with_camera_control(self, prompt: str, camera_sequence: list = None,
+                                        **kwargs) -> str:
+        """带镜头控制的视频生成（参数同 MiniMaxClient.video_with_camera_control）"""
+        return await self.video(self._apply_camera_sequence(prompt, camera_sequence), **kwargs)
+
+    async def image_to_video(self, first_frame_image: str, prompt: str = "",
+                             model: str = "I2V-01", duration: int = 6,
+                             resolution: str = None, prompt_optimizer: bool = True,
+                             fast_pretreatment: bool = False, aigc_watermark: bool = False,
+                             callback_url: str = None) -> str:
+        """图生视频（参数同 MiniMaxClient.image_to_video）"""
+        data = self._build_image_to_video_request(first_frame_image, prompt, model, duration, resolution,
+                                                  prompt_optimizer, fast_pretreatment, aigc_watermark,
+                                                  callback_url)
+        response = await self._request("POST", "video_generation", json=data)
+        return self._parse_task_id(response, "图生视频任务ID")
+
+    async def start_end_to_video(self, first_frame_image: str, last_frame_image: str,
+                                 prompt: str = "", duration: int = 6,
+                                 resolution: str = None, prompt_optimizer: bool = True,
+                                 aigc_watermark: bool = False,
+                                 callback_url: str = None) -> str:
+        """首尾帧生成视频（参数同 MiniMaxClient.start_end_to_video）"""
+        data = self._build_start_end_request(first_frame_image, last_frame_image, prompt, duration,
+                                             resolution, prompt_optimizer, aigc_watermark, callback_url)
+        response = await self._request("POST", "video_generation", json=data)
+        task_id = self._parse_task_id(response, "首尾帧视频任务ID")
+
+        self._log(f"📐 分辨率: {data['resolution']}")
+        self._log(f"⏱️ 时长: {duration}秒")
+        self._log(f"🖼️ 首尾帧尺寸将根据首帧自动调整")
+
+        return task_id
+
+    async def video_advanced(self, *args, **kwargs) -> str:
+        """高级视频生成（参数同 MiniMaxClient.video_advanced）"""
+        # 父类方法只做模式分发，返回的是本类异步方法的协程
+        return await super().video_advanced(*args, **kwargs)
+
+    async def subject_reference_to_video(self, subject_image: str, prompt: str,
+                                         prompt_optimizer: bool = True,
+                                         aigc_watermark: bool = False,
+                                         callback_url: str = None) -> str:
+        """主体参考视频生成（参数同 MiniMaxClient.subject_reference_to_video）"""
+        data = self._build_subject_reference_request(subject_image, prompt, prompt_optimizer,
+                                                     aigc_watermark, callback_url)
+        response = await self._request("POST", "video_generation", json=data)
+        task_id = response.get("task_id", "")
+        self._log(f"✅ 主体参考视频生成任务已提交，任务ID: {task_id}")
+        return task_id
+
+    async def video_status(self, task_id: str) -> Dict[str, Any]:
+        """查询视频生成状态"""
+        return await self._request("GET", f"query/video_generation?task_id={task_id}")
+
+    async def download_video(self, file_id: str, filename: str = None) -> str:
+        """下载视频文件（参数同 MiniMaxClient.download_video）"""
+        self._log(f"📥 开始下载视频...")
+        file_response = await self._request("GET", f"files/retrieve?file_id={file_id}")
+        download_url, filepath = self._prepare_video_download(file_id, file_response, filename)
+        await self._download(download_url, filepath, file_response['file'].get('bytes'))
+        self._log(f"✅ 下载完成: {filepath}")
+        return str(filepath)
+
+    async def wait_for_video(self, task_ids, download: bool = True, timeout: float = 1800,
+                             min_interval: float = 5, max_interval: float = 60,
+                             download_workers: int = 4, on_update=None) -> Dict[str, Dict[str, Any]]:
+        """等待一个或多个视频任务完成（参数同 MiniMaxClient.wait_for_video）"""
+        if isinstance(task_ids, str):
+            task_ids = [task_ids]
+        results = {task_id: {"status": "Pending"} for task_id in task_ids}
+        intervals = {task_id: min_interval for task_id in task_ids}
+        next_poll = {task_id: 0.0 for task_id in task_ids}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        semaphore = asyncio.Semaphore(download_workers)
+        downloads = {}
+
+        async def download_one(file_id):
+            async with semaphore:
+                return await self.download_video(file_id)
+
+        async def poll_one(task_id):
+            try:
+                return task_id, await self.video_status(task_id)
+            except Exception as e:
+                self._log(f"⚠️ 查询任务{task_id}失败: {e}", "WARN")
+                return task_id, {}
+
+        self._log(f"⏳ 等待{len(task_ids)}个视频任务完成...")
+        while next_poll and loop.time() < deadline:
+            now = loop.time()
+            due = [t for t, when in next_poll.items() if when <= now]
+            for task_id, status in await asyncio.gather(*(poll_one(t) for t in due)):
+                state = self._update_video_wait(task_id, status, results, intervals,
+                                                max_interval, on_update)
+                if state in ("Success", "Fail"):
+                    del next_poll[task_id]
+                    if state == "Success" and download:
+                        downloads[task_id] = asyncio.ensure_future(
+                            download_one(results[task_id]["file_id"]))
+                else:
+                    next_poll[task_id] = loop.time() + intervals[task_id]
+
+            if next_poll:
+                wake = min(min(next_poll.values()), deadline)
+                await asyncio.sleep(max(0, wake - loop.time()))
+
+        for task_id, task in downloads.items():
+            try:
+                results[task_id]["filepath"] = await task
+            except Exception as e:
+                results[task_id]["error"] = f"下载失败: {e}"
+
+        return self._finish_video_wait(results, next_poll)
+
+    async def music(self, prompt: str = None, lyrics: str = None, stream: bool = False,
+                    output_format: str = "hex", sample_rate: int = 44100,
+                    bitrate: int = 256000, format: str = "mp3",
+                    aigc_watermark: bool = False, model: str = "music-2.5") -> str:
+        """音乐生成（参数同 MiniMaxClient.music）"""
+        data = self._build_music_request(prompt, lyrics, stream, output_format, sample_rate,
+                                         bitrate, format, aigc_watermark, model)
+        response = await self._request("POST", "music_generation", json=data)
+        return self._parse_music_response(response)
+
+    async def upload_file(self, file_path: str, purpose: str) -> Dict[str, Any]:
+        """上传文件到MiniMax平台（参数同 MiniMaxClient.upload_file）"""
+        import aiohttp
+
+        self._log(f"📤 开始上传文件: {file_path}")
+        file_size, file_ext = self._validate_upload(file_path, purpose)
+        self._log(f"📋 文件用途: {purpose}")
+        self._log(f"📊 文件大小: {file_size/1024:.1f} KB")
+        self._log(f"📄 文件格式: {file_ext}")
+
+        session = await self._get_session()
+        with open(file_path, 'rb') as f:
+            form = aiohttp.FormData()
+            form.add_field('purpose', purpose)
+            form.add_field('file', f, filename=Path(file_path).name,
+                           content_type='application/octet-stream')
+            try:
+                async with session.post(self._build_url("files/upload"),
+                                        headers=self._headers(content_type=None),
+                                        data=form) as response:
+                    response.raise_for_status()
+                    result = await response.json(content_type=None)
+                return self._parse_upload_response(result)
+            except asyncio.TimeoutError:
+                raise Exception("文件上传超时，请检查网络连接")
+            except Exception as e:
+                raise Exception(f"文件上传失败: {str(e)}")
+
+    async def list_files(self, purpose: str) -> Dict[str, Any]:
+        """列出文件列表（参数同 MiniMaxClient.list_files）"""
+        try:
+            self._validate_purpose(purpose, ["voice_clone", "prompt_audio", "t2a_async_input"])
+            return await self._request('GET', '/files/list', params={'purpose': purpose})
+        except Exception as e:
+            return {'error': str(e)}
+
+    async def retrieve_file(self, file_id: str) -> Dict[str, Any]:
+        """检索文件信息"""
+        try:
+            return await self._request('GET', '/files/retrieve', params={'file_id': file_id})
+        except Exception as e:
+            return {'error': str(e)}
+
+    async def download_file(self, file_id: str, save_path: str = None) -> str:
+        """下载文件（参数同 MiniMaxClient.download_file）"""
+        try:
+            file_info = await self.retrieve_file(file_id)
+            if 'error' in file_info:
+                raise Exception(f"获取文件信息失败: {file_info['error']}")
+
+            file_data = file_info.get('file', {})
+            filename = file_data.get('filename', f'file_{file_id}')
+            self._log(f"📥 开始下载文件: {filename}")
+
+            save_path = self._resolve_save_path(filename, save_path)
+            await self._download(self._build_url("files/retrieve_content"), save_path,
+                                 file_data.get('bytes'),
+                                 headers=self._headers(content_type=None),
+                                 params={'file_id': file_id})
+
+            file_size = save_path.stat().st_size
+            self._log(f"✅ 文件下载成功: {save_path}")
+            self._log(f"📊 文件大小: {file_size/1024/1024:.2f} MB")
+            return str(save_path)
+
+        except Exception as e:
+            error_msg = f"文件下载失败: {str(e)}"
+            self._log(error_msg)
+            return error_msg
+
+    async def delete_file(self, file_id: str, purpose: str) -> Dict[str, Any]:
+        """删除文件（参数同 MiniMaxClient.delete_file）"""
+        try:
+            self._validate_purpose(purpose, ["voice_clone", "prompt_audio", "t2a_async",
+                                             "t2a_async_input", "video_generation"])
+            self._log(f"🗑️  开始删除文件: {file_id}")
+            result = await self._request('POST', '/files/delete',
+                                         json={'file_id': file_id, 'purpose': purpose})
+            return self._parse_delete_response(result, file_id)
+        except Exception as e:
+            error_msg = f"文件删除失败: {str(e)}"
+            self._log(error_msg)
+            return {'error': error_msg}
+
+    async def tts(self, text: str, voice_id: str = "female-chengshu", emotion: str = None,
+                  model: str = "speech-2.8-hd",
+                  speed: float = 1.0, vol: float = 1.0, pitch: int = 0,
+                  sample_rate: int = 32000, format: str = "mp3", bitrate: int = 128000,
+                  channel: int = 1, stream: bool = False, language_boost: str = None,
+                  subtitle_enable: bool = False, output_format: str = "hex",
+                  text_normalization: bool = False, latex_read: bool = False,
+                  force_cbr: bool = False, continuous_sound: bool = False,
+                  voice_modify: dict = None, aigc_watermark: bool = False) -> str:
+        """文本转语音（参数同 MiniMaxClient.tts）"""
+        if self._should_use_tts_long(text, format, stream, subtitle_enable, output_format):
+            return await self.tts_long(text, voice_id, emotion=emotion, model=model, speed=speed, vol=vol,
+                                       pitch=pitch, sample_rate=sample_rate, format=format, bitrate=bitrate,
+                                       channel=channel, language_boost=language_boost,
+                                       text_normalization=text_normalization, latex_read=latex_read,
+                                       continuous_sound=continuous_sound, voice_modify=voice_modify,
+                                       aigc_watermark=aigc_watermark)
+
+        data = self._build_tts_request(text, voice_id, emotion, model, speed, vol, pitch,
+                                       sample_rate, format, bitrate, channel, stream,
+                                       language_boost, subtitle_enable, output_format,
+                                       text_normalization, latex_read, force_cbr,
+                                       continuous_sound, voice_modify, aigc_watermark)
+        if stream:
+            return b"".join([chunk async for chunk in self._iter_tts_stream(data)]).hex()
+
+        cache_key = self._tts_cache_key(data)
+        cached = self._read_tts_cache(cache_key)
+        if cached is not None:
+            return cached.hex()
+        response = await self._request("POST", "t2a_v2", json=data)
+        audio = self._parse_tts_response(response, stream)
+        self._write_tts_cache(cache_key, audio, response.get('extra_info'))
+        return audio
+
+    async def _iter_tts_stream(self, data: dict):
+        """流式语音合成，逐块产出解码后的音频字节（命中缓存时一次产出完整音频）"""
+        cache_key = self._tts_cache_key(data)
+        cached = self._read_tts_cache(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = 0
+        received = []  # 启用缓存时暂存音频块，完整接收后写入缓存
+        extra_info = None
+        async for event in self._request_stream("POST", "t2a_v2", json=data):
+            extra_info = event.get('extra_info') or extra_info
+            audio = self._parse_tts_stream_event(event)
+            if audio:
+                chunks += 1
+                if cache_key:
+                    received.append(audio)
+                yield audio
+        self._log(f"📡 流式语音合成完成，共{chunks}个音频块")
+        self._write_tts_cache(cache_key, b"".join(received), extra_info)
+
+    async def tts_long(self, text: str, voice_id: str = "female-chengshu", max_chars: int = 3000,
+                       workers: int = 8, **kwargs) -> str:
+        """长文本语音合成（参数同 MiniMaxClient.tts_long）"""
+        chunks, format = self._prepare_tts_long(text, max_chars, kwargs)
+        semaphore = asyncio.Semaphore(max(1, workers))
+
+        async def synthesize(chunk: str) -> bytes:
+            async with semaphore:
+                return bytes.fromhex(await self.tts(chunk, voice_id, **kwargs))
+
+        audios = await asyncio.gather(*(synthesize(chunk) for chunk in chunks))
+        return self._finish_tts_long(audios, format)
+
+    async def tts_advanced(self, text: str, voice_id: str = "female-chengshu",
+                           pronunciation_dict: dict = None,
+                           timber_weights: list = None,
+                           voice_modify: dict = None,
+                           aigc_watermark: bool = False,
+                           text_normalization: bool = False,
+                           latex_read: bool = False) -> str:
+        """高级文本转语音（参数同 MiniMaxClient.tts_advanced）"""
+        data = self._build_tts_advanced_request(text, voice_id, pronunciation_dict, timber_weights,
+                                                voice_modify, aigc_watermark, text_normalization,
+                                                latex_read)
+        response = await self._request("POST", "t2a_v2", json=data)
+        return self._parse_tts_advanced_response(response, data)
+
+    async def tts_stream(self, text: str, voice_id: str = "female-chengshu",
+                         callback_func=None, output_path: str = None, **kwargs) -> str:
+        """流式文本转语音（参数同 MiniMaxClient.tts_stream，callback_func 可为协程函数）"""
+        self._log("📡 开始流式语音合成...")
+        data = self._build_tts_stream_request(text, voice_id, kwargs)
+
+        chunks = []
+        with (open(output_path, 'wb') if output_path else nullcontext()) as f:
+            async for chunk in self._iter_tts_stream(data):
+                if f:
+                    f.write(chunk)
+                    f.flush()
+                else:
+                    chunks.append(chunk)
+                if callback_func:
+                    result = callback_func(chunk)
+                    if asyncio.iscoroutine(result):
+                        await result
+
+        return str(output_path) if output_path else b"".join(chunks).hex()
+
+    async def list_voices(self, voice_type: str = "all") -> Dict[str, Any]:
+        """查询可用音色列表"""
+        self._log("🔍 查询可用音色列表...")
+        cached = self._read_voice_cache(voice_type)
+        if cached is not None:
+            return cached
+
+        url, data = self._build_list_voices_request(voice_type)
+        try:
+            session = await self._get_session()
+            async with session.post(url, headers=self._headers(), json=data) as response:
+                response.raise_for_status()
+                result = await response.json(content_type=None)
+            self._write_voice_cache(voice_type, result)
+            return result
+        except Exception as e:
+            return self._fallback_voice_cache(e)
+
+    async def voice_clone(self, file_id: int, voice_id: str,
+                          prompt_audio: int = None, prompt_text: str = None,
+                          text: str = None, model: str = "speech-2.8-hd",
+                          language_boost: str = None,
+                          need_noise_reduction: bool = False,
+                          need_volume_normalization: bool = False,
+                          aigc_watermark: bool = False,
+                          continuous_sound: bool = False) -> Dict[str, Any]:
+        """音色快速复刻（参数同 MiniMaxClient.voice_clone）"""
+        data = self._build_voice_clone_request(file_id, voice_id, prompt_audio, prompt_text, text,
+                                               model, language_boost, need_noise_reduction,
+                                               need_volume_normalization, aigc_watermark,
+                                               continuous_sound)
+        response = await self._request("POST", "voice_clone", json=data)
+        return self._parse_voice_clone_response(response)
+
+    async def voice_design(self, prompt: str, preview_text: str,
+                           voice_id: str = None, aigc_watermark: bool = False) -> Dict[str, Any]:
+        """音色设计（参数同 MiniMaxClient.voice_design）"""
+        data = self._build_voice_design_request(prompt, preview_text, voice_id, aigc_watermark)
+        response = await self._request("POST", "voice_design", json=data)
+        return self._parse_voice_design_response(response)
+
+class VideoCallbackServer:
+    """视频任务回调接收服务
+
+    配合视频生成接口的 callback_url 使用：MiniMax 在配置回调地址时发送
+    {"challenge": "..."} 验证请求（需原样返回），之后推送任务状态
+    {"task_id", "status", "file_id", ...}。收到成功状态后在后台线程下载视频。
+
+    默认只监听 127.0.0.1（由反向代理/隧道把公网回调转发到本地端口），且只处理通过
+    register()/wait_for() 登记过的任务；指定 token 时只接受路径为 /<token> 的请求。
+    accept_unregistered=True 时处理所有任务的推送，此时应同时设置 token。
+
+    用法：
+        with VideoCallbackServer(client, port=8765) as server:
+            task_id = client.video("...", callback_url="https://公网地址/回调")
+            server.register(task_id)
+            results = server.wait_for(task_id)
+    """
+
+    STATUS_MAP = {"success": "Success", "failed": "Fail", "fail": "Fail",
+                  "processing": "Processing", "queueing": "Queueing", "preparing": "Preparing"}
+
+    def __init__(self, client: MiniMaxClient, host: str = "127.0.0.1", port: int = 8765,
+                 download: bool = True, download_workers: int = 4, on_update=None,
+                 token: str = None, accept_unregistered: bool = False):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.download = download
+        self.download_workers = download_workers
+        self.on_update = on_update
+        self.token = token
+        self.accept_unregistered = accept_unregistered
+        self.results = {}
+        self._cond = threading.Condition()
+        self._executor = None
+        self._httpd = None
+        self._thread = None
+
+    def start(self) -> "VideoCallbackServer":
+        """在后台线程启动 HTTP 服务"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                if server.token and self.path.split('?')[0].strip('/') != server.token:
+                    self._reply(403, {"error": "forbidden"})
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except json.JSONDecodeError:
+                    self._reply(400, {"error": "invalid json"})
+                    return
+                self._reply(200, server.handle_callback(payload))
+
+            def _reply(self, code: int, body: dict):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.download_workers)
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        self.client._log(f"📡 回调服务已启动: http://{self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        """停止服务并等待下载完成"""
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def register(self, task_id: str):
+        """登记待完成的任务（回调先于登记到达时保留已收到的状态）"""
+        with self._cond:
+            self.results.setdefault(task_id, {"status": "Pending"})
+
+    def handle_callback(self, payload: dict) -> dict:
+        """处理一次回调请求，返回响应内容"""
+        if 'challenge' in payload:
+            return {"challenge": payload['challenge']}
+
+        task_id = payload.get('task_id')
+        if not task_id:
+            return {"status": "ignored"}
+        raw_status = str(payload.get('status', ''))
+        state = self.STATUS_MAP.get(raw_status.lower(), raw_status)
+
+        with self._cond:
+            if task_id not in self.results and not self.accept_unregistered:
+                return {"status": "ignored"}  # 未登记的任务不处理，避免任意请求触发下载
+            result = self.results.setdefault(task_id, {"status": "Pending"})
+            if result["status"] in ("Success", "Fail"):
+                return {"status": "ok"}  # 重复推送
+            result["status"] = state
+            if payload.get('file_id'):
+                result["file_id"] = payload['file_id']
+            if state == "Fail":
+                base_resp = payload.get('base_resp') or {}
+                result["error"] = base_resp.get('status_msg') or "生成失败"
+            self._cond.notify_all()
+
+        self.client._log(f"📊 回调 任务{task_id}: {state}")
+        if state in ("Success", "Fail"):
+            self.client._track_video_task(task_id, done=True)
+        if self.on_update:
+            self.on_update(task_id, result)
+        if state == "Success" and self.download and result.get("file_id"):
+            if self._executor:
+                self._executor.submit(self._download, task_id, result["file_id"])
+            else:
+                self._download(task_id, result["file_id"])
+        return {"status": "ok"}
+
+    def _download(self, task_id: str, file_id: str):
+        """后台下载成功任务的视频"""
+        try:
+            filepath = self.client.download_video(file_id)
+            update = {"filepath": filepath}
+        except Exception as e:
+            update = {"error": f"下载失败: {e}"}
+        with self._cond:
+            self.results[task_id].update(update)
+            self._cond.notify_all()
+
+    def _is_done(self, task_id: str) -> bool:
+        result = self.results.get(task_id, {})
+        if result.get("status") == "Fail":
+            return True
+        if result.get("status") == "Success":
+            return not (self.download and result.get("file_id")) or "filepath" in result or "error" in result
+        return False
+
+    def wait_for(self, task_ids, timeout: float = None) -> Dict[str, Dict[str, Any]]:
+        """阻塞等待任务完成（含下载），返回格式同 MiniMaxClient.wait_for_video"""
+        if isinstance(task_ids, str):
+            task_ids = [task_ids]
+        for task_id in task_ids:
+            self.register(task_id)
+        with self._cond:
+            self._cond.wait_for(lambda: all(self._is_done(t) for t in task_ids), timeout)
+            results = {t: dict(self.results[t]) for t in task_ids}
+        for task_id, result in results.items():
+            if not self._is_done(task_id):
+                result["status"] = "Timeout"
+        return results
+
+
+class BatchRunner:
+    """批量任务执行器：读取 JSONL 任务清单，在同一进程内按类型限制并发执行
+
+    每行一个任务，kind 为任务类型，其余字段作为对应方法的参数：
+        {"id": "cat", "kind": "image", "prompt": "樱花树下的猫", "aspect_ratio": "16:9"}
+        {"kind": "tts", "text": "你好", "voice_id": "female-chengshu"}
+        {"kind": "video", "prompt": "海浪", "wait": true}
+    可选字段 id（结果标识，缺省为行号）、output（输出文件名）、wait（视频任务等待完成并下载）。
+    """
+
+    KIND_METHODS = {
+        "chat": "chat",
+        "image": "image",
+        "video": "video",
+        "i2v": "image_to_video",
+        "s2v": "subject_reference_to_video",
+        "start_end": "start_end_to_video",
+        "music": "music",
+        "tts": "tts",
+    }
+    VIDEO_KINDS = ("video", "i2v", "s2v", "start_end")
+    DEFAULT_LIMITS = {"chat": 8, "image": 4, "video": 4, "i2v": 4, "s2v": 4,
+                      "start_end": 4, "music": 2, "tts": 8}
+
+    def __init__(self, client: MiniMaxClient, limits: dict = None, max_workers: int = 16):
+        """
+        Args:
+            client: MiniMaxClient 实例
+            limits: 按任务类型覆盖 DEFAULT_LIMITS 的并发数
+            max_workers: 保存产出（下载图片/音频/视频等）的并发数
+        """
+        self.client = client
+        self.limits = {**self.DEFAULT_LIMITS, **(limits or {})}
+        self.max_workers = max_workers
+        self._write_lock = threading.Lock()
+
+    @staticmethod
+    def load(path: str) -> list:
+        """读取 JSONL 任务清单（忽略空行和 # 注释行）"""
+        jobs = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                job = json.loads(line)
+                job.setdefault('id', str(line_no))
+                jobs.append(job)
+        return jobs
+
+    def run(self, jobs: list, results_path: str) -> list:
+        """并发执行任务，每完成一个即写入结果 JSONL（覆盖已有文件），返回按输入顺序排列的结果
+
+        每种任务类型使用独立的线程池（大小为该类型的并发上限），某类任务排满不会占用其他类型的名额；
+        接口调用返回后即释放名额，保存产出在大小为 max_workers 的线程池中进行。
+        需要等待的视频任务提交后由同一个轮询线程一起等待（wait_for_video 的多任务自适应轮询），
+        每个任务结束时再交给保存线程池下载，线程数不随视频数量增长。
+        """
+        results_path = Path(results_path)
+        results_path.parent.mkdir(parents=True, exist_ok=True)
+        self.client._log(f"📦 批量任务: {len(jobs)}个，结果写入 {results_path}")
+
+        kinds = {job.get('kind') for job in jobs if job.get('kind') in self.KIND_METHODS}
+        executors = {kind: ThreadPoolExecutor(max_workers=max(1, self.limits[kind]),
+                                              thread_name_prefix=f"batch-{kind}") for kind in kinds}
+        finishers = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch-save")
+        poller = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-wait")
+        waiting = {}  # task_id -> (占位 Future, 交给 _finish_job 的参数)
+        try:
+            with open(results_path, 'w', encoding='utf-8') as out:
+                def hand_off(args, waited=None) -> Future:
+                    return finishers.submit(self._finish_job, *args, out, waited=waited)
+
+                def call_and_hand_off(job):
+                    # 接口调用完成后交出产出，本类型的线程立即可以处理下一个任务
+                    args = (job,) + self._call_job(job)
+                    result, task_id = args[1], args[2]
+                    if job.get('wait') and job.get('kind') in self.VIDEO_KINDS \
+                            and "status" not in result and task_id:
+                        placeholder = Future()
+                        waiting[task_id] = (placeholder, args)
+                        return placeholder
+                    return hand_off(args)
+
+                futures = [executors.get(job.get('kind'), finishers).submit(call_and_hand_off, job)
+                           for job in jobs]
+                wait_calls = [future for job, future in zip(jobs, futures)
+                              if job.get('wait') and job.get('kind') in self.VIDEO_KINDS]
+                if wait_calls:
+                    poller.submit(self._wait_videos, wait_calls, waiting, hand_off)
+                results = [future.result().result() for future in futures]
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+            poller.shutdown(wait=True)
+            finishers.shutdown(wait=True)
+
+        ok = sum(1 for r in results if r['status'] == 'ok')
+        self.client._log(f"🏁 批量任务完成: 成功{ok}/{len(results)}")
+        return results
+
+    def _wait_videos(self, wait_calls: list, waiting: dict, hand_off):
+        """所有视频任务提交后一起轮询，每个任务结束（成功、失败或超时）时交给保存线程池"""
+        wait_futures(wait_calls)
+        handed = set()
+
+        def finish(task_id: str, waited: dict):
+            if task_id in handed:
+                return
+            handed.add(task_id)
+            placeholder, args = waiting[task_id]
+            future = hand_off(args, dict(waited))
+            future.add_done_callback(lambda f: placeholder.set_exception(f.exception())
+                                     if f.exception() else placeholder.set_result(f.result()))
+
+        def on_update(task_id, result):
+            if result["status"] in ("Success", "Fail"):
+                finish(task_id, result)
+
+        try:
+            if waiting:
+                waited = self.client.wait_for_video(list(waiting), download=False, on_update=on_update)
+                for task_id, result in waited.items():
+                    finish(task_id, result)
+        except Exception as e:
+            for task_id in waiting:
+                finish(task_id, {"status": "Pending", "error": f"等待失败: {e}"})
+
+    def _call_job(self, job: dict) -> tuple:
+        """调用任务对应的接口，返回 (结果记录, 接口返回值, 参数, 开始时间)"""
+        params = {k: v for k, v in job.items() if k not in ('id', 'kind', 'output', 'wait')}
+        kind = job.get('kind')
+        result = {"id": job['id'], "kind": kind,
+                  "started_at": datetime.now().isoformat(timespec='seconds')}
+        start = time.monotonic()
+        output = None
+        try:
+            if kind not in self.KIND_METHODS:
+                raise ValueError(f"未知任务类型: {kind}，可选 {list(self.KIND_METHODS)}")
+            output = getattr(self.client, self.KIND_METHODS[kind])(**params)
+        except SystemExit:  # 部分方法参数校验失败时会 sys.exit
+            result["status"] = "error"
+            result["error"] = "参数校验失败"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = str(e) or type(e).__name__
+        return result, output, params, start
+
+    def _finish_job(self, job: dict, result: dict, output, params: dict, start: float, out,
+                    waited: dict = None) -> dict:
+        """保存任务产出（已等待的视频任务下载视频），写入结果文件"""
+        if "status" not in result:
+            try:
+                result.update(self._save_output(job, job['kind'], output, params, waited))
+                result["status"] = "ok"
+            except Exception as e:
+                result["status"] = "error"
+                result["error"] = str(e) or type(e).__name__
+        result["elapsed"] = round(time.monotonic() - start, 3)
+        with self._write_lock:
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            out.flush()
+        return result
+
+    def _save_output(self, job: dict, kind: str, output, params: dict, waited: dict = None) -> dict:
+        """保存任务产出，返回写入结果记录的字段（waited 为视频任务的等待结果）"""
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        name = job.get('output') or f"{kind}_{job['id']}_{stamp}"
+        base_dir = self.client.base_dir
+
+        if kind == "chat":
+            return {"content": output}
+
+        if kind in self.VIDEO_KINDS:
+            fields = {"task_id": output}
+            if waited:
+                fields.update({k: v for k, v in waited.items() if k != "status"})
+                fields["task_status"] = waited["status"]
+                if waited["status"] == "Success" and waited.get("file_id"):
+                    try:
+                        fields["filepath"] = self.client.download_video(waited["file_id"])
+                    except Exception as e:
+                        fields["error"] = f"下载失败: {e}"
+            return fields
+
+        if kind == "image":
+            paths = []
+            for i, item in enumerate(output or []):
+                filepath = base_dir / "images" / f"{Path(name).stem}_{i+1}.jpg"
+                if item.startswith('http'):
+                    self.client._download(item, filepath)
+                else:
+                    filepath.write_bytes(base64.b64decode(item))
+                paths.append(str(filepath))
+            return {"outputs": paths}
+
+        # music / tts：hex 数据或 URL
+        if not output:
+            raise Exception("接口未返回音频数据")
+        subdir = "music" if kind == "music" else "audio"
+        ext = params.get('format', 'mp3')
+        filepath = base_dir / subdir / (name if Path(name).suffix else f"{name}.{ext}")
+        if output.startswith('http'):
+            self.client._download(output, filepath)
+        else:
+            filepath.write_bytes(bytes.fromhex(output))
+        return {"outputs": [str(filepath)]}
+
+
+class ChatSession:
+    """多轮对话会话：记录历史并持久化到 output/sessions/<name>.json
+
+    每轮把历史作为上下文发送；历史估算 token 数超过 history_budget 时压缩早期轮次，
+    只保留最近 keep_recent 轮原文：summarize=True 时先调用模型把早期轮次合并进摘要
+    （失败时退化为截断），否则直接丢弃。摘要以一组前置对话的形式放在历史开头。
+
+    用法:
+        session = ChatSession(client, "roleplay", model="M2-her", system_prompt="你是...")
+        print(session.send("你好"))
+    """
+
+    SUMMARY_PROMPT = ("你是对话摘要助手。请把给出的对话记录（以及已有摘要）压缩成一段简洁的摘要，"
+                      "保留人物设定、关键事实、约定和未完成的话题，只输出摘要本身。")
+
+    def __init__(self, client: MiniMaxClient, name: str = None, history_budget: int = 6000,
+                 keep_recent: int = 4, summarize: bool = True, summary_model: str = "MiniMax-M2.1",
+                 **chat_kwargs):
+        """
+        Args:
+            client: MiniMaxClient 实例
+            name: 会话名，指定后历史保存到 output/sessions/<name>.json，None 表示只在内存中保留
+            history_budget: 历史消息的估算 token 上限（按字符数估算）
+            keep_recent: 压缩时保留原文的最近轮数
+            summarize: 压缩时是否调用模型生成摘要（否则直接截断）
+            summary_model: 生成摘要使用的模型
+            **chat_kwargs: 每轮传给 client.chat 的参数（model, system_prompt, temperature 等）
+        """
+        self.client = client
+        self.name = name
+        self.history_budget = history_budget
+        self.keep_recent = max(1, keep_recent)
+        self.summarize = summarize
+        self.summary_model = summary_model
+        self.chat_kwargs = chat_kwargs
+        self.path = None
+        if name:
+            safe_name = re.sub(r'[^\w\-]', '_', name)
+            self.path = client.base_dir / 'sessions' / f"{safe_name}.json"
+        self.summary = ""
+        self.messages = []
+        self._load()
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            self.client._log(f"⚠️ 会话文件读取失败，将新建会话: {e}", "WARN")
+            return
+        self.summary = state.get('summary', '')
+        self.messages = state.get('messages', [])
+        self.client._log(f"💬 已加载会话 {self.name}: {len(self.messages) // 2}轮历史"
+                         f"{'（含摘要）' if self.summary else ''}")
+
+    def save(self):
+        """保存会话到磁盘（未指定会话名时不保存）"""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        state = {"name": self.name, "summary": self.summary, "messages": self.messages,
+                 "updated_at": datetime.now().isoformat(timespec='seconds')}
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        """清空历史和摘要"""
+        self.summary = ""
+        self.messages = []
+        self.save()
+
+    def history(self) -> list:
+        """本轮要发送的历史：摘要（如有）+ 最近的对话原文"""
+        prefix = []
+        if self.summary:
+            prefix = [{"role": "user", "content": f"以下是我们之前对话的摘要：\n{self.summary}"},
+                      {"role": "assistant", "content": "好的，我记得这些内容，我们继续。"}]
+        return prefix + self.messages
+
+    def send(self, message: str, **overrides):
+        """发送一轮消息并记录历史，返回值同 client.chat"""
+        self._compact()
+        kwargs = {**self.chat_kwargs, **overrides}
+        response = self.client.chat(message, history=self.history(), **kwargs)
+        content = response.get('content', '') if isinstance(response, dict) else response
+        self._append(message, content)
+        return response
+
+    def stream(self, message: str, **overrides):
+        """流式发送一轮消息，产出同 client.chat_stream，接收完成后记录历史"""
+        self._compact()
+        kwargs = {**self.chat_kwargs, **overrides}
+        kwargs.pop('stream', None)
+        parts = []
+        for kind, delta in self.client.chat_stream(message, history=self.history(), **kwargs):
+            if kind == "text":
+                parts.append(delta)
+            yield kind, delta
+        self._append(message, "".join(parts))
+
+    def _append(self, message: str, content: str):
+        self.messages.append({"role": "user", "content": message})
+        self.messages.append({"role": "assistant", "content": content})
+        self.save()
+
+    @staticmethod
+    def _estimate_tokens(messages: list) -> int:
+        return sum(len(str(m.get('content', ''))) for m in messages)
+
+    def _compact(self):
+        """历史超出预算时压缩早期轮次"""
+        if self._estimate_tokens(self.history()) <= self.history_budget:
+            return
+        keep = self.keep_recent * 2
+        old, recent = self.messages[:-keep], self.messages[-keep:]
+        if old:
+            if self.summarize:
+                try:
+                    self.summary = self._summarize(old)
+                    self.client._log(f"🗜️ 已将{len(old) // 2}轮早期对话压缩为摘要")
+                except MiniMaxError as e:
+                    self.client._log(f"⚠️ 摘要生成失败，直接截断早期对话: {e}", "WARN")
+            else:
+                self.client._log(f"🗜️ 已截断{len(old) // 2}轮早期对话")
+            self.messages = recent
+        # 最近几轮本身仍超预算时，从最早的轮次开始丢弃（至少保留最近一轮）
+        while len(self.messages) > 2 and self._estimate_tokens(self.history()) > self.history_budget:
+            self.messages = self.messages[2:]
+        self.save()
+
+    def _summarize(self, old_messages: list) -> str:
+        """调用模型把已有摘要和早期对话合并为新摘要"""
+        transcript = "\n".join(f"{'用户' if m['role'] == 'user' else 'AI'}: {m['content']}"
+                               for m in old_messages)
+        if self.summary:
+            transcript = f"已有摘要：{self.summary}\n\n对话记录：\n{transcript}"
+        summary = self.client.chat(transcript, model=self.summary_model,
+                                   system_prompt=self.SUMMARY_PROMPT, temperature=0.3,
+                                   max_tokens=1024)
+        return summary.strip()
+
+
+def load_chat_prompts(path: str):
+    """逐行读取批量对话的提示词（忽略空行）：.jsonl 文件每行为字典，其余文件每行为一条提示词"""
+    is_jsonl = str(path).endswith('.jsonl')
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line) if is_jsonl else line
+
+
 class FileManager:
     """文件管理"""
     
@@ -1950,7 +5375,47 @@ class FileManager:
         except (subprocess.CalledProcessError, FileNotFoundError):
             print(f"📁 音频已保存，请手动播放: {filepath}")
 
+    def open_stream_player(self, format: str = "mp3", sample_rate: int = 32000, channel: int = 1):
+        """启动从标准输入读取音频的播放器进程（ffplay 或 mpg123），不可用时返回 None"""
+        import shutil
+        import subprocess
+
+        if shutil.which("ffplay"):
+            cmd = ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"]
+            if format == "pcm":
+                cmd += ["-f", "s16le", "-ar", str(sample_rate), "-ac", str(channel)]
+            cmd += ["-i", "-"]
+        elif format == "mp3" and shutil.which("mpg123"):
+            cmd = ["mpg123", "-q", "-"]
+        else:
+            print("⚠️ 未找到可流式播放的播放器（ffplay/mpg123），将在完成后播放")
+            return None
+        return subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+def wait_and_report(client: MiniMaxClient, task_id: str, timeout: int,
+                    callback_server: VideoCallbackServer = None):
+    """等待视频任务完成并打印结果（有回调服务时等待推送，否则轮询）"""
+    print(f"⏳ 等待任务完成（最长{timeout}秒）...")
+    if callback_server:
+        result = callback_server.wait_for(task_id, timeout=timeout)[task_id]
+    else:
+        result = client.wait_for_video(task_id, timeout=timeout)[task_id]
+    if result.get("filepath"):
+        print(f"✅ 视频已下载: {result['filepath']}")
+    elif result["status"] == "Timeout":
+        print(f"⏱️ 等待超时，稍后可查询: python minimax_cli.py -s {task_id}")
+    else:
+        print(f"❌ 任务未成功: {result.get('error', result['status'])}")
+
 def main():
+    """命令行入口：接口错误统一输出并以状态码1退出"""
+    try:
+        _run_cli()
+    except MiniMaxError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+def _run_cli():
     """主函数"""
     parser = argparse.ArgumentParser(description='MiniMax AI 工具')
     
@@ -1965,8 +5430,31 @@ def main():
     # ⚙️ 通用选项
     common_group = parser.add_argument_group('通用选项')
     common_group.add_argument('-I', '--interactive', action='store_true', help='交互模式')
-    common_group.add_argument('-V', '--verbose', action='store_true', help='显示详细日志')
+    common_group.add_argument('-V', '--verbose', action='store_true', help='显示详细日志（含请求数据）')
+    common_group.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                              help='日志级别，默认INFO')
+    common_group.add_argument('--log-json', action='store_true', help='日志以每行一个 JSON 的格式输出')
+    common_group.add_argument('--log-file', action='store_true',
+                              help='同时写入日志文件 output/logs/minimax_日期.log')
     common_group.add_argument('-P', '--play', action='store_true', help='生成后自动播放音频')
+    common_group.add_argument('--pool-size', type=int, default=16, help='每个主机的HTTP连接池大小，默认16')
+    common_group.add_argument('--rate-limit', action='append', default=[], metavar='分组:配额',
+                              help='客户端限流配额，可多次指定，如 t2a_v2:rpm=60,concurrency=4 '
+                                   '（分组: chat, t2a_v2, image_generation, video_generation, music_generation）')
+    common_group.add_argument('--no-rate-limit', action='store_true', help='关闭默认的客户端限流')
+    common_group.add_argument('--no-cache', action='store_true', help='不使用语音合成缓存（./cache/tts），强制重新合成')
+    common_group.add_argument('--chat-cache', action='store_true',
+                              help='缓存对话响应（./cache/chat），相同请求直接返回上次结果')
+    common_group.add_argument('--chat-cache-ttl', type=int, default=7 * 86400, metavar='秒',
+                              help='对话缓存有效期（秒），默认7天')
+    common_group.add_argument('--metrics-port', type=int, metavar='端口',
+                              help='在本地端口提供 Prometheus 格式指标（/metrics），适合批量任务、回调服务等长时间运行')
+    common_group.add_argument('--stats', action='store_true',
+                              help='退出时输出接口调用统计（耗时、首字节时间、流量、token/字符用量、重试）')
+    common_group.add_argument('--batch', metavar='任务文件', help='批量执行 JSONL 任务清单（chat/image/video/i2v/s2v/start_end/music/tts）')
+    common_group.add_argument('--batch-output', metavar='结果文件', help='批量结果 JSONL 路径，默认 output/batch/results_时间戳.jsonl')
+    common_group.add_argument('--batch-limit', action='append', default=[], metavar='类型=并发数',
+                              help='按任务类型限制并发，可多次指定，如 --batch-limit video=2')
 
     # 🤖 文本生成/对话选项
     chat_group = parser.add_argument_group('文本生成/对话选项')
@@ -1990,6 +5478,14 @@ def main():
                            help='温度参数 (0.0-1.0]，默认1.0')
     chat_group.add_argument('--max-tokens', type=int, default=1024,
                            help='最大生成token数，M2-her上限2048，默认1024')
+    chat_group.add_argument('--chat-file', metavar='提示词文件',
+                            help='批量对话：.txt 每行一条提示词，.jsonl 每行 {"message": ...}，结果按顺序写入 JSONL')
+    chat_group.add_argument('--chat-concurrency', type=int, default=8, help='--chat-file 的并发请求数，默认8')
+    chat_group.add_argument('--chat-output', metavar='结果文件',
+                            help='--chat-file 结果 JSONL 路径，默认 output/batch/chat_时间戳.jsonl')
+    chat_group.add_argument('--session', type=str, metavar='NAME',
+                            help='多轮对话会话名，历史保存在 output/sessions/NAME.json，超出预算时自动压缩')
+    chat_group.add_argument('--session-reset', action='store_true', help='清空 --session 指定会话的历史后再对话')
 
     # 🎨 图像生成选项
     image_group = parser.add_argument_group('图像生成选项')
@@ -2080,7 +5576,7 @@ def main():
                           choices=[32000, 64000, 128000, 256000],
                           help='比特率，默认128000')
     tts_group.add_argument('--channel', type=int, default=1, choices=[1, 2], help='声道数，默认1')
-    tts_group.add_argument('--stream', action='store_true', help='启用流式输出')
+    tts_group.add_argument('--stream', action='store_true', help='启用流式输出（对话逐字输出 / 流式语音合成）')
     tts_group.add_argument('--language-boost', help='语言增强 (Chinese, English, auto等40种语言)')
     tts_group.add_argument('--subtitle', action='store_true', help='启用字幕生成（仅非流式）')
     tts_group.add_argument('--output-format', default='hex', choices=['hex', 'url'],
@@ -2107,6 +5603,9 @@ def main():
     video_group = parser.add_argument_group('视频管理')
     video_group.add_argument('-s', '--video-status', metavar='任务ID', help='查询视频状态（传入task_id）')
     video_group.add_argument('-d', '--download-video', metavar='文件ID', help='下载视频文件（传入file_id）')
+    video_group.add_argument('--wait', action='store_true',
+                            help='提交视频任务（或配合 -s 查询）后等待完成并自动下载')
+    video_group.add_argument('--wait-timeout', type=int, default=1800, help='--wait 最长等待秒数，默认1800')
 
     # 🎬 视频生成选项
     video_gen_group = parser.add_argument_group('视频生成选项')
@@ -2156,6 +5655,13 @@ def main():
     video_adv_group.add_argument('--fast-preprocessing', action='store_true', help='启用快速预处理（仅Hailuo模型）')
     video_adv_group.add_argument('--video-watermark', action='store_true', help='添加视频水印')
     video_adv_group.add_argument('--callback-url', help='任务状态回调URL')
+    video_adv_group.add_argument('--callback-listen', type=int, metavar='端口',
+                                help='启动本地回调接收服务（配合 --callback-url 转发到该端口），收到成功回调后自动下载')
+    video_adv_group.add_argument('--callback-host', default='127.0.0.1',
+                                help='回调服务监听地址，默认127.0.0.1（需直接对外暴露时用0.0.0.0，并设置 --callback-token）')
+    video_adv_group.add_argument('--callback-token', metavar='TOKEN',
+                                help='回调服务只接受路径为 /TOKEN 的请求（--callback-url 末尾需带上该路径）；'
+                                     '单独运行回调服务时必填')
     video_adv_group.add_argument('--camera-sequence', help='镜头序列JSON，如[{"action":"推进","timing":"开始"}]')
 
     # 📁 文件管理
@@ -2174,15 +5680,67 @@ def main():
                            help='删除文件时指定的用途（必填）')
     
     args = parser.parse_args()
+
+    setup_logging("DEBUG" if args.verbose else args.log_level, json_format=args.log_json,
+                  log_file=f"output/logs/minimax_{datetime.now().strftime('%Y%m%d')}.log" if args.log_file else None)
     
-    client = MiniMaxClient()
+    rate_limiter = RateLimiter(RateLimiter.parse_spec(args.rate_limit), use_defaults=not args.no_rate_limit)
+    client = MiniMaxClient(pool_maxsize=args.pool_size, rate_limiter=rate_limiter,
+                           tts_cache=not args.no_cache, chat_cache=args.chat_cache,
+                           chat_cache_ttl=args.chat_cache_ttl,
+                           metrics=MetricsRegistry().serve(args.metrics_port) if args.metrics_port else None)
     file_mgr = FileManager()
     
-    if args.verbose:
-        client.verbose = True
+    if args.stats:
+        atexit.register(lambda: print(client.stats.format_summary()))
+
+    callback_server = None
+    if args.callback_listen:
+        # 单独运行回调服务时接收所有任务的推送，必须用 token 限制来源
+        listen_only = not any([args.video, args.image_to_video, args.subject_reference, args.start_end])
+        if listen_only and not args.callback_token:
+            parser.error("单独运行回调服务（--callback-listen）时需要 --callback-token")
+        callback_server = VideoCallbackServer(client, host=args.callback_host, port=args.callback_listen,
+                                              token=args.callback_token,
+                                              accept_unregistered=listen_only).start()
+    # 未设置 --callback-url 时服务端不会推送，等待任务改为轮询
+    wait_server = callback_server if args.callback_url else None
+    if callback_server and not wait_server and not callback_server.accept_unregistered:
+        print("⚠️ 未指定 --callback-url，不会收到推送，改为轮询等待任务完成")
     
-    if args.interactive:
+    if args.batch:
+        limits = {}
+        for item in args.batch_limit:
+            kind, _, value = item.partition('=')
+            limits[kind.strip()] = int(value)
+        runner = BatchRunner(client, limits=limits, max_workers=args.pool_size)
+        results_path = args.batch_output or (
+            client.base_dir / "batch" / f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        results = runner.run(BatchRunner.load(args.batch), results_path)
+        failed = [r for r in results if r['status'] != 'ok']
+        print(f"✅ 批量任务完成: 成功{len(results) - len(failed)}/{len(results)}")
+        for r in failed:
+            print(f"❌ [{r['id']}] {r['kind']}: {r['error']}")
+        print(f"📄 结果文件: {results_path}")
+    elif args.chat_file:
+        results_path = args.chat_output or (
+            client.base_dir / "batch" / f"chat_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        records = client.chat_many(
+            load_chat_prompts(args.chat_file), concurrency=args.chat_concurrency,
+            results_path=results_path, model=args.chat_model, system_prompt=args.system_prompt,
+            user_system=args.user_system, group=args.group, sample_user=args.sample_user,
+            sample_ai=args.sample_ai, temperature=args.temperature, max_tokens=args.max_tokens,
+            use_anthropic_api=args.anthropic_api)
+        failed = [r for r in records if r['status'] != 'ok']
+        print(f"✅ 批量对话完成: 成功{len(records) - len(failed)}/{len(records)}")
+        for r in failed[:20]:
+            print(f"❌ [{r['id']}] {r['error']}")
+        print(f"📄 结果文件: {results_path}")
+    elif args.interactive:
         print("💬 MiniMax AI 交互模式 (输入 'quit' 退出)")
+        # 交互模式的对话在各轮之间保留上下文（指定 --session 时同时保存到磁盘）
+        chat_session = ChatSession(client, args.session, model=args.chat_model,
+                                   system_prompt=args.system_prompt)
         while True:
             try:
                 cmd = input("\n选择功能 [chat/image/video/music/tts/quit]: ").strip()
@@ -2190,7 +5748,7 @@ def main():
                     break
                 elif cmd == 'chat':
                     message = input("消息: ")
-                    print(client.chat(message))
+                    print(chat_session.send(message))
                 elif cmd == 'image':
                     prompt = input("描述: ")
                     urls = client.image(prompt)
@@ -2245,8 +5803,7 @@ def main():
             with open(content, 'r', encoding='utf-8') as f:
                 content = f.read()
 
-        # 调用更新后的 chat 方法
-        response = client.chat(
+        chat_kwargs = dict(
             message=content,
             model=args.chat_model,
             system_prompt=args.system_prompt,
@@ -2260,6 +5817,27 @@ def main():
             show_thinking=args.show_thinking
         )
 
+        session = None
+        if args.session:
+            session = ChatSession(client, args.session)
+            if args.session_reset:
+                session.reset()
+
+        if args.stream:
+            # 流式输出：收到增量立即打印
+            current_kind = None
+            deltas = session.stream(**chat_kwargs) if session else client.chat_stream(**chat_kwargs)
+            for kind, delta in deltas:
+                if args.show_thinking and kind != current_kind:
+                    print("=== 🧠 思考过程 ===" if kind == "thinking" else "\n=== 📝 回复内容 ===", flush=True)
+                current_kind = kind
+                print(delta, end='', flush=True)
+            print()
+            return
+
+        # 调用更新后的 chat 方法
+        response = session.send(**chat_kwargs) if session else client.chat(**chat_kwargs)
+
         # 显示响应
         if args.show_thinking and isinstance(response, dict):
             print("=== 🧠 思考过程 ===")
@@ -2428,6 +6006,8 @@ def main():
         print(f"🎭 使用模型: {args.video_model}")
         print(f"⏱️  预计3-8分钟完成，可多次查询状态")
         print(f"💡 查询状态: python minimax_cli.py -s {task_id}")
+        if args.wait or callback_server:
+            wait_and_report(client, task_id, args.wait_timeout, wait_server)
     elif args.image_to_video:
         # 图生视频处理
         image_path, prompt = args.image_to_video
@@ -2461,6 +6041,8 @@ def main():
         print(f"📷 图片: {image_path}")
         print(f"⏱️  预计3-8分钟完成，可多次查询状态")
         print(f"💡 查询状态: python minimax_cli.py -s {task_id}")
+        if args.wait or callback_server:
+            wait_and_report(client, task_id, args.wait_timeout, wait_server)
     elif args.subject_reference:
         # 主体参考视频生成处理
         subject_image, prompt = args.subject_reference
@@ -2479,6 +6061,8 @@ def main():
         print(f"👤 主体图片: {subject_image}")
         print(f"📝 视频描述: {prompt}")
         print(f"💡 查询状态: python minimax_cli.py -s {task_id}")
+        if args.wait or callback_server:
+            wait_and_report(client, task_id, args.wait_timeout, wait_server)
     elif args.start_end:
         # 首尾帧生成处理
         start_image, end_image = args.start_end
@@ -2501,6 +6085,8 @@ def main():
         print(f"⏱️  时长: {args.se_duration}秒")
         print(f"📐 分辨率: {args.se_resolution}")
         print(f"💡 查询状态: python minimax_cli.py -s {task_id}")
+        if args.wait or callback_server:
+            wait_and_report(client, task_id, args.wait_timeout, wait_server)
     elif args.music:
         # 处理文件路径或文本内容
         prompt = args.music
@@ -2566,8 +6152,7 @@ def main():
             with open(text, 'r', encoding='utf-8') as f:
                 text = f.read()
 
-        # 使用更新后的TTS参数
-        audio = client.tts(
+        tts_kwargs = dict(
             text=text,
             voice_id=args.voice,
             model=args.tts_model,
@@ -2588,6 +6173,35 @@ def main():
             force_cbr=args.force_cbr
         )
 
+        if args.stream and args.output_format == 'hex':
+            # 流式：边接收边写文件，--play 时同时送入播放器
+            filepath = file_mgr.base_dir / "audio" / f"tts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{args.format}"
+            player = file_mgr.open_stream_player(args.format, args.sample_rate, args.channel) if args.play else None
+
+            def feed_player(chunk: bytes):
+                try:
+                    player.stdin.write(chunk)
+                    player.stdin.flush()
+                except (BrokenPipeError, OSError):
+                    pass
+
+            tts_kwargs.pop('stream')
+            client.tts_stream(callback_func=feed_player if player else None,
+                              output_path=str(filepath), **tts_kwargs)
+            print(filepath)
+            if player:
+                try:
+                    player.stdin.close()
+                except (BrokenPipeError, OSError):
+                    pass
+                player.wait()
+            elif args.play:
+                file_mgr.play_audio(str(filepath))
+            return
+
+        # 使用更新后的TTS参数
+        audio = client.tts(**tts_kwargs)
+
         if audio:
             # 根据格式决定文件扩展名
             ext = args.format
@@ -2599,6 +6213,8 @@ def main():
             print(filepath)
             if args.play:
                 file_mgr.play_audio(filepath)
+    elif args.video_status and args.wait:
+        wait_and_report(client, args.video_status, args.wait_timeout)
     elif args.video_status:
         status = client.video_status(args.video_status)
 
@@ -2879,8 +6495,19 @@ def main():
             else:
                 print("❌ 响应格式异常")
 
+    elif callback_server:
+        # 仅启动回调服务：持续接收推送并下载，Ctrl+C 退出
+        print(f"📡 回调服务监听端口 {callback_server.port}，按 Ctrl+C 退出")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\n👋 回调服务已停止")
     else:
         parser.print_help()
 
+    if callback_server:
+        callback_server.stop()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -8,19 +8,76 @@ MiniMax AI 播客生成器
 - DialogueGenerator: 对话生成器
 - AudioSynthesizer: 音频合成器
 - PodcastEditor: 播客编辑器
+- PodcastWorkspace: 播客工作目录（断点续跑）
 """
 
 import os
 import sys
 import json
+import atexit
 import glob
+import shutil
+import hashlib
 import argparse
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional, Callable, Any
 
 
+class _DialogueStreamParser:
+    """JSON 数组增量解析器：逐段输入模型输出，返回其中新出现的完整对象
+
+    跳过数组前的 Markdown 代码块标记等文本，只跟踪字符串/转义状态和嵌套深度，
+    顶层数组中的对象闭合时才解析，避免对不完整的 JSON 反复尝试。
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0            # 已扫描到的位置
+        self.depth = 0          # 0 表示尚未进入顶层数组
+        self.in_string = False
+        self.escape = False
+        self.obj_start = None   # 当前顶层对象的起始位置
+
+    def feed(self, text: str) -> List[Dict]:
+        self.buffer += text
+        items = []
+        for i in range(self.pos, len(self.buffer)):
+            ch = self.buffer[i]
+            if self.depth == 0:
+                if ch == '[':
+                    self.depth = 1
+                continue
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                if self.depth == 1 and ch == '{':
+                    self.obj_start = i
+                self.depth += 1
+            elif ch in '}]':
+                self.depth -= 1
+                if self.depth == 1 and ch == '}' and self.obj_start is not None:
+                    try:
+                        item = json.loads(self.buffer[self.obj_start:i + 1])
+                    except ValueError:
+                        item = None
+                    if isinstance(item, dict):
+                        items.append(item)
+                    self.obj_start = None
+        self.pos = len(self.buffer)
+        return items
+
+
 class DialogueGenerator:
     """对话生成器 - 根据主题生成对话或直接读取JSON"""
 
@@ -38,6 +95,54 @@ class DialogueGenerator:
         Returns:
             对话列表，每项包含 speaker, text, voice_id, emotion
         """
+        data = self._build_request(topic)
+
+        response = self.client._request("POST", "text/chatcompletion_v2", json=data)
+        content = response['choices'][0]['message']['content']
+
+        # 解析JSON
+        dialogues = self._parse_json(content)
+
+        # 保存JSON
+        if output_path:
+            self._save(dialogues, output_path)
+
+        return dialogues
+
+    def generate_stream(self, topic: str, output_path: str = None):
+        """流式生成对话：边接收模型输出边解析，每段对话完整时立即产出
+
+        Args:
+            topic: 播客主题描述
+            output_path: 可选的JSON保存路径（全部生成后保存）
+
+        Yields:
+            对话字典（speaker, text, voice_id, emotion），顺序与最终 JSON 一致
+        """
+        data = self._build_request(topic)
+        data["stream"] = True
+
+        parser = _DialogueStreamParser()
+        chunks, dialogues = [], []
+        received = False
+        for event in self.client._request_stream("POST", "text/chatcompletion_v2", json=data):
+            for kind, delta in self.client._parse_chat_stream_event(event, received=received):
+                received = True
+                chunks.append(delta)
+                for dialogue in parser.feed(delta):
+                    dialogues.append(dialogue)
+                    yield dialogue
+
+        # 输出不是可增量解析的数组（如整体被转义成字符串）时，按完整内容解析
+        if not dialogues:
+            dialogues = self._parse_json("".join(chunks))
+            yield from dialogues
+
+        if output_path:
+            self._save(dialogues, output_path)
+
+    def _build_request(self, topic: str) -> Dict:
+        """构建对话生成请求"""
         # 读取系统提示词
         template_path = self.templates_dir / "podcast_system_prompt.txt"
         if template_path.exists():
@@ -51,25 +156,17 @@ class DialogueGenerator:
             {"role": "user", "content": topic}
         ]
 
-        data = {
+        return {
             "model": "MiniMax-M2.1",
             "messages": messages,
             "max_tokens": 20480,
             "temperature": 0.8
         }
 
-        response = self.client._request("POST", "text/chatcompletion_v2", json=data)
-        content = response['choices'][0]['message']['content']
-
-        # 解析JSON
-        dialogues = self._parse_json(content)
-
-        # 保存JSON
-        if output_path:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(dialogues, f, ensure_ascii=False, indent=2)
-
-        return dialogues
+    def _save(self, dialogues: List[Dict], output_path: str):
+        """保存对话JSON"""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(dialogues, f, ensure_ascii=False, indent=2)
 
     def load(self, json_path: str) -> List[Dict]:
         """直接读取对话JSON文件"""
@@ -102,194 +199,212 @@ class DialogueGenerator:
 class AudioSynthesizer:
     """音频合成器 - 将对话转为音频片段"""
 
-    def __init__(self, client, output_dir: str = "./output/podcasts"):
+    VALID_EMOTIONS = ["happy", "sad", "angry", "fearful", "disgusted", "surprised", "calm"]
+    EMOTION_MAPPING = {
+        "excited": "happy", "joyful": "happy", "delighted": "happy", "cheerful": "happy",
+        "upset": "sad", "depressed": "sad", "disappointed": "sad",
+        "mad": "angry", "furious": "angry", "irritated": "angry",
+        "scared": "fearful", "terrified": "fearful", "anxious": "fearful",
+        "shocked": "surprised", "amazed": "surprised", "startled": "surprised",
+        "neutral": "calm", "thoughtful": "calm", "curious": "surprised"
+    }
+
+    def __init__(self, client, output_dir: str = "./output/podcasts", workers: int = 4):
         self.client = client
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = max(1, workers)
 
     def synthesize(self, dialogues: List[Dict], welcome_text: str = "欢迎收听本期节目！",
-                   welcome_voice: str = None) -> Dict[str, str]:
+                   welcome_voice: str = None, workers: int = None,
+                   workspace: "PodcastWorkspace" = None) -> Dict[str, str]:
         """合成对话音频
 
         Args:
-            dialogues: 对话列表（每项包含 speaker, text, voice_id, emotion）
+            dialogues: 对话列表（每项包含 speaker, text, voice_id, emotion），
+                       也可以是逐段产出对话的生成器（如 DialogueGenerator.generate_stream）
             welcome_text: 欢迎语文本
             welcome_voice: 欢迎语音色ID
+            workers: 并发合成的线程数，默认使用初始化时的设置，1为串行
+            workspace: 工作目录，指定后片段写入其中，已完成且输入未变的片段直接复用
 
         Returns:
-            dict: 包含 welcome_path 和 dialogue_files
+            dict: 包含 welcome_path 和 dialogue_files（按对话顺序排列）
         """
+        workers = max(1, workers or self.workers)
         # 默认欢迎语音色
         DEFAULT_VOICE = "moss_audio_aaa1346a-7ce7-11f0-8e61-2e6e3c7ee85d"
         welcome_voice = welcome_voice or DEFAULT_VOICE
+        segment_dir = workspace.dir if workspace else self.output_dir
 
         def hex_to_mp3(hex_data: str, path: str):
             audio_bytes = bytes.fromhex(hex_data)
             with open(path, 'wb') as f:
                 f.write(audio_bytes)
 
-        # 生成欢迎语
-        print("🎵 合成欢迎语...")
-        welcome_hex = self.client.tts(welcome_text, welcome_voice, "happy")
-        if not welcome_hex:
-            raise RuntimeError("欢迎语生成失败")
-        welcome_path = self.output_dir / 'welcome.mp3'
-        hex_to_mp3(welcome_hex, str(welcome_path))
-
-        # 生成对话音频
-        print(f"🎙️ 合成 {len(dialogues)} 段对话...")
-        dialogue_files = []
-        valid_emotions = ["happy", "sad", "angry", "fearful", "disgusted", "surprised", "calm"]
-
-        for i, dialogue in enumerate(dialogues):
+        def synthesize_segment(name: str, text: str, voice_id: str, emotion: str) -> Optional[str]:
+            """合成单个片段，工作目录中已有相同输入的片段时跳过"""
+            input_hash = PodcastWorkspace.hash_of(text, voice_id, emotion)
+            if workspace:
+                done = workspace.segment(name, input_hash)
+                if done:
+                    print(f"  ⏭️ 已完成，跳过: {name}")
+                    return str(done)
+            audio_hex = self.client.tts(text, voice_id, emotion)
+            if not audio_hex:
+                return None
+            path = segment_dir / f'{name}.mp3'
+            hex_to_mp3(audio_hex, str(path))
+            if workspace:
+                workspace.mark_segment(name, input_hash)
+            return str(path)
+
+        def synthesize_welcome() -> str:
+            print("🎵 合成欢迎语...")
+            path = synthesize_segment('welcome', welcome_text, welcome_voice, "happy")
+            if not path:
+                raise RuntimeError("欢迎语生成失败")
+            return path
+
+        def synthesize_one(i: int, dialogue: Dict) -> Optional[str]:
             speaker = dialogue.get('speaker', '未知')
             text = dialogue.get('text', '')
             # 每段对话用自己的 voice_id 和 emotion
             v_id = dialogue.get('voice_id') or welcome_voice
-            emo = dialogue.get('emotion', 'calm')  # 如果没有emotion字段，默认用calm
+            emo = self._normalize_emotion(dialogue.get('emotion', 'calm'))  # 如果没有emotion字段，默认用calm
 
             if not text or len(text.strip()) <= 5:
-                continue
-
-            # 情感映射
-            emo = emo.lower()
-            mapping = {
-                "excited": "happy", "joyful": "happy", "delighted": "happy", "cheerful": "happy",
-                "upset": "sad", "depressed": "sad", "disappointed": "sad",
-                "mad": "angry", "furious": "angry", "irritated": "angry",
-                "scared": "fearful", "terrified": "fearful", "anxious": "fearful",
-                "shocked": "surprised", "amazed": "surprised", "startled": "surprised",
-                "neutral": "calm", "thoughtful": "calm", "curious": "surprised"
-            }
-            emo = mapping.get(emo, emo) if emo not in valid_emotions else emo
+                return None
 
             print(f"  🗣️ {speaker}: {text[:30]}...")
-            audio_hex = self.client.tts(text.strip(), v_id, emo)
-            if audio_hex:
-                dia_path = self.output_dir / f'dia_{i}.mp3'
-                hex_to_mp3(audio_hex, str(dia_path))
-                dialogue_files.append(str(dia_path))
+            return synthesize_segment(f'dia_{i}', text.strip(), v_id, emo)
+
+        # 生成对话音频
+        if isinstance(dialogues, list):
+            print(f"🎙️ 合成 {len(dialogues)} 段对话（并发数: {workers}）...")
+        else:
+            print(f"🎙️ 边生成对话边合成（并发数: {workers}）...")
+
+        # 结果按对话序号收集，保证 dialogue_files 与 dia_{i}.mp3 编号顺序一致
+        if workers == 1:
+            welcome_path = synthesize_welcome()
+            results = [synthesize_one(i, d) for i, d in enumerate(dialogues)]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # 欢迎语与对话一起提交；dialogues 为生成器时每产出一段就提交合成
+                welcome_future = executor.submit(synthesize_welcome)
+                futures = [executor.submit(synthesize_one, i, d) for i, d in enumerate(dialogues)]
+                welcome_path = welcome_future.result()
+                results = [future.result() for future in futures]
+        dialogue_files = [path for path in results if path]
 
         if not dialogue_files:
             raise RuntimeError("没有有效对话音频")
 
         return {
-            'welcome_path': str(welcome_path),
+            'welcome_path': welcome_path,
             'dialogue_files': dialogue_files
         }
 
-    def merge_dialogues(self, dialogue_files: List[str], output_path: str = None) -> str:
-        """合并对话音频"""
-        if not output_path:
-            output_path = str(self.output_dir / 'dialogue.mp3')
-
-        if len(dialogue_files) == 1:
-            Path(dialogue_files[0]).rename(output_path)
-        else:
-            self._concat_audio(dialogue_files, output_path)
+    def _normalize_emotion(self, emotion: str) -> str:
+        """情感映射：将非标准情感映射到标准情感"""
+        emo = (emotion or 'calm').lower()
+        return self.EMOTION_MAPPING.get(emo, emo) if emo not in self.VALID_EMOTIONS else emo
 
-        return output_path
+    def merge_dialogues(self, dialogue_files: List[str], output_path: str = None):
+        """合并对话音频：MP3 片段参数一致时按帧直接拼接（不重新编码）为单个文件
 
-    def _concat_audio(self, files: list, output_path: str):
-        """拼接音频"""
-        list_content = ''
-        for f in files:
-            list_content += f"file '{Path(f).absolute().as_posix()}'\n"
-        list_file = self.output_dir / 'concat_list.txt'
-        with open(list_file, 'w', encoding='utf-8') as f:
-            f.write(list_content)
-
-        subprocess.run(
-            ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', str(list_file),
-             '-c:a', 'libmp3lame', '-q:a', '2', output_path],
-            capture_output=True
-        )
+        Returns:
+            合并后的文件路径；无法按帧拼接时返回原片段列表，由 PodcastEditor.edit 在滤镜图中拼接
+        """
+        if len(dialogue_files) == 1:
+            return dialogue_files[0]
+        if all(str(f).lower().endswith('.mp3') for f in dialogue_files):
+            from minimax_cli import join_mp3
+            joined = join_mp3([Path(f).read_bytes() for f in dialogue_files])
+            if joined is not None:
+                output_path = output_path or str(self.output_dir / 'dialogue.mp3')
+                with open(output_path, 'wb') as f:
+                    f.write(joined)
+                return output_path
+        print("⚠️ 对话片段无法按帧直接拼接（音频参数不一致），改为在编辑时逐段拼接")
+        return list(dialogue_files)
 
 
 class PodcastEditor:
     """播客编辑器 - 拼接音频+背景音乐"""
 
+    # 各输入统一为相同的采样格式后才能 concat
+    AUDIO_FORMAT = "aformat=sample_fmts=fltp:sample_rates=44100:channel_layouts=stereo"
+
     def __init__(self, output_dir: str = "./output/podcasts", templates_dir: str = "templates"):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.templates_dir = Path(templates_dir)
 
-    def edit(self, welcome_path: str, dialogue_path: str,
+    def edit(self, welcome_path: str, dialogue_path,
              bgm01_path: str = None, bgm02_path: str = None,
-             output_path: str = None) -> str:
-        """编辑播客
+             output_path: str = None, loudnorm: bool = True) -> str:
+        """编辑播客：一次 ffmpeg 调用（filter_complex）完成拼接、淡出、格式与响度统一，只编码一次
+
+        片段顺序: BGM1 → 欢迎语 → BGM2（淡出）→ 对话 → BGM1 → BGM2（淡出）
 
         Args:
             welcome_path: 欢迎语音频
-            dialogue_path: 对话音频
+            dialogue_path: 对话音频，或按顺序排列的对话片段列表（直接拼接，无需先合并）
             bgm01_path: 背景音乐1
             bgm02_path: 背景音乐2（带淡出）
             output_path: 输出路径
+            loudnorm: 是否做响度标准化（EBU R128，-16 LUFS）
 
         Returns:
             生成的播客文件路径
         """
         bgm01_path = bgm01_path or str(self.templates_dir / 'bgm01.wav')
         bgm02_path = bgm02_path or str(self.templates_dir / 'bgm02.wav')
+        dialogue_files = [dialogue_path] if isinstance(dialogue_path, (str, Path)) else list(dialogue_path)
 
         if not output_path:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_path = str(self.output_dir / f'podcast_{timestamp}.mp3')
 
-        def run_ffmpeg(args):
-            subprocess.run(['ffmpeg', '-y'] + args, capture_output=True)
-
-        def normalize_audio(input_path: str, output_path: str):
-            run_ffmpeg(['-i', input_path, '-c:a', 'libmp3lame', '-f', 'mp3', output_path])
-
-        # 构建音频片段列表
-        all_parts = []
-
-        # BGM1
-        bgm1_part = str(self.output_dir / 'bgm01_part.mp3')
-        if normalize_audio(bgm01_path, bgm1_part):
-            all_parts.append(bgm1_part)
-
-        # 欢迎语
-        welcome_norm = str(self.output_dir / 'welcome_norm.mp3')
-        if normalize_audio(welcome_path, welcome_norm):
-            all_parts.append(welcome_norm)
-
-        # BGM2（淡出）
-        bgm2_norm = str(self.output_dir / 'bgm02_norm.mp3')
-        bgm2_part = str(self.output_dir / 'bgm02_fade.mp3')
-        if normalize_audio(bgm02_path, bgm2_norm):
-            run_ffmpeg(['-i', bgm2_norm, '-af', 'afade=t=out:st=0:d=1',
-                       '-c:a', 'libmp3lame', bgm2_part])
-            all_parts.append(bgm2_part)
-
-        # 对话
-        dialogue_norm = str(self.output_dir / 'dialogue_norm.mp3')
-        if Path(dialogue_path).exists() and normalize_audio(dialogue_path, dialogue_norm):
-            all_parts.append(dialogue_norm)
-
-        # 结尾BGM
-        if Path(bgm1_part).exists():
-            all_parts.append(bgm1_part)
-        if Path(bgm2_part).exists():
-            all_parts.append(bgm2_part)
-
-        if not all_parts:
+        inputs, graph = [], []
+
+        def add_input(path: str, label: str, copies: int = 1, filters: str = "") -> list:
+            """添加一个输入并统一格式，需要重复使用时用 asplit 复制，返回输出标签列表"""
+            if not path or not Path(path).exists():
+                return [None] * copies
+            chain = f"[{len(inputs) // 2}:a]{self.AUDIO_FORMAT}{filters}"
+            inputs.extend(['-i', str(path)])
+            if copies == 1:
+                graph.append(f"{chain}[{label}]")
+                return [label]
+            labels = [f"{label}_{k}" for k in range(copies)]
+            graph.append(f"{chain},asplit={copies}" + "".join(f"[{l}]" for l in labels))
+            return labels
+
+        bgm1 = add_input(bgm01_path, 'bgm1', copies=2)
+        welcome = add_input(welcome_path, 'welcome')
+        bgm2 = add_input(bgm02_path, 'bgm2', copies=2, filters=",afade=t=out:st=0:d=1")
+        dialogues = [add_input(path, f'dia{i}')[0] for i, path in enumerate(dialogue_files)]
+
+        sequence = [l for l in [bgm1[0], welcome[0], bgm2[0], *dialogues, bgm1[1], bgm2[1]] if l]
+        if not sequence:
             raise RuntimeError("没有有效音频片段")
 
-        # 拼接
-        list_content = ''
-        for f in all_parts:
-            list_content += f"file '{Path(f).absolute().as_posix()}'\n"
-        list_file = self.output_dir / 'concat_list.txt'
-        with open(list_file, 'w', encoding='utf-8') as f:
-            f.write(list_content)
-
-        subprocess.run(
-            ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', str(list_file),
-             '-c:a', 'libmp3lame', '-q:a', '2', output_path],
-            capture_output=True
+        mix = "".join(f"[{l}]" for l in sequence) + f"concat=n={len(sequence)}:v=0:a=1"
+        if loudnorm:
+            mix += ",loudnorm=I=-16:TP=-1.5:LRA=11"
+        graph.append(mix + "[out]")
+
+        result = subprocess.run(
+            ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error'] + inputs +
+            ['-filter_complex', ';'.join(graph), '-map', '[out]',
+             '-ar', '44100', '-c:a', 'libmp3lame', '-q:a', '2', output_path],
+            capture_output=True, text=True
         )
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg 编辑失败: {result.stderr.strip()[-500:]}")
 
         return output_path
 
@@ -298,11 +413,7 @@ class PodcastEditor:
         patterns = [
             self.output_dir / 'dia_*.mp3',
             self.output_dir / 'welcome*.mp3',
-            self.output_dir / 'bgm01_part.mp3',
-            self.output_dir / 'bgm02_norm.mp3',
-            self.output_dir / 'bgm02_fade.mp3',
             self.output_dir / 'dialogue*.mp3',
-            self.output_dir / 'concat_list.txt',
         ]
         for pattern in patterns:
             for f in glob.glob(str(pattern)):
@@ -312,25 +423,127 @@ class PodcastEditor:
                     pass
 
 
+class PodcastWorkspace:
+    """播客工作目录 - 保存中间文件和进度清单 manifest.json，失败后重跑从断点继续
+
+    每期节目按输入内容的哈希建立独立目录；manifest 记录已完成的阶段和每个语音片段
+    （dia_{i}.mp3 等）对应输入（文本、音色、情感）的哈希，输入未变且文件完整的片段不再重新合成。
+    """
+
+    STAGES = ["dialogue", "synthesis", "done"]
+
+    def __init__(self, root: str, key: str):
+        self.dir = Path(root) / key
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.dir / 'manifest.json'
+        self._lock = threading.Lock()
+        self.manifest = self._load()
+
+    @staticmethod
+    def hash_of(*parts) -> str:
+        """输入内容的短哈希"""
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def for_input(cls, root: str, *parts) -> "PodcastWorkspace":
+        """按输入内容（主题或对话列表）定位工作目录"""
+        return cls(root, cls.hash_of(*parts))
+
+    @property
+    def resumable(self) -> bool:
+        """是否存在可继续的进度"""
+        return self.manifest.get('stage') is not None
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            manifest.setdefault('segments', {})
+            return manifest
+        except (OSError, ValueError):
+            return {"stage": None, "segments": {}}
+
+    def _save(self):
+        self.manifest['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def stage_done(self, stage: str) -> bool:
+        """某阶段是否已完成"""
+        current = self.manifest.get('stage')
+        return current is not None and self.STAGES.index(current) >= self.STAGES.index(stage)
+
+    def mark_stage(self, stage: str):
+        """记录已完成的阶段"""
+        with self._lock:
+            self.manifest['stage'] = stage
+            self._save()
+
+    def save_dialogues(self, dialogues: List[Dict]):
+        """保存对话列表并标记对话阶段完成"""
+        with open(self.dir / 'dialogues.json', 'w', encoding='utf-8') as f:
+            json.dump(dialogues, f, ensure_ascii=False, indent=2)
+        self.mark_stage('dialogue')
+
+    def load_dialogues(self) -> Optional[List[Dict]]:
+        """读取已生成的对话，不存在时返回 None"""
+        if not self.stage_done('dialogue'):
+            return None
+        try:
+            with open(self.dir / 'dialogues.json', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def segment(self, name: str, input_hash: str) -> Optional[Path]:
+        """返回已完成且输入未变的片段路径，否则返回 None"""
+        entry = self.manifest['segments'].get(name)
+        path = self.dir / f'{name}.mp3'
+        if entry and entry.get('hash') == input_hash and path.exists() \
+                and path.stat().st_size == entry.get('size'):
+            return path
+        return None
+
+    def mark_segment(self, name: str, input_hash: str):
+        """记录片段已完成（合成线程并发调用）"""
+        path = self.dir / f'{name}.mp3'
+        with self._lock:
+            self.manifest['segments'][name] = {"hash": input_hash, "size": path.stat().st_size}
+            self._save()
+
+    def remove(self):
+        """删除工作目录"""
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
 class PodcastGenerator:
     """播客生成器 - 整合所有模块"""
 
-    def __init__(self, output_dir: str = "./output/podcasts", templates_dir: str = "templates"):
+    def __init__(self, output_dir: str = "./output/podcasts", templates_dir: str = "templates",
+                 workers: int = 4, tts_cache: bool = True, chat_cache: bool = False,
+                 chat_cache_ttl: float = 7 * 86400, resume: bool = True, keep_work: bool = False):
         self.output_dir = Path(output_dir)
         self.templates_dir = Path(templates_dir)
+        self.resume = resume          # 是否从上次未完成的进度继续
+        self.keep_work = keep_work    # 成功后是否保留工作目录
 
-        # 初始化MiniMaxClient
+        # 初始化MiniMaxClient（连接池不小于并发数）
         sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
         from minimax_cli import MiniMaxClient
-        self.client = MiniMaxClient()
+        # chat_cache 开启时，失败重跑不再重复生成同一主题的对话
+        self.client = MiniMaxClient(pool_maxsize=max(16, workers), tts_cache=tts_cache,
+                                    chat_cache=chat_cache, chat_cache_ttl=chat_cache_ttl)
 
         # 初始化模块
         self.dialogue_gen = DialogueGenerator(self.client, templates_dir)
-        self.audio_synth = AudioSynthesizer(self.client, output_dir)
+        self.audio_synth = AudioSynthesizer(self.client, output_dir, workers=workers)
         self.editor = PodcastEditor(output_dir, templates_dir)
 
     def generate(self, topic: str, welcome_text: str = "欢迎收听本期节目！",
-                 output_path: str = None, json_output: str = None) -> str:
+                 output_path: str = None, json_output: str = None, stream: bool = False) -> str:
         """完整播客生成流程（自动生成对话）
 
         Args:
@@ -338,46 +551,38 @@ class PodcastGenerator:
             welcome_text: 欢迎语
             output_path: 最终播客输出路径
             json_output: 对话JSON保存路径
+            stream: 流式生成对话，每段对话生成后立即开始语音合成
 
         Returns:
             播客文件路径
         """
         print("🎙️ 开始生成播客...")
-
-        # 1. 生成对话
-        print("📝 生成对话内容...")
-        dialogues = self.dialogue_gen.generate(topic, json_output)
+        workspace = self._open_workspace("topic", topic)
+
+        # 1. 生成对话（工作目录中已有对话时直接复用）
+        dialogues = workspace.load_dialogues()
+        if dialogues is not None:
+            print(f"  ⏭️ 复用已生成的 {len(dialogues)} 段对话")
+        elif stream:
+            print("📝 流式生成对话内容...")
+            dialogues = self._stream_dialogues(workspace, topic, json_output)
+        else:
+            print("📝 生成对话内容...")
+            dialogues = self.dialogue_gen.generate(topic, json_output)
+            print(f"  ✅ 生成 {len(dialogues)} 段对话")
+            workspace.save_dialogues(dialogues)
+
+        # 2. 合成音频 3. 编辑播客
+        return self._produce(workspace, dialogues, welcome_text, output_path)
+
+    def _stream_dialogues(self, workspace: PodcastWorkspace, topic: str, json_output: str = None):
+        """逐段产出流式生成的对话，全部生成后保存到工作目录"""
+        dialogues = []
+        for dialogue in self.dialogue_gen.generate_stream(topic, json_output):
+            dialogues.append(dialogue)
+            yield dialogue
         print(f"  ✅ 生成 {len(dialogues)} 段对话")
-
-        # 2. 合成音频
-        print("🎵 合成音频...")
-        audio_result = self.audio_synth.synthesize(dialogues, welcome_text)
-
-        # 合并对话
-        dialogue_path = self.audio_synth.merge_dialogues(audio_result['dialogue_files'])
-
-        # 3. 编辑播客
-        print("🎼 编辑播客...")
-        podcast_path = self.editor.edit(audio_result['welcome_path'], dialogue_path)
-        if output_path and output_path != podcast_path:
-            Path(podcast_path).rename(output_path)
-            podcast_path = output_path
-
-        # 清理
-        self.editor.cleanup()
-
-        # 时长
-        result = subprocess.run(
-            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-             '-of', 'default=noprint_wrappers=1:nokey=1', podcast_path],
-            capture_output=True, text=True
-        )
-        duration = float(result.stdout.strip()) if result.stdout.strip() else 0
-
-        print(f"✅ 播客生成完成: {podcast_path}")
-        print(f"📊 总时长: {duration:.1f}秒")
-
-        return podcast_path
+        workspace.save_dialogues(dialogues)
 
     def from_json(self, json_path: str, welcome_text: str = "欢迎收听本期节目！",
                   output_path: str = None) -> str:
@@ -397,21 +602,54 @@ class PodcastGenerator:
         dialogues = self.dialogue_gen.load(json_path)
         print(f"  ✅ 读取 {len(dialogues)} 段对话")
 
-        # 合成音频（每段对话用自己的voice_id）
-        audio_result = self.audio_synth.synthesize(dialogues, welcome_text)
-
-        # 合并对话
-        dialogue_path = self.audio_synth.merge_dialogues(audio_result['dialogue_files'])
-
-        # 3. 编辑播客
-        podcast_path = self.editor.edit(audio_result['welcome_path'], dialogue_path)
-        if output_path:
-            Path(podcast_path).rename(output_path)
-            podcast_path = output_path
+        workspace = self._open_workspace("dialogues", dialogues)
+        workspace.save_dialogues(dialogues)
+        return self._produce(workspace, dialogues, welcome_text, output_path)
+
+    def _open_workspace(self, *key_parts) -> PodcastWorkspace:
+        """按输入内容打开工作目录（output_dir/work/<哈希>）"""
+        workspace = PodcastWorkspace.for_input(self.output_dir / 'work', *key_parts)
+        if workspace.stage_done('done'):
+            # --keep-work 保留下来的已完成目录，不是断点，重新生成
+            print(f"🧹 相同输入的上一期已完成，清理保留的工作目录后重新生成: {workspace.dir}")
+            workspace.remove()
+            workspace = PodcastWorkspace.for_input(self.output_dir / 'work', *key_parts)
+        elif workspace.resumable and self.resume:
+            done = len(workspace.manifest['segments'])
+            print(f"♻️ 发现未完成的进度（已完成 {done} 个语音片段），从断点继续: {workspace.dir}")
+        elif workspace.resumable:
+            workspace.remove()
+            workspace = PodcastWorkspace.for_input(self.output_dir / 'work', *key_parts)
+        return workspace
+
+    def _produce(self, workspace: PodcastWorkspace, dialogues: List[Dict],
+                 welcome_text: str, output_path: str = None) -> str:
+        """合成音频、编辑，每个阶段完成后记录到工作目录"""
+        try:
+            # 合成音频（每段对话用自己的voice_id，已完成的片段跳过）
+            print("🎵 合成音频...")
+            audio_result = self.audio_synth.synthesize(dialogues, welcome_text, workspace=workspace)
+            workspace.mark_stage('synthesis')
+
+            # 对话片段按帧拼接为一个输入，再进入同一个 ffmpeg 滤镜图，整期只编码一次
+            print("🎼 编辑播客...")
+            dialogue = self.audio_synth.merge_dialogues(audio_result['dialogue_files'],
+                                                        str(workspace.dir / 'dialogue.mp3'))
+            podcast_path = self.editor.edit(audio_result['welcome_path'], dialogue)
+            if output_path and output_path != podcast_path:
+                Path(podcast_path).rename(output_path)
+                podcast_path = output_path
+        except Exception:
+            print(f"💾 进度已保存到 {workspace.dir}，重新运行相同命令即可从断点继续")
+            raise
+        workspace.mark_stage('done')
 
         # 清理
         self.editor.cleanup()
+        if not self.keep_work:
+            workspace.remove()
 
+        # 时长
         result = subprocess.run(
             ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
              '-of', 'default=noprint_wrappers=1:nokey=1', podcast_path],
@@ -467,9 +705,42 @@ def main():
     parser.add_argument('--templates', type=str, default="templates",
                         help='模板目录')
 
+    # 性能选项
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='并发合成对话的线程数，默认4，1为串行')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不使用语音合成缓存（./cache/tts），每句都重新合成')
+    parser.add_argument('--chat-cache', action='store_true',
+                        help='缓存对话生成结果（./cache/chat），相同主题重跑时不再重新生成')
+    parser.add_argument('--chat-cache-ttl', type=int, default=7 * 86400, metavar='秒',
+                        help='对话缓存有效期（秒），默认7天')
+    parser.add_argument('--stream', action='store_true',
+                        help='流式生成对话，每段对话生成后立即开始语音合成（不使用对话缓存）')
+    parser.add_argument('--fresh', action='store_true',
+                        help='丢弃上次未完成的进度，从头生成（默认相同输入自动断点续跑）')
+    parser.add_argument('--keep-work', action='store_true',
+                        help='完成后保留工作目录（output/podcasts/work/）中的对话和语音片段')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='接口调用日志级别，默认INFO')
+    parser.add_argument('--log-json', action='store_true', help='接口调用日志以每行一个 JSON 的格式输出')
+    parser.add_argument('--log-file', action='store_true',
+                        help='接口调用日志同时写入 output/logs/podcast_日期.log')
+    parser.add_argument('--stats', action='store_true',
+                        help='结束时输出接口调用统计（对话生成/语音合成的耗时、流量和用量）')
+
     args = parser.parse_args()
 
-    generator = PodcastGenerator(templates_dir=args.templates)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from minimax_cli import setup_logging
+    setup_logging(args.log_level, json_format=args.log_json,
+                  log_file=f"output/logs/podcast_{datetime.now().strftime('%Y%m%d')}.log" if args.log_file else None)
+
+    generator = PodcastGenerator(templates_dir=args.templates, workers=args.workers,
+                                 tts_cache=not args.no_cache, chat_cache=args.chat_cache,
+                                 chat_cache_ttl=args.chat_cache_ttl, resume=not args.fresh,
+                                 keep_work=args.keep_work)
+    if args.stats:
+        atexit.register(lambda: print(generator.client.stats.format_summary()))
     if args.output:
         generator.output_dir = Path(args.output).parent
         generator.editor.output_dir = generator.output_dir
@@ -500,7 +771,8 @@ def main():
             output = generator.generate(
                 topic,
                 welcome_text=args.welcome_text,
-                output_path=args.output
+                output_path=args.output,
+                stream=args.stream
             )
     elif args.generate_only:
         # 模式3：仅生成对话
@@ -515,7 +787,8 @@ def main():
         output = generator.generate(
             args.input,
             welcome_text=args.welcome_text,
-            output_path=args.output
+            output_path=args.output,
+            stream=args.stream
         )
 
     # 播放询问
@@ -536,4 +809,10 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from minimax_cli import MiniMaxError
+    try:
+        main()
+    except MiniMaxError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,65 @@
+"""测试公共夹具：临时工作目录中的客户端、本地 HTTP 文件服务"""
+
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from minimax_cli import MiniMaxClient  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """在临时目录中创建客户端（输出目录、缓存都落在 tmp_path 下）"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('MINIMAX_GROUP_ID', 'test-group')
+    monkeypatch.setenv('MINIMAX_API_KEY', 'test-key')
+    client = MiniMaxClient(download_chunk_size=1024)
+    yield client
+    client.close()
+
+
+class _FileHandler(BaseHTTPRequestHandler):
+    """按路径返回 server.files 中的内容，支持单个 Range 请求"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        data = self.server.files.get(self.path.split('?')[0])
+        if data is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        start, end = 0, len(data) - 1
+        range_header = self.headers.get('Range')
+        if range_header:
+            first, _, last = range_header.split('=', 1)[1].partition('-')
+            start, end = int(first), min(int(last or end), end)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        else:
+            self.send_response(200)
+        body = data[start:end + 1]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def file_server():
+    """本地文件服务，返回 (server, base_url)，通过 server.files[路径] = bytes 注册文件"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FileHandler)
+    server.files = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
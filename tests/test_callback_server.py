@@ -0,0 +1,75 @@
+"""视频回调服务：用本地请求模拟 MiniMax 的回调推送"""
+
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from minimax_cli import VideoCallbackServer
+
+
+def _post(server, payload, path="/"):
+    """向回调服务 POST JSON，返回 (状态码, 响应内容)"""
+    request = urllib.request.Request(f"http://127.0.0.1:{server.port}{path}",
+                                     data=json.dumps(payload).encode('utf-8'), method='POST',
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture
+def downloads(client):
+    """记录被触发下载的 file_id"""
+    calls = []
+
+    def fake_download(file_id, filename=None):
+        calls.append(file_id)
+        return f"output/videos/{file_id}.mp4"
+
+    client.download_video = fake_download
+    return calls
+
+
+def test_challenge_success_and_unknown_task(client, downloads):
+    with VideoCallbackServer(client, port=0) as server:
+        assert server.host == "127.0.0.1"
+        assert server.port != 0
+
+        assert _post(server, {"challenge": "abc123"}) == (200, {"challenge": "abc123"})
+
+        server.register("task-1")
+        assert _post(server, {"task_id": "task-1", "status": "success", "file_id": "file-1"}) \
+            == (200, {"status": "ok"})
+        result = server.wait_for("task-1", timeout=5)["task-1"]
+        assert result == {"status": "Success", "file_id": "file-1",
+                          "filepath": "output/videos/file-1.mp4"}
+
+        assert _post(server, {"task_id": "unknown", "status": "success", "file_id": "file-2"}) \
+            == (200, {"status": "ignored"})
+        assert "unknown" not in server.results
+
+    assert downloads == ["file-1"]
+
+
+def test_token_required_and_restart(client, downloads):
+    server = VideoCallbackServer(client, port=0, token="secret", accept_unregistered=True).start()
+    try:
+        assert _post(server, {"task_id": "t", "status": "success", "file_id": "f"})[0] == 403
+        assert _post(server, {"challenge": "c"}, path="/secret") == (200, {"challenge": "c"})
+    finally:
+        server.stop()
+
+    # stop() 后可以再次启动
+    server.port = 0
+    server.start()
+    try:
+        assert _post(server, {"task_id": "t", "status": "success", "file_id": "f"}, path="/secret") \
+            == (200, {"status": "ok"})
+        assert server.wait_for("t", timeout=5)["t"]["filepath"] == "output/videos/f.mp4"
+    finally:
+        server.stop()
+    assert downloads == ["f"]
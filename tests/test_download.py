@@ -0,0 +1,54 @@
+"""视频下载：断点续传的临时文件按 file_id 区分"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def _serve_videos(client, file_server, videos):
+    """注册 {file_id: 内容}，所有文件使用相同的 API 文件名"""
+    server, base = file_server
+    for file_id, data in videos.items():
+        server.files[f'/{file_id}'] = data
+
+    def fake_request(method, endpoint, **kwargs):
+        file_id = endpoint.rpartition('=')[2]
+        return {"file": {"file_id": file_id, "bytes": len(videos[file_id]),
+                         "filename": "output.mp4", "download_url": f"{base}/{file_id}"}}
+
+    client._request = fake_request
+
+
+def test_resume_does_not_mix_file_ids_with_same_filename(client, file_server):
+    video_a = os.urandom(5000)
+    video_b = os.urandom(7000)
+    _serve_videos(client, file_server, {"A": video_a, "B": video_b})
+
+    # 模拟 A 的中断下载：数据已全部写入，进度记录为完成
+    part_a = Path('output/videos/20250101_000000_A_output.mp4.part')
+    part_a.write_bytes(video_a)
+    part_a.with_name(part_a.name + '.json').write_text(
+        json.dumps({"size": len(video_a), "segments": [[0, len(video_a) - 1, len(video_a)]]}))
+
+    path_b = Path(client.download_video("B"))
+    assert path_b.read_bytes() == video_b
+    assert "_B_output.mp4" in path_b.name
+    assert part_a.read_bytes() == video_a  # B 没有续传到 A 的临时文件
+
+    path_a = Path(client.download_video("A"))
+    assert path_a.name == "20250101_000000_A_output.mp4"
+    assert path_a.read_bytes() == video_a
+    assert not part_a.exists()
+
+
+def test_concurrent_downloads_with_same_filename(client, file_server):
+    videos = {file_id: os.urandom(6000 + i * 1000) for i, file_id in enumerate("ABCD")}
+    _serve_videos(client, file_server, videos)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        paths = dict(zip(videos, executor.map(client.download_video, videos)))
+
+    for file_id, data in videos.items():
+        assert Path(paths[file_id]).read_bytes() == data
+    assert not list(Path('output/videos').glob('*.part*'))